@@ -1,22 +1,85 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+import bisect
+from datetime import date, timedelta
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, Date, Index, String, ForeignKey, Integer, and_, delete, insert, or_, tuple_, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from db.model import BaseModel
 from db.dataclasses import Response, DbErrorType
-from appointments_operations.schema import AppointmentModel
+from appointments_operations.schema import (
+    WEEKDAYS,
+    AppointmentModel,
+    BULK_CHUNK_SIZE,
+    AvailabilityInput,
+    AvailabilityOutput,
+    AvailabilitySearch,
+    AvailabilitySelection,
+    AvailabilityTemplateInput,
+    AvailabilityTemplateOutput,
+    SlotKey,
+    encode_cursor,
+    to_minutes,
+    to_time,
+)
+
+# (start_minute, end_minute, slot) of the slots added to the availability table, see 'ScheduleIndex.add'
+AddedSlot = Tuple[int, int, AvailabilityOutput]
+
+
+def take_slot(taken: Dict[Hashable, List[Tuple[int, int]]], key: Hashable, start_minute: int, end_minute: int) -> bool:
+    """
+    Adds the slot to the sorted (start_minute, end_minute) slots of 'key' (a dentist's day), unless it overlaps one.
+    """
+    intervals = taken.setdefault(key, [])
+    # NOTE: the slots of a day do not overlap, only the last one starting before the end can
+    idx = bisect.bisect_left(intervals, (end_minute, -1))
+    if idx > 0 and intervals[idx - 1][1] > start_minute:
+        return False
+    intervals.insert(idx, (start_minute, end_minute))
+    return True
+
+
+def chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for idx in range(0, len(items), size):
+        yield items[idx : idx + size]
+
 
 class Availability(BaseModel):
     __tablename__ = "availability"
+    # NOTE: the overlap check of 'add_appointment' seeks the slots of a dentist's day by start,
+    # 'search_appointments' the slots of a dentist or of a clinic sorted by day and start
+    __table_args__ = (
+        Index("ix_availability_dentist_day_start", "dentist_id", "day_of_week", "start_minute"),
+        Index("ix_availability_clinic_day_start", "clinic_id", "day_of_week", "start_minute"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     dentist_id = Column(String, nullable=False)
     clinic_id = Column(String, nullable=False)
     day_of_week = Column(String, nullable=False)
-    start_time = Column(String, nullable=False)
-    end_time = Column(String, nullable=False)
+    # minutes since midnight, the API still uses 'HH:MM' ('start_time' and 'end_time')
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
     status = Column(String, nullable=False)
 
+    @property
+    def start_time(self) -> str:
+        return to_time(self.start_minute)
+
+    @start_time.setter
+    def start_time(self, start_time: str) -> None:
+        self.start_minute = to_minutes(start_time)
+
+    @property
+    def end_time(self) -> str:
+        return to_time(self.end_minute)
+
+    @end_time.setter
+    def end_time(self, end_time: str) -> None:
+        self.end_minute = to_minutes(end_time)
+
     def to_schema(self) -> dict:
         return {
             "id": self.id,
@@ -28,35 +91,73 @@ class Availability(BaseModel):
             "dentist_id": self.dentist_id,
         }
 
+    @classmethod
+    def output_query(cls, session: Session):
+        return session.query(*cls.output_columns())
+
+    @classmethod
+    def output_columns(cls) -> tuple:
+        return (
+            cls.id,
+            cls.dentist_id,
+            cls.clinic_id,
+            cls.day_of_week,
+            cls.start_minute,
+            cls.end_minute,
+            cls.status,
+        )
+
+    @staticmethod
+    def to_output(row) -> AvailabilityOutput:
+        return AvailabilityOutput.model_construct(
+            id=row.id,
+            dentist_id=row.dentist_id,
+            clinic_id=row.clinic_id,
+            day_of_week=row.day_of_week,
+            start_time=to_time(row.start_minute),
+            end_time=to_time(row.end_minute),
+            status=row.status,
+        )
+
     @classmethod
     def add_appointment(cls, session: Session, appointment: AppointmentModel) -> Response["Availability"]:
-        existing = (
-        session.query(cls)
-        .filter(
-            cls.dentist_id == appointment.dentist_id.strip(),
-            cls.clinic_id == appointment.clinic_id.strip(),
-            cls.day_of_week == appointment.day_of_week.strip(),
-            cls.start_time == appointment.start_time.strip(),
-            cls.end_time == appointment.end_time.strip(),
+        start_minute = to_minutes(appointment.start_time)
+        end_minute = to_minutes(appointment.end_time)
+        if end_minute <= start_minute:
+            return Response.as_error(
+                message="Invalid appointment",
+                details=f"The appointment ends ({appointment.end_time}) before it starts ({appointment.start_time})",
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+        # NOTE: one range query on the (dentist_id, day_of_week, start_minute) index,
+        # any slot of the dentist that day that starts before the new one ends and ends after it starts
+        overlapping = (
+            session.query(cls.id, cls.start_minute, cls.end_minute)
+            .filter(
+                cls.dentist_id == appointment.dentist_id.strip(),
+                cls.day_of_week == appointment.day_of_week.strip(),
+                cls.start_minute < end_minute,
+                cls.end_minute > start_minute,
+            )
+            .first()
         )
-        .first()
-    )
 
-        if existing:
+        if overlapping:
             return Response.as_error(
                 message="Appointment already exists",
                 details=f"An appointment already exists for dentist {appointment.dentist_id} on {appointment.day_of_week} "
-                        f"from {appointment.start_time} to {appointment.end_time}",
+                        f"from {to_time(overlapping.start_minute)} to {to_time(overlapping.end_minute)}",
                 error_type=DbErrorType.RECORD_ALREADY_EXISTS,
             )
-        print("Existing query result:", existing)
+
         try:
             new_appointment = cls(
-                dentist_id=appointment.dentist_id,
-                clinic_id=appointment.clinic_id,
-                day_of_week=appointment.day_of_week,
-                start_time=appointment.start_time,
-                end_time=appointment.end_time,
+                dentist_id=appointment.dentist_id.strip(),
+                clinic_id=appointment.clinic_id.strip(),
+                day_of_week=appointment.day_of_week.strip(),
+                start_minute=start_minute,
+                end_minute=end_minute,
                 status=appointment.status,
             )
 
@@ -94,24 +195,388 @@ class Availability(BaseModel):
     
     @classmethod
     def delete_appointment(cls, session: Session, appointment_id: str) -> Response[None]:
-        availability = session.query(cls).filter(cls.id == appointment_id).one_or_none()
+        # NOTE: a single 'DELETE', see 'delete_appointments'
+        deleted = []
+        if appointment_id.isdigit():
+            deleted = cls.delete_appointments(
+                session=session, selection=AvailabilitySelection(ids=[int(appointment_id)])
+            ).unwrap()
 
-        if availability is None:
-            return Response.as_error("Database error", f"Appointment with id {appointment_id} not found")
+        if not deleted:
+            return Response.as_error(
+                message="Appointment not found",
+                details=f"No appointment with ID {appointment_id}",
+                error_type=DbErrorType.RECORD_NOT_FOUND,
+            )
+        return Response.as_success(None)
 
-        session.delete(availability)
-        session.commit()
+    @classmethod
+    def change_appointment_status(cls, session: Session, appointment_id: str, new_status: str) -> Response[None]:
+        # NOTE: a single 'UPDATE', see 'change_appointments_status'
+        updated = []
+        if appointment_id.isdigit():
+            updated = cls.change_appointments_status(
+                session=session, selection=AvailabilitySelection(ids=[int(appointment_id)]), new_status=new_status
+            ).unwrap()
 
+        if not updated:
+            return Response.as_error(
+                message="Appointment not found",
+                details=f"No appointment with ID {appointment_id}",
+                error_type=DbErrorType.RECORD_NOT_FOUND,
+            )
         return Response.as_success(None)
-    
+
     @classmethod
-    def change_appointment_status(cls, session: Session, appointment_id: str, new_status: str) -> Response[None]:
-        availability = session.query(cls).filter(cls.id == appointment_id).one_or_none()
+    def search_appointments(
+        cls, session: Session, search: AvailabilitySearch, after: Optional[SlotKey] = None
+    ) -> Response[Tuple[List[AvailabilityOutput], Optional[str]]]:
+        """
+        One page of the slots matching 'search', sorted by (day_of_week, start_minute, id) and resumed after
+        the 'after' key, in a single query seeking the dentist (or the clinic) index.
+
+        A slot matches the time window when it starts and ends within it.
+        """
+        query = cls.output_query(session)
+        if search.dentist_id is not None:
+            query = query.filter(cls.dentist_id == search.dentist_id.strip())
+        if search.clinic_id is not None:
+            query = query.filter(cls.clinic_id == search.clinic_id.strip())
+        if search.days is not None:
+            query = query.filter(cls.day_of_week.in_(search.days))
+        if search.start_time is not None:
+            query = query.filter(cls.start_minute >= search.window_start())
+        if search.end_time is not None:
+            # NOTE: also bounds the index range, a slot that ends in the window starts before its end
+            query = query.filter(
+                cls.start_minute < search.window_end(), cls.end_minute <= search.window_end()
+            )
+        if search.status is not None:
+            query = query.filter(cls.status == search.status)
+        if after is not None:
+            query = query.filter(tuple_(cls.day_of_week, cls.start_minute, cls.id) > tuple_(*after))
+
+        rows = query.order_by(cls.day_of_week, cls.start_minute, cls.id).limit(search.limit + 1).all()
+        outputs = [cls.to_output(row) for row in rows[: search.limit]]
+        if len(rows) <= search.limit:
+            return Response.as_success((outputs, None))
+
+        last = rows[search.limit - 1]
+        return Response.as_success((outputs, encode_cursor((last.day_of_week, last.start_minute, last.id))))
+
+    @classmethod
+    def get_dentist_schedule(cls, session: Session, dentist_id: str) -> Response[List[AddedSlot]]:
+        """
+        Every slot of a dentist with its start and end minutes, to load the dentist in a 'ScheduleIndex'.
+        """
+        rows = cls.output_query(session).filter(cls.dentist_id == dentist_id).all()
+        return Response.as_success([(row.start_minute, row.end_minute, cls.to_output(row)) for row in rows])
+
+
+    @classmethod
+    def insert_slots(cls, session: Session, rows: List[dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[AddedSlot]:
+        """
+        Inserts the rows with one 'INSERT ... RETURNING' per chunk, the added slots come back in the rows' order.
+        """
+        added: Dict[Tuple[str, str, int], AddedSlot] = dict()
+        for chunk in chunks(rows, chunk_size):
+            # NOTE: 'sort_by_parameter_order' would insert row by row without a sentinel column, the rows
+            # do not overlap so (dentist_id, day_of_week, start_minute) tells them apart instead
+            for row in session.execute(insert(cls).returning(*cls.output_columns()), chunk):
+                added[(row.dentist_id, row.day_of_week, row.start_minute)] = (
+                    row.start_minute,
+                    row.end_minute,
+                    cls.to_output(row),
+                )
+        return [added[(row["dentist_id"], row["day_of_week"], row["start_minute"])] for row in rows]
+
+    @classmethod
+    def add_appointments(
+        cls, session: Session, appointments: List[AvailabilityInput], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Response[List[Optional[AddedSlot]]]:
+        """
+        Adds the slots in one transaction, the ones overlapping a slot of the same dentist and day (already there
+        or earlier in the list) are skipped and come back as None.
+        """
+        keys = [(appointment.dentist_id.strip(), appointment.day_of_week.strip()) for appointment in appointments]
+
+        taken: Dict[Hashable, List[Tuple[int, int]]] = dict()
+        # NOTE: one query per chunk of (dentist_id, day_of_week) pairs, a row value 'IN' would scan the whole
+        # dentist index while one 'dentist_id = ? AND day_of_week IN (...)' term per dentist seeks it
+        for chunk in chunks(sorted(set(keys)), chunk_size):
+            days_by_dentist: Dict[str, List[str]] = dict()
+            for dentist_id, day in chunk:
+                days_by_dentist.setdefault(dentist_id, []).append(day)
+            for row in (
+                session.query(cls.dentist_id, cls.day_of_week, cls.start_minute, cls.end_minute)
+                .filter(
+                    or_(
+                        *(
+                            and_(cls.dentist_id == dentist_id, cls.day_of_week.in_(days))
+                            for dentist_id, days in days_by_dentist.items()
+                        )
+                    )
+                )
+                .order_by(cls.dentist_id, cls.day_of_week, cls.start_minute)
+                .all()
+            ):
+                taken.setdefault((row.dentist_id, row.day_of_week), []).append((row.start_minute, row.end_minute))
+
+        rows: List[dict] = []
+        free: List[bool] = []
+        for key, appointment in zip(keys, appointments):
+            start_minute, end_minute = to_minutes(appointment.start_time), to_minutes(appointment.end_time)
+            free.append(take_slot(taken, key, start_minute, end_minute))
+            if free[-1]:
+                rows.append(
+                    {
+                        "dentist_id": key[0],
+                        "clinic_id": appointment.clinic_id.strip(),
+                        "day_of_week": key[1],
+                        "start_minute": start_minute,
+                        "end_minute": end_minute,
+                        "status": appointment.status,
+                    }
+                )
+
+        try:
+            added = iter(cls.insert_slots(session=session, rows=rows, chunk_size=chunk_size))
+            session.commit()
+        except IntegrityError as e:
+            session.rollback()
+            return Response.as_error(
+                message="Database error",
+                details=str(e),
+                error_type=DbErrorType.RECORD_ALREADY_EXISTS,
+            )
+
+        return Response.as_success([next(added) if is_free else None for is_free in free])
+
+    @classmethod
+    def selection_criteria(cls, selection: AvailabilitySelection) -> list:
+        criteria = []
+        if selection.dentist_id is not None:
+            criteria.append(cls.dentist_id == selection.dentist_id.strip())
+        if selection.clinic_id is not None:
+            criteria.append(cls.clinic_id == selection.clinic_id.strip())
+        if selection.days is not None:
+            criteria.append(cls.day_of_week.in_([day.strip() for day in selection.days]))
+        if selection.status is not None:
+            criteria.append(cls.status == selection.status)
+        return criteria
+
+    @classmethod
+    def _write_selection(cls, session: Session, statement, selection: AvailabilitySelection, chunk_size: int) -> List[AvailabilityOutput]:
+        # NOTE: one statement per chunk of 'ids', or a single one for the filters alone
+        criteria = cls.selection_criteria(selection)
+        statements = (
+            [statement.where(cls.id.in_(chunk), *criteria) for chunk in chunks(selection.ids, chunk_size)]
+            if selection.ids is not None
+            else [statement.where(*criteria)]
+        )
+        written: List[AvailabilityOutput] = []
+        for chunk_statement in statements:
+            written.extend(
+                cls.to_output(row)
+                for row in session.execute(
+                    chunk_statement.returning(*cls.output_columns()),
+                    execution_options={"synchronize_session": False},
+                )
+            )
+        return written
+
+    @classmethod
+    def delete_appointments(
+        cls, session: Session, selection: AvailabilitySelection, chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Response[List[AvailabilityOutput]]:
+        """
+        Deletes the selected slots with set-based 'DELETE ... RETURNING' statements in one transaction.
+        """
+        deleted = cls._write_selection(session=session, statement=delete(cls), selection=selection, chunk_size=chunk_size)
+        session.commit()
+        return Response.as_success(deleted)
+
+    @classmethod
+    def change_appointments_status(
+        cls, session: Session, selection: AvailabilitySelection, new_status: str, chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Response[List[AvailabilityOutput]]:
+        """
+        Moves the selected slots to 'new_status' with set-based 'UPDATE ... RETURNING' statements in one transaction.
+        """
+        updated = cls._write_selection(
+            session=session, statement=update(cls).values(status=new_status), selection=selection, chunk_size=chunk_size
+        )
+        session.commit()
+        return Response.as_success(updated)
+
+    @classmethod
+    def get_statuses(cls, session: Session, ids: List[int], chunk_size: int = BULK_CHUNK_SIZE) -> Response[Dict[int, str]]:
+        statuses: Dict[int, str] = dict()
+        for chunk in chunks(ids, chunk_size):
+            statuses.update(session.query(cls.id, cls.status).filter(cls.id.in_(chunk)).all())
+        return Response.as_success(statuses)
+
+
+class AvailabilityTemplate(BaseModel):
+    """
+    A weekly schedule stored once, its slots are added to the availability table in bulk, up to a rolling
+    window when the template is added and further on once a search reaches later days.
+    """
+
+    __tablename__ = "availability_template"
+    # NOTE: searches look up the templates of a dentist (or a clinic) not materialized up to the searched days
+    __table_args__ = (
+        Index("ix_availability_template_dentist_until", "dentist_id", "materialized_until"),
+        Index("ix_availability_template_clinic_until", "clinic_id", "materialized_until"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dentist_id = Column(String, nullable=False)
+    clinic_id = Column(String, nullable=False)
+    # one bit per weekday, Monday is the lowest (see 'date.weekday()')
+    weekday_mask = Column(Integer, nullable=False)
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
+    slot_minutes = Column(Integer, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    status = Column(String, nullable=False)
+    # the slots up to this day (included) are in the availability table
+    materialized_until = Column(Date, nullable=False)
+
+    def expand(self, first: date, last: date) -> Iterator[Tuple[str, int, int]]:
+        """
+        (day_of_week, start_minute, end_minute) of the template's slots from 'first' to 'last' (both included).
+        """
+        day = first
+        while day <= last:
+            if self.weekday_mask & (1 << day.weekday()):
+                for start_minute in range(self.start_minute, self.end_minute - self.slot_minutes + 1, self.slot_minutes):
+                    yield day.isoformat(), start_minute, start_minute + self.slot_minutes
+            day += timedelta(days=1)
 
-        if availability is None:
-            return Response.as_error("Database error", f"Appointment with id {appointment_id} not found")
+    def to_output(self, slots_created: int) -> AvailabilityTemplateOutput:
+        return AvailabilityTemplateOutput(
+            id=self.id,
+            dentist_id=self.dentist_id,
+            clinic_id=self.clinic_id,
+            weekdays=[weekday for idx, weekday in enumerate(WEEKDAYS) if self.weekday_mask & (1 << idx)],
+            start_time=to_time(self.start_minute),
+            end_time=to_time(self.end_minute),
+            slot_minutes=self.slot_minutes,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            status=self.status,
+            materialized_until=self.materialized_until,
+            slots_created=slots_created,
+        )
 
-        availability.status = new_status
+    @classmethod
+    def add_template(
+        cls, session: Session, template: AvailabilityTemplateInput, until: date
+    ) -> Response[Tuple["AvailabilityTemplate", List[AddedSlot]]]:
+        """
+        Stores the template and adds its slots up to 'until' in the same transaction.
+        """
+        new_template = cls(
+            dentist_id=template.dentist_id.strip(),
+            clinic_id=template.clinic_id.strip(),
+            weekday_mask=sum(1 << WEEKDAYS.index(weekday) for weekday in set(template.weekdays)),
+            start_minute=to_minutes(template.start_time),
+            end_minute=to_minutes(template.end_time),
+            slot_minutes=template.slot_minutes,
+            start_date=template.start_date,
+            end_date=template.end_date,
+            status=template.status,
+            materialized_until=template.start_date - timedelta(days=1),
+        )
+        try:
+            session.add(new_template)
+            session.flush()
+            slots = new_template.materialize(session=session, until=until)
+            session.commit()
+        except IntegrityError as e:
+            session.rollback()
+            return Response.as_error(
+                message="Database error",
+                details=str(e),
+                error_type=DbErrorType.RECORD_ALREADY_EXISTS,
+            )
+
+        return Response.as_success((new_template, slots))
+
+    @classmethod
+    def get_pending_template_ids(
+        cls, session: Session, until: date, dentist_id: Optional[str] = None, clinic_id: Optional[str] = None
+    ) -> Response[List[int]]:
+        """
+        The templates of the dentist and/or clinic with slots up to 'until' that are not materialized yet,
+        one seek on the (dentist_id, materialized_until) or (clinic_id, materialized_until) index.
+        """
+        query = session.query(cls.id).filter(
+            cls.materialized_until < until, cls.materialized_until < cls.end_date
+        )
+        if dentist_id is not None:
+            query = query.filter(cls.dentist_id == dentist_id.strip())
+        if clinic_id is not None:
+            query = query.filter(cls.clinic_id == clinic_id.strip())
+        return Response.as_success([row.id for row in query.all()])
+
+    @classmethod
+    def materialize_templates(cls, session: Session, template_ids: List[int], until: date) -> Response[List[AddedSlot]]:
+        slots: List[AddedSlot] = []
+        for template in session.query(cls).filter(cls.id.in_(template_ids)).all():
+            slots.extend(template.materialize(session=session, until=until))
         session.commit()
+        return Response.as_success(slots)
+
+    def materialize(self, session: Session, until: date) -> List[AddedSlot]:
+        """
+        Adds the template's slots after 'materialized_until' and up to 'until' with one bulk insert, skipping the
+        ones that overlap a slot of the dentist already there. Does not commit.
+        """
+        first = self.materialized_until + timedelta(days=1)
+        last = min(self.end_date, until)
+        if last < first:
+            return []
+
+        # NOTE: moving 'materialized_until' first claims the days, a concurrent search that loaded
+        # the template before this commits updates no row and adds nothing
+        claimed = (
+            session.query(AvailabilityTemplate)
+            .filter(
+                AvailabilityTemplate.id == self.id,
+                AvailabilityTemplate.materialized_until == self.materialized_until,
+            )
+            .update({AvailabilityTemplate.materialized_until: last}, synchronize_session="evaluate")
+        )
+        if not claimed:
+            return []
+
+        taken: Dict[Hashable, List[Tuple[int, int]]] = dict()
+        for row in (
+            session.query(Availability.day_of_week, Availability.start_minute, Availability.end_minute)
+            .filter(
+                Availability.dentist_id == self.dentist_id,
+                Availability.day_of_week >= first.isoformat(),
+                Availability.day_of_week <= last.isoformat(),
+            )
+            .order_by(Availability.day_of_week, Availability.start_minute)
+            .all()
+        ):
+            taken.setdefault(row.day_of_week, []).append((row.start_minute, row.end_minute))
+
+        rows = [
+            {
+                "dentist_id": self.dentist_id,
+                "clinic_id": self.clinic_id,
+                "day_of_week": day,
+                "start_minute": start_minute,
+                "end_minute": end_minute,
+                "status": self.status,
+            }
+            for day, start_minute, end_minute in self.expand(first=first, last=last)
+            if take_slot(taken, day, start_minute, end_minute)
+        ]
+        return Availability.insert_slots(session=session, rows=rows)
 
-        return Response.as_success(None)
\ No newline at end of file
@@ -1,12 +1,26 @@
-from typing import Any, Optional
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from paho.mqtt.client import Client, MQTTMessage
 from config.app import AppConfig
 from db.db import Database
-from mqtt.router import MqttRouter, Params
-from mqtt.schema import HttpMethod, MqttRequest, MqttStatus
+from mqtt.router import MqttRouter, Params, current_route_access
+from mqtt.schema import HttpMethod, MqttRequest, MqttStatus, RouteAccess
 from mqtt.client import MqttClient
-from appointments_operations.model import Availability#, Clinic
+from appointments_operations.model import AddedSlot, Availability, AvailabilityTemplate, to_minutes#, Clinic
+from appointments_operations.schedule_index import ScheduleIndex
+from appointments_operations.schema import (
+    AvailabilityInput,
+    AvailabilityOutput,
+    AvailabilityPage,
+    AvailabilitySearch,
+    AvailabilitySelection,
+    AvailabilityStatusChange,
+    AvailabilityStatusInput,
+    AvailabilityTemplateInput,
+    BulkAvailabilityResult,
+    BulkAvailabilityStatus,
+)
 from mqtt.exceptions import MqttInvalidDataFormat, MqttDatabaseRecordAlreadyExist, MqttDatabaseRecordNotFound, MqttDatabaseUnexpectedError, MqttUnauthorized
 from db.dataclasses import Result, Error, Response, DbErrorType
 
@@ -17,16 +31,104 @@ class AppointmentsMqttRouter:
         self.router: MqttRouter = self._register_routes()
 
         self.clinic_cache= {}
+        # NOTE: the schedules in memory only see the writes of this process, see 'ScheduleIndex'
+        self.schedule_index: Optional[ScheduleIndex] = None
+        if app_config.SCHEDULE_INDEX_DENTISTS > 0 and not app_config.MQTT_SHARED_GROUP:
+            self.schedule_index = ScheduleIndex(
+                max_dentists=app_config.SCHEDULE_INDEX_DENTISTS, loader=self._load_schedule
+            )
+        # dentist ID -> day up to which its templates are known to be materialized, only kept along with
+        # the schedule index (this process being the only writer), so its searches skip the templates lookup
+        self.template_horizons: Dict[str, date] = dict()
 
     def _register_routes(self) -> MqttRouter:
         router = MqttRouter()
         router.register_route(HttpMethod.GET, "/appointments/:id", self.get_appointments)
+        router.register_route(
+            HttpMethod.GET, "/appointments/search", self.search_appointments, body=AvailabilitySearch
+        )
         router.register_route(HttpMethod.POST, "/appointments", self.register_appointment)
+        router.register_route(
+            HttpMethod.POST, "/appointments/templates", self.register_template, body=AvailabilityTemplateInput
+        )
+        router.register_route(
+            HttpMethod.POST, "/appointments/bulk", self.register_appointments, body=List[AvailabilityInput]
+        )
+        router.register_route(HttpMethod.DELETE, "/appointments/:id", self.delete_appointment)
+        router.register_route(
+            HttpMethod.DELETE, "/appointments/bulk", self.delete_appointments, body=AvailabilitySelection
+        )
+        router.register_route(
+            HttpMethod.PUT, "/appointments/:id/status", self.change_appointment_status, body=AvailabilityStatusInput
+        )
+        router.register_route(
+            HttpMethod.PUT, "/appointments/bulk/status", self.change_appointments_status, body=AvailabilityStatusChange
+        )
         return router
 
+    def _session(self) -> Session:
+        # NOTE: read routes use the read-only pool, see 'register_route(access=...)'
+        if current_route_access.get() is RouteAccess.READ:
+            return Session(self.database.read_engine)
+        return Session(self.database.engine)
+
+    def _load_schedule(self, dentist_id: str):
+        with Session(self.database.read_engine) as session:
+            return Availability.get_dentist_schedule(session=session, dentist_id=dentist_id).unwrap()
+
+    def _window_end(self) -> date:
+        return date.today() + timedelta(days=self.app_config.TEMPLATE_WINDOW_DAYS)
+
+    def _index_slots(self, slots: List[AddedSlot]) -> None:
+        if self.schedule_index is None:
+            return
+        for start_minute, end_minute, slot in slots:
+            self.schedule_index.add(start_minute=start_minute, end_minute=end_minute, slot=slot)
+
+    def _materialize_templates(self, search: AvailabilitySearch) -> None:
+        """
+        Adds the slots of the templates the search reaches that are not in the availability table yet.
+        """
+        until = self._window_end()
+        if search.days is not None:
+            days = []
+            for day in search.days:
+                try:
+                    days.append(date.fromisoformat(day))
+                except ValueError:
+                    continue
+            if not days:
+                return
+            until = max(days)
+
+        cached = self.schedule_index is not None and search.dentist_id is not None
+        if cached and self.template_horizons.get(search.dentist_id.strip(), date.min) >= until:
+            return
+
+        with self._session() as session:
+            template_ids = AvailabilityTemplate.get_pending_template_ids(
+                session=session, until=until, dentist_id=search.dentist_id, clinic_id=search.clinic_id
+            ).unwrap()
+        if template_ids:
+            # NOTE: the only write of a read route, once per template and searched window
+            with Session(self.database.engine) as session:
+                slots = AvailabilityTemplate.materialize_templates(
+                    session=session, template_ids=template_ids, until=until
+                ).unwrap()
+            self._index_slots(slots)
+
+        if cached:
+            dentist_id = search.dentist_id.strip()
+            self.template_horizons[dentist_id] = max(until, self.template_horizons.get(dentist_id, date.min))
+
     def serve(self, client, userdata, msg) -> None:
         self.router.serve(client=client, userdata=userdata, msg=msg)
 
+    async def serve_async(self, client, userdata, msg, executor=None) -> None:
+        await self.router.serve_async(
+            client=client, userdata=userdata, msg=msg, executor=executor
+        )
+
     def get_appointments(
         self,
         client: Client,
@@ -43,7 +145,7 @@ class AppointmentsMqttRouter:
             print(f"Appointment ID: {appointment_id}")
             print(f"Payload data: {payload.data}")
 
-            with Session(self.database.engine) as session:
+            with self._session() as session:
                 result = Availability.get_appointment(session=session, appointment_id=appointment_id)
 
             if result.is_err():
@@ -82,6 +184,46 @@ class AppointmentsMqttRouter:
                 details=str(e),
             )
 
+    def search_appointments(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[AvailabilitySearch],
+    ) -> None:
+        search = payload.data
+        try:
+            self._materialize_templates(search=search)
+
+            page = None
+            if self.schedule_index is not None:
+                page = self.schedule_index.search(search=search, after=search.after())
+
+            if page is None:
+                with self._session() as session:
+                    page = Availability.search_appointments(
+                        session=session, search=search, after=search.after()
+                    ).unwrap()
+        except Exception as e:
+            MqttDatabaseUnexpectedError(
+                client=client,
+                topic=msg.topic,
+                message_id=payload.msgId,
+                error_msg="Unexpected error occurred",
+                details=str(e),
+            )
+            return
+
+        appointments, next_cursor = page
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=AvailabilityPage(items=appointments, next_cursor=next_cursor),
+        )
+
     def register_appointment(
         self,
         client: Client,
@@ -108,6 +250,10 @@ class AppointmentsMqttRouter:
             if not dentist_id or not isinstance(dentist_id, str):
                 raise ValueError("Invalid or missing 'dentist_id' field")
             
+            # NOTE: stored as minutes since midnight, see 'Availability.start_minute'
+            if to_minutes(payload.data.get("end_time")) <= to_minutes(payload.data.get("start_time")):
+                raise ValueError("'end_time' has to be after 'start_time'")
+
             availability_data = {
                 "id": payload.data.get("id"),
                 "dentist_id": dentist_id,
@@ -126,7 +272,7 @@ class AppointmentsMqttRouter:
             )
             return
 
-        with Session(self.database.engine) as session:
+        with self._session() as session:
 
             result = Availability.add_appointment(session=session, appointment=Availability(**availability_data))
 
@@ -143,6 +289,7 @@ class AppointmentsMqttRouter:
                 return
             #self.clinic_cache[availability_data["id"]] = clinic_data
             appointment = result.unwrap()
+            self._index_slots([(appointment.start_minute, appointment.end_minute, Availability.to_output(appointment))])
 
         MqttClient.send_response(
             client=client,
@@ -152,6 +299,175 @@ class AppointmentsMqttRouter:
             payload=appointment.to_schema(),
         )
 
+    def register_template(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[AvailabilityTemplateInput],
+    ) -> None:
+        with self._session() as session:
+            result = AvailabilityTemplate.add_template(
+                session=session, template=payload.data, until=self._window_end()
+            )
+
+            if result.is_err():
+                MqttDatabaseRecordAlreadyExist(
+                    client=client,
+                    topic=msg.topic,
+                    message_id=payload.msgId,
+                    error_msg="Database record already exists",
+                    details="The template could not be stored",
+                )
+                return
+
+            template, slots = result.unwrap()
+            template_output = template.to_output(slots_created=len(slots))
+
+        self._index_slots(slots)
+        self.template_horizons.pop(template_output.dentist_id, None)
+
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_201_CREATED,
+            payload=template_output,
+        )
+
+    def register_appointments(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[List[AvailabilityInput]],
+    ) -> None:
+        appointments = payload.data
+        with self._session() as session:
+            result = Availability.add_appointments(session=session, appointments=appointments)
+
+        if result.is_err():
+            MqttDatabaseRecordAlreadyExist(
+                client=client,
+                topic=msg.topic,
+                message_id=payload.msgId,
+                error_msg="Database record already exists",
+                details=result.error.details,
+            )
+            return
+
+        added = result.unwrap()
+        self._index_slots([slot for slot in added if slot is not None])
+
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=[
+                (
+                    BulkAvailabilityResult(id=slot[2].id, status=BulkAvailabilityStatus.CREATED, appointment=slot[2])
+                    if slot is not None
+                    else BulkAvailabilityResult(
+                        status=BulkAvailabilityStatus.CONFLICT,
+                        details=f"Overlaps another appointment of dentist {appointment.dentist_id} "
+                                f"on {appointment.day_of_week}",
+                    )
+                )
+                for appointment, slot in zip(appointments, added)
+            ],
+        )
+
+    def delete_appointments(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[AvailabilitySelection],
+    ) -> None:
+        with self._session() as session:
+            deleted = Availability.delete_appointments(session=session, selection=payload.data).unwrap()
+            results = self._bulk_results(
+                session=session, selection=payload.data, written=deleted, status=BulkAvailabilityStatus.DELETED
+            )
+
+        if self.schedule_index is not None:
+            for slot in deleted:
+                self.schedule_index.remove(appointment_id=slot.id)
+
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=results,
+        )
+
+    def change_appointments_status(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[AvailabilityStatusChange],
+    ) -> None:
+        change = payload.data
+        with self._session() as session:
+            updated = Availability.change_appointments_status(
+                session=session, selection=change, new_status=change.new_status
+            ).unwrap()
+            results = self._bulk_results(
+                session=session, selection=change, written=updated, status=BulkAvailabilityStatus.UPDATED
+            )
+
+        if self.schedule_index is not None:
+            for slot in updated:
+                self.schedule_index.set_status(appointment_id=slot.id, status=change.new_status)
+
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=results,
+        )
+
+    def _bulk_results(
+        self,
+        session: Session,
+        selection: AvailabilitySelection,
+        written: List[AvailabilityOutput],
+        status: BulkAvailabilityStatus,
+    ) -> List[BulkAvailabilityResult]:
+        """
+        One result per requested ID (in the request's order) and per other slot matched by the filters.
+        """
+        results = {slot.id: BulkAvailabilityResult(id=slot.id, status=status, appointment=slot) for slot in written}
+        if selection.ids is None:
+            return list(results.values())
+
+        missing = [id for id in dict.fromkeys(selection.ids) if id not in results]
+        # NOTE: only looked up when some were left out, to tell the missing ones from the filtered out ones
+        statuses = Availability.get_statuses(session=session, ids=missing).unwrap() if missing else {}
+        return [
+            results.get(id)
+            or (
+                BulkAvailabilityResult(
+                    id=id,
+                    status=BulkAvailabilityStatus.CONFLICT,
+                    details=f"The appointment does not match the filters, its status is {statuses[id]}",
+                )
+                if id in statuses
+                else BulkAvailabilityResult(
+                    id=id, status=BulkAvailabilityStatus.NOT_FOUND, details=f"No appointment with ID {id}"
+                )
+            )
+            for id in dict.fromkeys(selection.ids)
+        ]
+
     def delete_appointment(
         self,
         client: Client,
@@ -160,19 +476,22 @@ class AppointmentsMqttRouter:
         params: Optional[Params],
         payload: MqttRequest[Any],
     ) -> None:
-        with Session(self.database.engine) as session:
+        with self._session() as session:
             result = Availability.delete_appointment(session=session, appointment_id=params["id"])
 
             if result.is_err():
-                err = result.unwrap_error()
                 MqttDatabaseRecordNotFound(
                     client=client,
-                    origin_topic=msg.topic,
-                    error_msg=result,
-                    details=err,
+                    topic=msg.topic,
+                    message_id=payload.msgId,
+                    error_msg="Appointment not found",
+                    details=result.error.details,
                 )
                 return
 
+            if self.schedule_index is not None:
+                self.schedule_index.remove(appointment_id=int(params["id"]))
+
             MqttClient.send_response(
                 client=client,
                 origin_topic=msg.topic,
@@ -187,26 +506,28 @@ class AppointmentsMqttRouter:
             userdata: Any,
             msg: MQTTMessage,
             params: Optional[Params],
-            payload: MqttRequest[dict],
+            payload: MqttRequest[AvailabilityStatusInput],
     ) -> None:
-        with Session(self.database.engine) as session:
-            result = Availability.change_appointment_status(session=session, appointment_id=params["id"], new_status=payload.data["status"])
+        with self._session() as session:
+            result = Availability.change_appointment_status(session=session, appointment_id=params["id"], new_status=payload.data.status)
 
             if result.is_err():
-                err = result.unwrap_err()
                 MqttDatabaseRecordNotFound(
                     client=client,
-                    origin_topic=msg.topic,
+                    topic=msg.topic,
                     message_id=payload.msgId,
-                    error_msg=result,
-                    details=err,
+                    error_msg="Appointment not found",
+                    details=result.error.details,
                 )
                 return
 
+            if self.schedule_index is not None:
+                self.schedule_index.set_status(appointment_id=int(params["id"]), status=payload.data.status)
+
             MqttClient.send_response(
                 client=client,
                 origin_topic=msg.topic,
                 message_id=payload.msgId,
                 status_code=MqttStatus.STATUS_200_OK,
                 payload={"message": "Appointment status changed successfully"},
-            )
\ No newline at end of file
+            )
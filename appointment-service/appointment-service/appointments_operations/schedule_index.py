@@ -0,0 +1,192 @@
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from appointments_operations.schema import AvailabilityOutput, AvailabilitySearch, SlotKey, encode_cursor
+
+
+class DentistSchedule:
+    """
+    The slots of one dentist, by day, each day sorted by (start_minute, id).
+    """
+
+    def __init__(self) -> None:
+        self.days: List[str] = []
+        # NOTE: parallel lists, 'keys' is bisected and 'slots' holds what is sent back
+        self.keys: Dict[str, List[Tuple[int, int]]] = dict()
+        self.slots: Dict[str, List[Tuple[int, AvailabilityOutput]]] = dict()
+        # set once the slots stored in the database are all in, searches go to the database until then
+        self.ready = False
+
+    def add(self, start_minute: int, end_minute: int, slot: AvailabilityOutput) -> None:
+        day = slot.day_of_week
+        if day not in self.keys:
+            bisect.insort(self.days, day)
+            self.keys[day] = []
+            self.slots[day] = []
+
+        key = (start_minute, slot.id)
+        keys = self.keys[day]
+        idx = bisect.bisect_left(keys, key)
+        if idx < len(keys) and keys[idx] == key:
+            # NOTE: loading the schedule and a concurrent 'add_appointment' may both bring the same slot
+            return
+        keys.insert(idx, key)
+        self.slots[day].insert(idx, (end_minute, slot))
+
+    def find(self, day: str, start_minute: int, id: int) -> int:
+        keys = self.keys.get(day, [])
+        idx = bisect.bisect_left(keys, (start_minute, id))
+        return idx if idx < len(keys) and keys[idx] == (start_minute, id) else -1
+
+    def remove(self, day: str, start_minute: int, id: int) -> None:
+        idx = self.find(day=day, start_minute=start_minute, id=id)
+        if idx < 0:
+            return
+        del self.keys[day][idx]
+        del self.slots[day][idx]
+        if not self.keys[day]:
+            del self.keys[day]
+            del self.slots[day]
+            self.days.remove(day)
+
+    def search(
+        self, search: AvailabilitySearch, after: Optional[SlotKey] = None
+    ) -> Tuple[List[AvailabilityOutput], Optional[str]]:
+        """
+        Same page as 'Availability.search_appointments', bisecting the days and then the start minutes.
+        """
+        window_start, window_end = search.window_start(), search.window_end()
+        days: Iterable[str] = self.days
+        if search.days is not None:
+            days = [day for day in search.days if day in self.keys]
+        if after is not None:
+            days = days[bisect.bisect_left(days, after[0]):]  # type: ignore[index]
+
+        found: List[Tuple[int, AvailabilityOutput]] = []
+        for day in days:
+            keys, slots = self.keys[day], self.slots[day]
+            if after is not None and day == after[0]:
+                idx = bisect.bisect_right(keys, (after[1], after[2]))
+                idx = max(idx, bisect.bisect_left(keys, (window_start, -1)))
+            else:
+                idx = bisect.bisect_left(keys, (window_start, -1))
+
+            # NOTE: slots are sorted by start, none after the first starting at the window's end fits in it
+            while idx < len(keys) and keys[idx][0] < window_end:
+                end_minute, slot = slots[idx]
+                idx += 1
+                if end_minute > window_end:
+                    continue
+                if search.clinic_id is not None and slot.clinic_id != search.clinic_id.strip():
+                    continue
+                if search.status is not None and slot.status != search.status:
+                    continue
+                found.append((keys[idx - 1][0], slot))
+                if len(found) > search.limit:
+                    break
+            if len(found) > search.limit:
+                break
+
+        outputs = [slot for _, slot in found[: search.limit]]
+        if len(found) <= search.limit:
+            return outputs, None
+
+        start_minute, last = found[search.limit - 1]
+        return outputs, encode_cursor((last.day_of_week, start_minute, last.id))
+
+
+# loads every slot of a dentist as (start_minute, end_minute, slot)
+ScheduleLoader = Callable[[str], List[Tuple[int, int, AvailabilityOutput]]]
+
+
+class ScheduleIndex:
+    """
+    In-memory schedules of the most recently searched dentists, to answer their searches without SQLite.
+
+    A dentist is loaded (with one query) on its first search and the least recently searched dentist is
+    dropped past 'max_dentists'. Only the writes made through 'add', 'remove' and 'set_status' reach it,
+    so it is only accurate when this process is the only one writing the availability table.
+    """
+
+    def __init__(self, max_dentists: int, loader: ScheduleLoader) -> None:
+        self.max_dentists = max_dentists
+        self.loader = loader
+        self.schedules: "OrderedDict[str, DentistSchedule]" = OrderedDict()
+        # appointment ID -> (dentist_id, day_of_week, start_minute), to find the slots to update
+        self.locations: Dict[int, Tuple[str, str, int]] = dict()
+        self.lock = threading.Lock()
+
+    def search(
+        self, search: AvailabilitySearch, after: Optional[SlotKey] = None
+    ) -> Optional[Tuple[List[AvailabilityOutput], Optional[str]]]:
+        """
+        The page of a dentist search, None when the search has to go to the database instead.
+        """
+        if search.dentist_id is None:
+            return None
+        dentist_id = search.dentist_id.strip()
+
+        with self.lock:
+            schedule = self.schedules.get(dentist_id, None)
+            if schedule is not None:
+                self.schedules.move_to_end(dentist_id)
+                return schedule.search(search=search, after=after) if schedule.ready else None
+
+            # NOTE: registered before it is loaded so that the slots added meanwhile are not missed
+            schedule = DentistSchedule()
+            self.schedules[dentist_id] = schedule
+            while len(self.schedules) > self.max_dentists:
+                self._drop(*self.schedules.popitem(last=False))
+
+        slots = self.loader(dentist_id)
+        with self.lock:
+            if self.schedules.get(dentist_id, None) is not schedule:
+                return None
+            for start_minute, end_minute, slot in slots:
+                self._add(schedule, start_minute, end_minute, slot)
+            schedule.ready = True
+            return schedule.search(search=search, after=after)
+
+    def add(self, start_minute: int, end_minute: int, slot: AvailabilityOutput) -> None:
+        with self.lock:
+            schedule = self.schedules.get(slot.dentist_id, None)
+            if schedule is not None:
+                self._add(schedule, start_minute, end_minute, slot)
+
+    def remove(self, appointment_id: int) -> None:
+        with self.lock:
+            location = self.locations.pop(appointment_id, None)
+            if location is None:
+                self._drop_loading()
+                return
+            dentist_id, day, start_minute = location
+            self.schedules[dentist_id].remove(day=day, start_minute=start_minute, id=appointment_id)
+
+    def set_status(self, appointment_id: int, status: str) -> None:
+        with self.lock:
+            location = self.locations.get(appointment_id, None)
+            if location is None:
+                self._drop_loading()
+                return
+            dentist_id, day, start_minute = location
+            schedule = self.schedules[dentist_id]
+            idx = schedule.find(day=day, start_minute=start_minute, id=appointment_id)
+            end_minute, slot = schedule.slots[day][idx]
+            schedule.slots[day][idx] = (end_minute, slot.model_copy(update={"status": status}))
+
+    def _add(self, schedule: DentistSchedule, start_minute: int, end_minute: int, slot: AvailabilityOutput) -> None:
+        schedule.add(start_minute=start_minute, end_minute=end_minute, slot=slot)
+        self.locations[slot.id] = (slot.dentist_id, slot.day_of_week, start_minute)
+
+    def _drop(self, dentist_id: str, schedule: DentistSchedule) -> None:
+        for day in schedule.days:
+            for _, id in schedule.keys[day]:
+                self.locations.pop(id, None)
+
+    def _drop_loading(self) -> None:
+        # NOTE: the slot may be in a schedule being loaded, whose slots are not located yet,
+        # those are loaded again on their next search
+        for dentist_id in [dentist_id for dentist_id, schedule in self.schedules.items() if not schedule.ready]:
+            self._drop(dentist_id, self.schedules.pop(dentist_id))
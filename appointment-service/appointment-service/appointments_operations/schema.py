@@ -1,6 +1,54 @@
-from pydantic import BaseModel
+import base64
+import binascii
+from datetime import date
+from enum import StrEnum
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field, field_validator, model_validator
 from sqlalchemy.orm import DeclarativeBase
 #from db.model import BaseModel
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# NOTE: bounds how many slots a single template expands to
+MAX_TEMPLATE_DAYS = 366
+# slots written by one statement of the bulk routes, all of a request's statements share one transaction
+BULK_CHUNK_SIZE = 500
+
+# (day_of_week, start_minute, id), the order of the search results
+SlotKey = Tuple[str, int, int]
+
+
+def to_minutes(time: str) -> int:
+    """
+    Minutes since midnight of a 'HH:MM' time, raises 'ValueError' for anything else.
+    """
+    hours, minutes = (int(part) for part in time.strip().split(":"))
+    if not (0 <= minutes < 60 and 0 <= hours * 60 + minutes <= 24 * 60):
+        raise ValueError(f"Invalid time '{time}', expected 'HH:MM'")
+    return hours * 60 + minutes
+
+
+def to_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def encode_cursor(key: SlotKey) -> str:
+    # NOTE: opaque to the clients, so that the key the results are sorted by can change without breaking them
+    day_of_week, start_minute, id = key
+    return base64.urlsafe_b64encode(f"{day_of_week}|{start_minute}|{id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SlotKey:
+    try:
+        day_of_week, start_minute, id = (
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().rsplit("|", 2)
+        )
+        return day_of_week, int(start_minute), int(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
 class AppointmentModel(BaseModel):
     id: str
     dentist_id: str
@@ -8,4 +56,202 @@ class AppointmentModel(BaseModel):
     day_of_week: str
     start_time: str
     end_time: str
-    status: str
\ No newline at end of file
+    status: str
+
+
+class AvailabilityInput(BaseModel):
+    dentist_id: str
+    clinic_id: str
+    day_of_week: str
+    start_time: str
+    end_time: str
+    status: str = "FREE"
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def validate_time(cls, time: str) -> str:
+        to_minutes(time)
+        return time
+
+    @model_validator(mode="after")
+    def validate_slot(self) -> "AvailabilityInput":
+        if to_minutes(self.end_time) <= to_minutes(self.start_time):
+            raise ValueError("'end_time' has to be after 'start_time'")
+        return self
+
+
+class AvailabilityOutput(BaseModel):
+    id: int
+    dentist_id: str
+    clinic_id: str
+    day_of_week: str
+    start_time: str
+    end_time: str
+    status: str
+
+
+class AvailabilitySearch(BaseModel):
+    """
+    Filters of 'GET /appointments/search', the slots of 'dentist_id' and/or 'clinic_id' on any of 'days'
+    that fit in the 'start_time' - 'end_time' window, sorted by day and start time.
+    """
+
+    dentist_id: Optional[str] = None
+    clinic_id: Optional[str] = None
+    days: Optional[List[str]] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    status: Optional[str] = None
+    limit: int = Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+    @field_validator("days")
+    @classmethod
+    def validate_days(cls, days: Optional[List[str]]) -> Optional[List[str]]:
+        if days is None:
+            return None
+        return sorted({day.strip() for day in days})
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def validate_time(cls, time: Optional[str]) -> Optional[str]:
+        if time is not None:
+            to_minutes(time)
+        return time
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, cursor: Optional[str]) -> Optional[str]:
+        if cursor is not None:
+            decode_cursor(cursor)
+        return cursor
+
+    @model_validator(mode="after")
+    def validate_search(self) -> "AvailabilitySearch":
+        # NOTE: every search seeks one of the (dentist_id, ...) or (clinic_id, ...) indexes
+        if self.dentist_id is None and self.clinic_id is None:
+            raise ValueError("Either 'dentist_id' or 'clinic_id' is required")
+        if self.window_end() <= self.window_start():
+            raise ValueError("'end_time' has to be after 'start_time'")
+        return self
+
+    def window_start(self) -> int:
+        return to_minutes(self.start_time) if self.start_time is not None else 0
+
+    def window_end(self) -> int:
+        return to_minutes(self.end_time) if self.end_time is not None else 24 * 60
+
+    def after(self) -> Optional[SlotKey]:
+        return decode_cursor(self.cursor) if self.cursor is not None else None
+
+
+class AvailabilitySelection(BaseModel):
+    """
+    Slots of the bulk delete and status routes, the ones of 'ids' and/or of 'dentist_id' and/or 'clinic_id',
+    narrowed down by 'days' and their current 'status'.
+    """
+
+    ids: Optional[List[int]] = Field(default=None, min_length=1)
+    dentist_id: Optional[str] = None
+    clinic_id: Optional[str] = None
+    days: Optional[List[str]] = None
+    status: Optional[str] = None
+
+    @model_validator(mode="after")
+    def validate_selection(self) -> "AvailabilitySelection":
+        # NOTE: never a whole table statement, every selection seeks the primary key or an index
+        if self.ids is None and self.dentist_id is None and self.clinic_id is None:
+            raise ValueError("One of 'ids', 'dentist_id' or 'clinic_id' is required")
+        return self
+
+
+class AvailabilityStatusInput(BaseModel):
+    status: str
+
+
+class AvailabilityStatusChange(AvailabilitySelection):
+    new_status: str
+
+
+class BulkAvailabilityStatus(StrEnum):
+    CREATED = "created"
+    CONFLICT = "conflict"
+    DELETED = "deleted"
+    UPDATED = "updated"
+    NOT_FOUND = "not_found"
+
+
+class BulkAvailabilityResult(BaseModel):
+    # NOTE: one per slot, in the order of the request's slots (or 'ids'), or per slot matched by the filters without 'ids'
+    id: Optional[int] = None
+    status: BulkAvailabilityStatus
+    appointment: Optional[AvailabilityOutput] = None
+    details: Optional[str] = None
+
+
+class AvailabilityPage(BaseModel):
+    items: List[AvailabilityOutput]
+    next_cursor: Optional[str]
+
+
+class Weekday(StrEnum):
+    MONDAY = "MONDAY"
+    TUESDAY = "TUESDAY"
+    WEDNESDAY = "WEDNESDAY"
+    THURSDAY = "THURSDAY"
+    FRIDAY = "FRIDAY"
+    SATURDAY = "SATURDAY"
+    SUNDAY = "SUNDAY"
+
+
+# NOTE: in the order of 'date.weekday()', Monday is 0
+WEEKDAYS: List[Weekday] = list(Weekday)
+
+
+class AvailabilityTemplateInput(BaseModel):
+    """
+    Body of 'POST /appointments/templates', slots of 'slot_minutes' from 'start_time' to 'end_time'
+    on every 'weekdays' from 'start_date' to 'end_date' (both included).
+    """
+
+    dentist_id: str
+    clinic_id: str
+    weekdays: List[Weekday] = Field(min_length=1)
+    start_time: str
+    end_time: str
+    slot_minutes: int = Field(ge=5, le=24 * 60)
+    start_date: date
+    end_date: date
+    status: str = "FREE"
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def validate_time(cls, time: str) -> str:
+        to_minutes(time)
+        return time
+
+    @model_validator(mode="after")
+    def validate_template(self) -> "AvailabilityTemplateInput":
+        if to_minutes(self.end_time) - to_minutes(self.start_time) < self.slot_minutes:
+            raise ValueError("Not even one slot fits between 'start_time' and 'end_time'")
+        if self.end_date < self.start_date:
+            raise ValueError("'end_date' has to be after 'start_date'")
+        if (self.end_date - self.start_date).days >= MAX_TEMPLATE_DAYS:
+            raise ValueError(f"A template spans at most {MAX_TEMPLATE_DAYS} days")
+        return self
+
+
+class AvailabilityTemplateOutput(BaseModel):
+    id: int
+    dentist_id: str
+    clinic_id: str
+    weekdays: List[Weekday]
+    start_time: str
+    end_time: str
+    slot_minutes: int
+    start_date: date
+    end_date: date
+    status: str
+    # the slots up to this day are in the availability table, the later ones are added once searched
+    materialized_until: date
+    slots_created: int
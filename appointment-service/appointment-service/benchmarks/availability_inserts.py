@@ -0,0 +1,79 @@
+"""
+Per-insert latency of 'Availability.add_appointment' (overlap check and commit) while the availability
+table grows, which should stay flat since the check is one indexed range query.
+
+Run from the 'appointment-service' source directory:
+    python -m benchmarks.availability_inserts --slots 100000
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+from db.db import Database
+from appointments_operations.model import Availability, to_time
+from appointments_operations.schema import AppointmentModel
+
+DENTISTS = 100
+# 30 minutes slots from 8:00 to 18:00
+SLOTS_PER_DAY = 20
+
+
+def slot(idx: int) -> AppointmentModel:
+    # NOTE: spread over the dentists first, so every dentist's days fill up as the table grows
+    dentist, rest = idx % DENTISTS, idx // DENTISTS
+    day, slot_of_day = rest // SLOTS_PER_DAY, rest % SLOTS_PER_DAY
+    start_minute = 8 * 60 + slot_of_day * 30
+    return AppointmentModel(
+        id=str(idx),
+        dentist_id=f"dentist-{dentist}",
+        clinic_id="clinic-1",
+        day_of_week=(date(2025, 1, 1) + timedelta(days=day)).isoformat(),
+        start_time=to_time(start_minute),
+        end_time=to_time(start_minute + 30),
+        status="FREE",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=100_000)
+    parser.add_argument("--buckets", type=int, default=10)
+    parser.add_argument("--directory", default=None)
+    args = parser.parse_args()
+
+    bucket_size = args.slots // args.buckets
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        db = Database(db_path=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+
+        with Session(db.engine) as session:
+            for bucket in range(args.buckets):
+                started_at = time.perf_counter()
+                for idx in range(bucket * bucket_size, (bucket + 1) * bucket_size):
+                    Availability.add_appointment(session=session, appointment=slot(idx)).unwrap()
+                    # NOTE: the session would otherwise hold on to every slot added so far
+                    session.expunge_all()
+                elapsed = time.perf_counter() - started_at
+
+                print(
+                    f"slots {bucket * bucket_size:7d}-{(bucket + 1) * bucket_size:7d} "
+                    f"{elapsed / bucket_size * 1_000_000:8.1f} us/insert"
+                )
+
+            # every slot overlaps with the one already there
+            started_at = time.perf_counter()
+            for idx in range(bucket_size):
+                assert Availability.add_appointment(session=session, appointment=slot(idx)).is_err()
+            elapsed = time.perf_counter() - started_at
+            print(f"rejected overlaps     {elapsed / bucket_size * 1_000_000:8.1f} us/insert")
+
+        db.engine.dispose()
+        db.read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Latency of a free-slot search of one dentist ('GET /appointments/search'), answered by the indexed
+query against SQLite and by the in-memory 'ScheduleIndex'.
+
+Run from the 'appointment-service' source directory:
+    python -m benchmarks.availability_search --slots 100000
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from datetime import date, timedelta
+from typing import Callable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from db.db import Database
+from appointments_operations.model import Availability
+from appointments_operations.schedule_index import ScheduleIndex
+from appointments_operations.schema import AvailabilitySearch
+
+DENTISTS = 100
+# 30 minutes slots from 8:00 to 18:00
+SLOTS_PER_DAY = 20
+
+
+def seed(db: Database, slots: int) -> None:
+    rows = []
+    for idx in range(slots):
+        dentist, rest = idx % DENTISTS, idx // DENTISTS
+        day, slot_of_day = rest // SLOTS_PER_DAY, rest % SLOTS_PER_DAY
+        start_minute = 8 * 60 + slot_of_day * 30
+        rows.append(
+            {
+                "dentist_id": f"dentist-{dentist}",
+                "clinic_id": f"clinic-{dentist % 10}",
+                "day_of_week": (date(2025, 1, 1) + timedelta(days=day)).isoformat(),
+                "start_minute": start_minute,
+                "end_minute": start_minute + 30,
+                "status": "BOOKED" if idx % 3 else "FREE",
+            }
+        )
+    with Session(db.engine) as session:
+        session.execute(insert(Availability), rows)
+        session.commit()
+
+
+def measure(search: Callable[[AvailabilitySearch], object], searches: int) -> float:
+    started_at = time.perf_counter()
+    for idx in range(searches):
+        day = (date(2025, 1, 1) + timedelta(days=idx % 30)).isoformat()
+        search(
+            AvailabilitySearch(
+                dentist_id="dentist-7",
+                days=[day],
+                start_time="09:00",
+                end_time="15:00",
+                status="FREE",
+            )
+        )
+    return (time.perf_counter() - started_at) / searches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=100_000)
+    parser.add_argument("--searches", type=int, default=5_000)
+    parser.add_argument("--directory", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        db = Database(db_path=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        seed(db=db, slots=args.slots)
+
+        with Session(db.read_engine) as session:
+
+            def query(search: AvailabilitySearch) -> object:
+                return Availability.search_appointments(session=session, search=search).unwrap()
+
+            def load(dentist_id: str):
+                return Availability.get_dentist_schedule(session=session, dentist_id=dentist_id).unwrap()
+
+            index = ScheduleIndex(max_dentists=10, loader=load)
+
+            def in_memory(search: AvailabilitySearch) -> object:
+                return index.search(search=search)
+
+            query_elapsed = measure(query, args.searches)
+            print(f"indexed query  {query_elapsed * 1_000_000:8.1f} us/search")
+            index_elapsed = measure(in_memory, args.searches)
+            print(
+                f"schedule index {index_elapsed * 1_000_000:8.1f} us/search "
+                f"({query_elapsed / index_elapsed:.1f}x faster)"
+            )
+
+        db.engine.dispose()
+        db.read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Time to publish the weekly schedules of a few dentists over a rolling window, one 'add_appointment'
+per slot against one 'AvailabilityTemplate.add_template' per dentist.
+
+Run from the 'appointment-service' source directory:
+    python -m benchmarks.availability_templates --dentists 20 --days 28
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+from db.db import Database
+from appointments_operations.model import Availability, AvailabilityTemplate
+from appointments_operations.schema import AppointmentModel, AvailabilityTemplateInput, Weekday, to_time
+
+START_DATE = date(2025, 1, 6)
+WORKDAYS = [Weekday.MONDAY, Weekday.TUESDAY, Weekday.WEDNESDAY, Weekday.THURSDAY, Weekday.FRIDAY]
+
+
+def schedule(dentist: int, days: int) -> AvailabilityTemplateInput:
+    # 30 minutes slots from 8:00 to 18:00 on workdays
+    return AvailabilityTemplateInput(
+        dentist_id=f"dentist-{dentist}",
+        clinic_id="clinic-1",
+        weekdays=WORKDAYS,
+        start_time="08:00",
+        end_time="18:00",
+        slot_minutes=30,
+        start_date=START_DATE,
+        end_date=START_DATE + timedelta(days=days - 1),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dentists", type=int, default=20)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--directory", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        single = Database(db_path=f"sqlite:///{os.path.join(directory, 'single.db')}")
+        templates = Database(db_path=f"sqlite:///{os.path.join(directory, 'templates.db')}")
+
+        slots = 0
+        with Session(single.engine) as session:
+            started_at = time.perf_counter()
+            for dentist in range(args.dentists):
+                template = AvailabilityTemplate(
+                    weekday_mask=0b11111, start_minute=8 * 60, end_minute=18 * 60, slot_minutes=30
+                )
+                for day, start_minute, end_minute in template.expand(
+                    first=START_DATE, last=START_DATE + timedelta(days=args.days - 1)
+                ):
+                    Availability.add_appointment(
+                        session=session,
+                        appointment=AppointmentModel(
+                            id="0",
+                            dentist_id=f"dentist-{dentist}",
+                            clinic_id="clinic-1",
+                            day_of_week=day,
+                            start_time=to_time(start_minute),
+                            end_time=to_time(end_minute),
+                            status="FREE",
+                        ),
+                    ).unwrap()
+                    session.expunge_all()
+                    slots += 1
+            single_elapsed = time.perf_counter() - started_at
+        print(f"add_appointment per slot {single_elapsed * 1000:9.1f} ms ({slots} writes)")
+
+        with Session(templates.engine) as session:
+            started_at = time.perf_counter()
+            for dentist in range(args.dentists):
+                AvailabilityTemplate.add_template(
+                    session=session,
+                    template=schedule(dentist=dentist, days=args.days),
+                    until=START_DATE + timedelta(days=args.days),
+                ).unwrap()
+            elapsed = time.perf_counter() - started_at
+        print(
+            f"add_template per dentist {elapsed * 1000:9.1f} ms ({args.dentists} writes, "
+            f"{single_elapsed / elapsed:.1f}x faster)"
+        )
+
+        for db in (single, templates):
+            db.engine.dispose()
+            db.read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
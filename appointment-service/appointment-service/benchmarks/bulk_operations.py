@@ -0,0 +1,107 @@
+"""
+Creating, booking and deleting a clinic's slots one request per slot against one bulk request each
+('POST /appointments/bulk', 'PUT /appointments/bulk/status', 'DELETE /appointments/bulk').
+
+Run from the 'appointment-service' source directory:
+    python -m benchmarks.bulk_operations --dentists 50 --days 5
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from db.db import Database
+from appointments_operations.model import Availability
+from appointments_operations.schema import (
+    AppointmentModel,
+    AvailabilityInput,
+    AvailabilitySelection,
+    to_time,
+)
+
+# 30 minutes slots from 8:00 to 18:00
+SLOTS_PER_DAY = 20
+
+
+def slots(dentists: int, days: int) -> List[AvailabilityInput]:
+    return [
+        AvailabilityInput(
+            dentist_id=f"dentist-{dentist}",
+            clinic_id="clinic-1",
+            day_of_week=(date(2025, 1, 6) + timedelta(days=day)).isoformat(),
+            start_time=to_time(8 * 60 + slot * 30),
+            end_time=to_time(8 * 60 + slot * 30 + 30),
+        )
+        for dentist in range(dentists)
+        for day in range(days)
+        for slot in range(SLOTS_PER_DAY)
+    ]
+
+
+def timed(fn: Callable[[], None]) -> float:
+    # NOTE: 'add_appointment' prints every slot it commits
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        started_at = time.perf_counter()
+        fn()
+        return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dentists", type=int, default=50)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--directory", default=None)
+    args = parser.parse_args()
+
+    appointments = slots(dentists=args.dentists, days=args.days)
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        db = Database(db_path=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        with Session(db.engine) as session:
+            ids: List[str] = []
+
+            def add_each() -> None:
+                for appointment in appointments:
+                    added = Availability.add_appointment(
+                        session=session, appointment=AppointmentModel(id="0", **appointment.model_dump())
+                    ).unwrap()
+                    ids.append(str(added.id))
+
+            def book_each() -> None:
+                for id in ids:
+                    Availability.change_appointment_status(session=session, appointment_id=id, new_status="BOOKED").unwrap()
+
+            def delete_each() -> None:
+                for id in ids:
+                    Availability.delete_appointment(session=session, appointment_id=id).unwrap()
+
+            clinic = AvailabilitySelection(clinic_id="clinic-1")
+
+            def add_bulk() -> None:
+                Availability.add_appointments(session=session, appointments=appointments).unwrap()
+
+            def book_bulk() -> None:
+                Availability.change_appointments_status(session=session, selection=clinic, new_status="BOOKED").unwrap()
+
+            def delete_bulk() -> None:
+                Availability.delete_appointments(session=session, selection=clinic).unwrap()
+
+            # NOTE: each pass leaves the table empty, the bulk one starts where the per-slot one started
+            each_elapsed = [timed(add_each), timed(book_each), timed(delete_each)]
+            bulk_elapsed = [timed(add_bulk), timed(book_bulk), timed(delete_bulk)]
+
+            print(f"{len(appointments)} slots of one clinic")
+            for name, each, bulk in zip(("create", "book", "delete"), each_elapsed, bulk_elapsed):
+                print(f"{name:6s} one per slot {each * 1000:9.1f} ms, bulk {bulk * 1000:7.1f} ms ({each / bulk:.0f}x faster)")
+
+        db.engine.dispose()
+        db.read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,52 @@
 import os
+import uuid
+import socket
 from dataclasses import dataclass
 
 
 @dataclass(frozen=True)
 class AppConfig:
     DB_PATH: str
+    DB_PROFILE: str
     MQTT_BROKER: str
     MQTT_PORT: str
+    MQTT_RUNTIME: str
+    MQTT_SHARED_GROUP: str
+    INSTANCE_ID: str
+    WORKER_POOL_SIZE: int
+    RESPONSE_COMPRESSION: str
+    RESPONSE_COMPRESSION_THRESHOLD: int
+    SCHEDULE_INDEX_DENTISTS: int
+    TEMPLATE_WINDOW_DAYS: int
 
     @classmethod
     def from_env(cls) -> "AppConfig":
             return cls(
                 DB_PATH=os.getenv("DB_PATH", "sqlite:///main.db"),
+                DB_PROFILE=os.getenv("DB_PROFILE", "performance"),  # or 'default'
                 MQTT_BROKER=os.getenv("MQTT_BROKER", "localhost"),
                 MQTT_PORT=os.getenv("MQTT_BROKER_PORT", "1885"),
+                MQTT_RUNTIME=os.getenv("MQTT_RUNTIME", "threaded"),  # or 'asyncio'
+                MQTT_SHARED_GROUP=os.getenv(
+                    "MQTT_SHARED_GROUP", ""
+                ),  # non-empty runs the service as one of many replicas
+                INSTANCE_ID=os.getenv(
+                    "INSTANCE_ID",
+                    f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}",
+                ),
+                WORKER_POOL_SIZE=int(
+                    os.getenv("WORKER_POOL_SIZE", 8)
+                ),  # 0 serves requests on the MQTT network thread
+                RESPONSE_COMPRESSION=os.getenv(
+                    "RESPONSE_COMPRESSION", "zstd"
+                ),  # or 'gzip'
+                RESPONSE_COMPRESSION_THRESHOLD=int(
+                    os.getenv("RESPONSE_COMPRESSION_THRESHOLD", 0)
+                ),  # in bytes, 0 never compresses responses
+                SCHEDULE_INDEX_DENTISTS=int(
+                    os.getenv("SCHEDULE_INDEX_DENTISTS", 0)
+                ),  # dentists whose schedule is kept in memory for searches, 0 disables it
+                TEMPLATE_WINDOW_DAYS=int(
+                    os.getenv("TEMPLATE_WINDOW_DAYS", 28)
+                ),  # days ahead whose slots are added with a template, later ones once searched
             )
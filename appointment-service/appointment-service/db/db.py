@@ -1,11 +1,56 @@
+import os
+
+from alembic import command
+from alembic.config import Config
 from db.model import BaseModel
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+
+from db.engine import create_sqlite_engine, is_in_memory
+
+# NOTE: imported for their side effect, the models register their tables on 'BaseModel.metadata'
+import appointments_operations.model  # noqa: F401
+
+MIGRATIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+# NOTE: the revision matching the schema 'create_all' used to generate, before the migrations were applied
+INITIAL_REVISION = "62e1ea4cf749"
 
 class Database:
 
-    def __init__(self, db_path = "sqlite:///appointments.db", echo=False) -> None:
-        self.engine = create_engine(url=db_path, echo=echo)
-        self._generate_schema()
-        
-    def _generate_schema(self) -> None:
-            BaseModel.metadata.create_all(self.engine)
\ No newline at end of file
+    def __init__(self, db_path = "sqlite:///appointments.db", echo=False, profile="performance") -> None:
+        # NOTE: see 'db.engine.SQLITE_PROFILES' for what each profile sets up
+        if make_url(db_path).get_backend_name() == "sqlite":
+            self.engine = create_sqlite_engine(db_path=db_path, profile=profile, echo=echo)
+        else:
+            self.engine = create_engine(url=db_path, echo=echo)
+        self.migrate()
+        # NOTE: read-only routes get connections from a pool of their own, so they never wait behind
+        # the writers for a connection (and with WAL, never for the database either)
+        self.read_engine = self.engine
+        if make_url(db_path).get_backend_name() == "sqlite" and not is_in_memory(db_path):
+            self.read_engine = create_sqlite_engine(
+                db_path=db_path, profile=profile, echo=echo, read_only=True
+            )
+
+    def migrate(self, revision: str = "head") -> None:
+        config = Config()
+        config.set_main_option("script_location", MIGRATIONS_PATH)
+
+        with self.engine.begin() as connection:
+            config.attributes["connection"] = connection
+
+            tables = inspect(connection).get_table_names()
+            if not tables:
+                # the first revisions only drop tables, so a new database cannot be built by
+                # replaying them, it gets the current schema and is recorded as up to date
+                BaseModel.metadata.create_all(connection)
+                command.stamp(config, "head")
+                return
+
+            # databases created before the migrations were applied have the initial schema,
+            # but no record of it
+            if "alembic_version" not in tables:
+                command.stamp(config, INITIAL_REVISION)
+
+            command.upgrade(config, revision)
+
@@ -1,15 +1,22 @@
+import signal
+import argparse
+import dataclasses
 from logger.loguru import Loguru
 from config.app import AppConfig
 from appointments_operations.router import AppointmentsMqttRouter
 from appointments_operations.service import AppointmentService
 from dotenv import load_dotenv
 from db.db import Database
+from process.supervisor import WorkerSupervisor
 
 
-def main():
-    load_dotenv()
-    app_config = AppConfig.from_env()
-    db = Database(db_path=app_config.DB_PATH)
+def serve(worker_idx: int, app_config: AppConfig) -> None:
+    # NOTE: the supervisor stops workers with SIGTERM, let it unwind the same way as Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    app_config = dataclasses.replace(
+        app_config, INSTANCE_ID=f"{app_config.INSTANCE_ID}-{worker_idx}"
+    )
+    db = Database(db_path=app_config.DB_PATH, profile=app_config.DB_PROFILE)
 
     appointments_service = AppointmentService(logger=Loguru(), app_config=app_config)
     appointments_service.mount_router(
@@ -22,5 +29,34 @@ def main():
     appointments_service.listen_and_serve()
 
 
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Appointment Service")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes, each serving requests with its own MQTT client and database engine",
+    )
+    args = parser.parse_args()
+
+    app_config = AppConfig.from_env()
+    if args.workers <= 1:
+        serve(worker_idx=0, app_config=app_config)
+        return
+
+    # NOTE: create the schema once, before the workers race each other doing it
+    Database(db_path=app_config.DB_PATH, profile=app_config.DB_PROFILE).engine.dispose()
+
+    # NOTE: the workers split the requests between them through a shared subscription
+    app_config = dataclasses.replace(
+        app_config,
+        MQTT_SHARED_GROUP=app_config.MQTT_SHARED_GROUP or "appointment-service",
+    )
+    WorkerSupervisor(
+        target=serve, workers=args.workers, logger=Loguru(), args=(app_config,)
+    ).run()
+
+
 if __name__ == "__main__":
     main()
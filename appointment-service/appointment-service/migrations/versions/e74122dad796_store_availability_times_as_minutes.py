@@ -0,0 +1,65 @@
+"""Store availability times as minutes and index them
+
+Revision ID: e74122dad796
+Revises: 62e1ea4cf749
+Create Date: 2026-10-18 15:52:10.418223
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e74122dad796'
+down_revision: Union[str, None] = '62e1ea4cf749'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _to_minutes(column: str) -> str:
+    # NOTE: 'HH:MM', split on the colon rather than at fixed offsets, older rows may not be zero-padded
+    return (
+        f"CAST(substr({column}, 1, instr({column}, ':') - 1) AS INTEGER) * 60"
+        f" + CAST(substr({column}, instr({column}, ':') + 1) AS INTEGER)"
+    )
+
+
+def _to_time(column: str) -> str:
+    return f"printf('%02d:%02d', {column} / 60, {column} % 60)"
+
+
+def upgrade() -> None:
+    # the columns are added nullable first, the existing rows only get their minutes from the backfill
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('start_minute', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('end_minute', sa.Integer(), nullable=True))
+
+    op.execute(
+        f"UPDATE availability SET start_minute = {_to_minutes('start_time')}, end_minute = {_to_minutes('end_time')}"
+    )
+
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.alter_column('start_minute', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('end_minute', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('start_time')
+        batch_op.drop_column('end_time')
+        batch_op.create_index('ix_availability_dentist_day_start', ['dentist_id', 'day_of_week', 'start_minute'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.drop_index('ix_availability_dentist_day_start')
+        batch_op.add_column(sa.Column('start_time', sa.VARCHAR(), nullable=True))
+        batch_op.add_column(sa.Column('end_time', sa.VARCHAR(), nullable=True))
+
+    op.execute(
+        f"UPDATE availability SET start_time = {_to_time('start_minute')}, end_time = {_to_time('end_minute')}"
+    )
+
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.VARCHAR(), nullable=False)
+        batch_op.alter_column('end_time', existing_type=sa.VARCHAR(), nullable=False)
+        batch_op.drop_column('start_minute')
+        batch_op.drop_column('end_minute')
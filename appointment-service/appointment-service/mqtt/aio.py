@@ -0,0 +1,276 @@
+import asyncio
+import random
+import threading
+from typing import Any, Awaitable, Callable, Optional, Set
+
+import paho.mqtt.client as paho_mqtt
+from paho.mqtt.enums import MQTTErrorCode
+
+from mqtt.client import MqttClient
+from logger.protocol import LoggerProto
+
+AsyncMessageCallback = Callable[
+    [paho_mqtt.Client, Any, paho_mqtt.MQTTMessage], Awaitable[None]
+]
+
+
+class AsyncMqttClient(MqttClient):
+    """
+    MqttClient driven by an asyncio event loop instead of paho's blocking 'loop_forever'.
+
+    The paho socket is registered with the event loop (the same way as paho's 'loop_asyncio' example),
+    every message is served as its own task and reconnects back off with 'asyncio.sleep'.
+    """
+
+    def __init__(
+        self,
+        broker_uri: str,
+        client_id: str,
+        logger: LoggerProto,
+        broker_port: int = 1883,
+        protocol: paho_mqtt.MQTTProtocolVersion = paho_mqtt.MQTTv311,
+        max_in_flight: int = 1000,
+    ) -> None:
+        super().__init__(
+            broker_uri=broker_uri,
+            client_id=client_id,
+            logger=logger,
+            broker_port=broker_port,
+            protocol=protocol,
+        )
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_message = self._on_message
+        # NOTE: paho calls those from whichever thread publishes, while the event loop
+        # is not thread-safe, hence the hop onto the loop thread
+        self.client.on_socket_open = self._threadsafe(self._on_socket_open)
+        self.client.on_socket_close = self._threadsafe(self._on_socket_close)
+        self.client.on_socket_register_write = self._threadsafe(
+            self._on_socket_register_write
+        )
+        self.client.on_socket_unregister_write = self._threadsafe(
+            self._on_socket_unregister_write
+        )
+
+        self.topics: Set[str] = set()
+        self.disconnected = False
+        self.is_user_interrupt = False
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.sock_fd: Optional[int] = None
+        self.stopped: Optional[asyncio.Event] = None
+        self.misc_task: Optional[asyncio.Task] = None
+        self.reconnect_task: Optional[asyncio.Task] = None
+        self.in_flight: Set[asyncio.Task] = set()
+        self.in_flight_limit = asyncio.Semaphore(max_in_flight)
+        self.on_message_async: Optional[AsyncMessageCallback] = None
+
+    async def connect_async(
+        self, retries=5, min_delay_seconds=1.0, max_delay_seconds=30.0
+    ) -> bool:
+        self._attach_to_running_loop()
+        connected = await self._connect_with_backoff(
+            connect=lambda: self.client.connect(self.broker_uri, self.broker_port),
+            retries=retries,
+            min_delay_seconds=min_delay_seconds,
+            max_delay_seconds=max_delay_seconds,
+        )
+        if not connected:
+            self.logger.error(
+                message="Could not connect to the broker after multiple attempts"
+            )
+        return connected
+
+    async def run(self) -> None:
+        self._attach_to_running_loop()
+        self.stopped = asyncio.Event()
+        try:
+            await self.stopped.wait()
+        except asyncio.CancelledError:
+            self.logger.info(message="Client loop stopped by user")
+        finally:
+            self.logger.info(message="MQTT connection clean-up")
+            self.is_user_interrupt = True
+            if self.reconnect_task is not None:
+                self.reconnect_task.cancel()
+            if self.in_flight:
+                await asyncio.gather(*self.in_flight, return_exceptions=True)
+            self.client.disconnect()
+            # NOTE: nothing drives the socket anymore, so flush the disconnect packet by hand
+            self.client.loop_write()
+
+    def stop(self) -> None:
+        if self.stopped is not None:
+            self.stopped.set()
+
+    def subscribe(self, topic: str) -> None:
+        self.topics.add(topic)
+        super().subscribe(topic)
+
+    def set_on_message_async(self, callable: AsyncMessageCallback) -> None:
+        self.on_message_async = callable
+
+    def _attach_to_running_loop(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+
+    async def _connect_with_backoff(
+        self,
+        connect: Callable[[], MQTTErrorCode],
+        retries: Optional[int],
+        min_delay_seconds: float,
+        max_delay_seconds: float,
+    ) -> bool:
+        assert self.loop is not None
+
+        conn_attempt = 0
+        while retries is None or conn_attempt < retries:
+            conn_attempt += 1
+            try:
+                # NOTE: connecting resolves the host name and opens a TCP connection,
+                # both of which block
+                error_code = await self.loop.run_in_executor(None, connect)
+                if error_code == paho_mqtt.MQTT_ERR_SUCCESS:
+                    self.logger.info(
+                        message=f"Connected to the broker: {self.broker_uri}"
+                    )
+                    return True
+                self.logger.warning(
+                    message=f"[Attempt {conn_attempt}] Could not connect to the broker: {error_code}. Retrying..."
+                )
+            except ConnectionRefusedError:
+                self.logger.error(
+                    message=f"[Attempt {conn_attempt}] Connection to the broker was refused"
+                )
+            except Exception as e:
+                self.logger.error(
+                    message=f"[Attempt {conn_attempt}] Could not connect to the broker. Unexpected error: {e}"
+                )
+
+            await asyncio.sleep(
+                self._backoff_delay(
+                    conn_attempt=conn_attempt,
+                    min_delay_seconds=min_delay_seconds,
+                    max_delay_seconds=max_delay_seconds,
+                )
+            )
+
+        return False
+
+    @staticmethod
+    def _backoff_delay(
+        conn_attempt: int, min_delay_seconds: float, max_delay_seconds: float
+    ) -> float:
+        # exponential back-off with jitter, so replicas do not reconnect in lockstep
+        delay = min(max_delay_seconds, min_delay_seconds * 2 ** (conn_attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _reconnect(self) -> None:
+        await self._connect_with_backoff(
+            connect=self.client.reconnect,
+            retries=None,
+            min_delay_seconds=1.0,
+            max_delay_seconds=30.0,
+        )
+
+    async def _serve(
+        self, client: paho_mqtt.Client, userdata: Any, msg: paho_mqtt.MQTTMessage
+    ) -> None:
+        assert self.on_message_async is not None
+
+        async with self.in_flight_limit:
+            try:
+                await self.on_message_async(client, userdata, msg)
+            except Exception as e:
+                self.logger.error(
+                    message=f"Unhandled error while serving message on topic '{msg.topic}': {e}"
+                )
+
+    async def _misc_loop(self) -> None:
+        while self.client.loop_misc() == paho_mqtt.MQTT_ERR_SUCCESS:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                break
+
+    def _threadsafe(self, callback: Callable[..., None]) -> Callable[..., None]:
+        def wrapper(*args) -> None:
+            if self.loop is None or threading.get_ident() == self.loop_thread_id:
+                callback(*args)
+            else:
+                self.loop.call_soon_threadsafe(callback, *args)
+
+        return wrapper
+
+    def _on_socket_open(self, client: paho_mqtt.Client, userdata: Any, sock) -> None:
+        assert self.loop is not None
+
+        # NOTE: the file descriptor is kept, since by the time the close callback
+        # runs on the loop thread the socket itself is already closed
+        self.sock_fd = sock.fileno()
+        self.loop.add_reader(self.sock_fd, client.loop_read)
+        self.misc_task = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client: paho_mqtt.Client, userdata: Any, sock) -> None:
+        assert self.loop is not None
+
+        if self.sock_fd is not None:
+            self.loop.remove_reader(self.sock_fd)
+            self.loop.remove_writer(self.sock_fd)
+            self.sock_fd = None
+        if self.misc_task is not None:
+            self.misc_task.cancel()
+
+    def _on_socket_register_write(
+        self, client: paho_mqtt.Client, userdata: Any, sock
+    ) -> None:
+        assert self.loop is not None
+
+        if self.sock_fd is not None:
+            self.loop.add_writer(self.sock_fd, client.loop_write)
+
+    def _on_socket_unregister_write(
+        self, client: paho_mqtt.Client, userdata: Any, sock
+    ) -> None:
+        assert self.loop is not None
+
+        if self.sock_fd is not None:
+            self.loop.remove_writer(self.sock_fd)
+
+    def _on_message(
+        self, client: paho_mqtt.Client, userdata: Any, msg: paho_mqtt.MQTTMessage
+    ) -> None:
+        if self.loop is None or self.on_message_async is None:
+            self.logger.warning(message=f"No handler set for topic '{msg.topic}'")
+            return
+
+        task = self.loop.create_task(self._serve(client, userdata, msg))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+
+    def _on_connect(self, client, userdata, connect_flags, reason_code, properties):
+        self.logger.info("Connected to the client")
+        if self.disconnected:
+            self.logger.info("Re-subscribing to the topics")
+            for topic in self.topics:
+                super().subscribe(topic)
+            self.disconnected = False
+
+    def _on_disconnect(
+        self, client, userdata, disconnect_flags, reason_code, properties
+    ):
+        if self.is_user_interrupt:
+            self.logger.info("User disconnected from the client")
+            return
+
+        self.logger.warning("Disconnected from the client. Trying to reconnect...")
+        self.disconnected = True
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._schedule_reconnect)
+
+    def _schedule_reconnect(self) -> None:
+        assert self.loop is not None
+
+        if self.reconnect_task is None or self.reconnect_task.done():
+            self.reconnect_task = self.loop.create_task(self._reconnect())
@@ -0,0 +1,98 @@
+import contextvars
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cbor2
+import msgpack
+from paho.mqtt.client import Client, MQTTMessage, MQTTv5
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from pydantic_core import from_json, to_json
+
+from mqtt.schema import ContentType
+
+
+class Codec:
+    """
+    How messages are put on the wire.
+
+    JSON stays the default and is validated and rendered straight from/to bytes (see 'MqttRouter'
+    and 'mqtt.serializers'), the binary codecs go through plain Python objects instead.
+    """
+
+    def __init__(
+        self,
+        content_type: ContentType,
+        topic_suffix: Optional[str],
+        decode: Callable[[bytes], Any],
+        encode: Callable[[Any], bytes],
+    ) -> None:
+        self.content_type = content_type
+        self.topic_suffix = topic_suffix
+        self.decode = decode
+        self.encode = encode
+
+    def __repr__(self) -> str:
+        return f"Codec({self.content_type.value})"
+
+
+JSON = Codec(
+    content_type=ContentType.JSON, topic_suffix=None, decode=from_json, encode=to_json
+)
+MSGPACK = Codec(
+    content_type=ContentType.MSGPACK,
+    topic_suffix="msgpack",
+    decode=lambda payload: msgpack.unpackb(payload, raw=False),
+    encode=msgpack.packb,
+)
+CBOR = Codec(
+    content_type=ContentType.CBOR,
+    topic_suffix="cbor",
+    decode=cbor2.loads,
+    encode=cbor2.dumps,
+)
+
+CODECS_BY_CONTENT_TYPE: Dict[str, Codec] = {
+    codec.content_type.value: codec for codec in (JSON, MSGPACK, CBOR)
+}
+CODECS_BY_TOPIC_SUFFIX: Dict[str, Codec] = {
+    codec.topic_suffix: codec for codec in (MSGPACK, CBOR) if codec.topic_suffix
+}
+
+# NOTE: set by the router for every request, so that the responses (and errors) sent while
+# serving it use the same codec as the request
+current_codec: contextvars.ContextVar[Codec] = contextvars.ContextVar(
+    "current_codec", default=JSON
+)
+
+
+def codec_topics(topic: str) -> List[str]:
+    # the request topic itself (JSON, or any codec set through the content type) and one per binary codec
+    return [topic] + [f"{topic}/{suffix}" for suffix in CODECS_BY_TOPIC_SUFFIX]
+
+
+def split_codec_suffix(topic: str) -> Tuple[str, Optional[Codec]]:
+    base_topic, _, suffix = topic.rpartition("/")
+    codec = CODECS_BY_TOPIC_SUFFIX.get(suffix, None)
+    if codec is None:
+        return topic, None
+    return base_topic, codec
+
+
+def codec_of(msg: MQTTMessage) -> Codec:
+    # an MQTT v5 content type wins over the topic suffix
+    properties = getattr(msg, "properties", None)
+    content_type = getattr(properties, "ContentType", None)
+    if content_type is not None and content_type in CODECS_BY_CONTENT_TYPE:
+        return CODECS_BY_CONTENT_TYPE[content_type]
+
+    _, codec = split_codec_suffix(msg.topic)
+    return codec or JSON
+
+
+def publish_properties(client: Client, codec: Codec) -> Optional[Properties]:
+    if codec is JSON or getattr(client, "protocol", None) != MQTTv5:
+        return None
+
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.ContentType = codec.content_type.value
+    return properties
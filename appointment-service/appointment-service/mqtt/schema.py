@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import TypeVar, Generic, TypeAlias
+from typing import Any, Dict, TypeVar, Generic, TypeAlias
 from enum import Enum
 
 from pydantic import BaseModel
@@ -17,6 +17,22 @@ class HttpMethod(str, Enum):
     DELETE = "DELETE"
 
 
+class RouteAccess(str, Enum):
+    READ = "read"
+    WRITE = "write"
+
+
+class ContentType(str, Enum):
+    JSON = "application/json"
+    MSGPACK = "application/msgpack"
+    CBOR = "application/cbor"
+
+
+class Compression(str, Enum):
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
 class MqttStatus(Enum):
     STATUS_200_OK = 200
     STATUS_201_CREATED = 201
@@ -26,6 +42,22 @@ class MqttStatus(Enum):
     STATUS_500_INTERNAL_ERROR = 500
 
 
+class MqttRequestHeader(BaseModel):
+    # NOTE: enough to route the request, 'data' is kept as decoded and only validated
+    # against the schema of the route it was sent to
+    msgId: str
+    method: HttpMethod
+    path: str
+    data: Any = None
+
+    def request(self) -> Dict[str, Any]:
+        # the request to validate against the route's schema ('data' left out when it was not sent)
+        request: Dict[str, Any] = dict(msgId=self.msgId, method=self.method, path=self.path)
+        if "data" in self.model_fields_set:
+            request["data"] = self.data
+        return request
+
+
 class MqttRequest(BaseModel, Generic[T]):
     msgId: str
     method: HttpMethod
@@ -0,0 +1,40 @@
+from sqlalchemy import create_engine, inspect, text
+
+from db.db import Database
+
+
+def test_migrate_converts_availability_times_of_a_database_created_without_migrations(tmp_path):
+    db_path = f"sqlite:///{tmp_path / 'legacy.db'}"
+
+    # the availability table as 'create_all' generated it, with the times stored as 'HH:MM' strings
+    engine = create_engine(db_path)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE availability (id INTEGER PRIMARY KEY AUTOINCREMENT, dentist_id VARCHAR NOT NULL, "
+            "clinic_id VARCHAR NOT NULL, day_of_week VARCHAR NOT NULL, start_time VARCHAR NOT NULL, "
+            "end_time VARCHAR NOT NULL, status VARCHAR NOT NULL, created_at DATETIME NOT NULL, "
+            "updated_at DATETIME NOT NULL)"
+        ))
+        connection.execute(text(
+            "INSERT INTO availability VALUES "
+            "(NULL, '101', '1', 'Monday', '9:00', '10:30', 'available', '2024-01-01', '2024-01-01')"
+        ))
+    engine.dispose()
+
+    db = Database(db_path=db_path)
+
+    with db.engine.connect() as connection:
+        assert connection.execute(
+            text("SELECT start_minute, end_minute FROM availability")
+        ).all() == [(540, 630)]
+    columns = {column["name"] for column in inspect(db.engine).get_columns("availability")}
+    assert "start_time" not in columns and "end_time" not in columns
+    indexes = {index["name"] for index in inspect(db.engine).get_indexes("availability")}
+    assert indexes == {"ix_availability_dentist_day_start", "ix_availability_clinic_day_start"}
+
+
+def test_new_databases_are_recorded_at_the_latest_revision(tmp_path):
+    db = Database(db_path=f"sqlite:///{tmp_path / 'new.db'}")
+
+    with db.engine.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == "a41c7e9b2f60"
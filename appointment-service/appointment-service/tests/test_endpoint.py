@@ -1,9 +1,30 @@
+from datetime import date, timedelta
+from typing import Any, List, Optional, Tuple
+
 import pytest
+from pydantic import ValidationError
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+from config.app import AppConfig
 from db.db import Database
 from db.dataclasses import DbErrorType
-from appointments_operations.model import Availability
-from appointments_operations.schema import AppointmentModel
+from mqtt.schema import HttpMethod
+from appointments_operations.model import Availability, AvailabilityTemplate, to_minutes, to_time
+from appointments_operations.router import AppointmentsMqttRouter
+from appointments_operations.schedule_index import ScheduleIndex
+from appointments_operations.schema import (
+    AppointmentModel,
+    AvailabilityInput,
+    AvailabilityOutput,
+    AvailabilitySearch,
+    AvailabilitySelection,
+    AvailabilityStatusChange,
+    AvailabilityTemplateInput,
+    BulkAvailabilityStatus,
+    Weekday,
+    decode_cursor,
+    encode_cursor,
+)
 
 @pytest.fixture
 def db() -> Database:
@@ -12,31 +33,508 @@ def db() -> Database:
     #return Database(db_path="sqlite:///:memory:")
     #return db
 
+def appointment(start_time: str, end_time: str, dentist_id: str = "101") -> AppointmentModel:
+    return AppointmentModel(
+        id="1091923809143847",
+        dentist_id=dentist_id,
+        clinic_id="1",
+        day_of_week="2024-11-30",
+        start_time=start_time,
+        end_time=end_time,
+        status="FREE"
+    )
+
 def test_add_appointment(db: Database):
     with Session(db.engine) as session:
-        appointment_data = AppointmentModel(
-            id="1091923809143847",
-            dentist_id="101",
-            day_of_week="2024-11-30",
-            start_time="09:00",
-            end_time="17:00",
-            status="FREE"
-        )
+        appointment_data = appointment(start_time="09:00", end_time="17:00")
 
-    result = Availability.add_appointment(session=session, appointment=appointment_data)
-    assert result.is_ok() is True
+        result = Availability.add_appointment(session=session, appointment=appointment_data)
+        assert result.is_ok() is True
+
+        added = result.unwrap()
+        assert added.start_minute == 9 * 60
+        assert added.end_minute == 17 * 60
+        assert added.to_schema()["start_time"] == "09:00"
+        assert added.to_schema()["end_time"] == "17:00"
 
 def test_get_appointment(db: Database):
     with Session(db.engine) as session:
-        appointment_data = AppointmentModel(
-            id="1091923809143847",
-            dentist_id="101",
-            day_of_week="2024-11-30",
-            start_time="09:00",
-            end_time="17:00",
-            status="FREE"
+        appointment_data = appointment(start_time="09:00", end_time="17:00")
+
+        added = Availability.add_appointment(session=session, appointment=appointment_data).unwrap()
+        result = Availability.get_appointment(session=session, appointment_id=added.id)
+        assert result.is_ok() is True
+
+@pytest.mark.parametrize(
+    "start_time, end_time",
+    [
+        ("09:00", "10:00"),
+        ("09:30", "09:45"),
+        ("08:00", "09:01"),
+        ("09:59", "11:00"),
+        ("08:00", "11:00"),
+    ],
+)
+def test_add_appointment_rejects_overlapping_slots(db: Database, start_time: str, end_time: str):
+    with Session(db.engine) as session:
+        assert Availability.add_appointment(session=session, appointment=appointment("09:00", "10:00")).is_ok()
+
+        result = Availability.add_appointment(session=session, appointment=appointment(start_time, end_time))
+        assert result.is_err() is True
+        assert result.error.error_type == DbErrorType.RECORD_ALREADY_EXISTS
+
+def test_add_appointment_accepts_adjacent_slots_and_other_dentists(db: Database):
+    with Session(db.engine) as session:
+        assert Availability.add_appointment(session=session, appointment=appointment("09:00", "10:00")).is_ok()
+
+        assert Availability.add_appointment(session=session, appointment=appointment("10:00", "11:00")).is_ok()
+        assert Availability.add_appointment(session=session, appointment=appointment("08:00", "09:00")).is_ok()
+        assert Availability.add_appointment(
+            session=session, appointment=appointment("09:00", "10:00", dentist_id="102")
+        ).is_ok()
+
+def test_add_appointment_rejects_slots_ending_before_they_start(db: Database):
+    with Session(db.engine) as session:
+        assert Availability.add_appointment(session=session, appointment=appointment("10:00", "09:00")).is_err()
+
+def test_to_minutes():
+    assert to_minutes("00:00") == 0
+    assert to_minutes("8:05") == 8 * 60 + 5
+    assert to_minutes("24:00") == 24 * 60
+    with pytest.raises(ValueError):
+        to_minutes("24:30")
+    with pytest.raises(ValueError):
+        to_minutes("10:60")
+    with pytest.raises(ValueError):
+        to_minutes("10am")
+
+def test_overlap_check_seeks_the_index(db: Database):
+    with Session(db.engine) as session:
+        plan = session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM availability "
+            "WHERE dentist_id = '101' AND day_of_week = '2024-11-30' AND start_minute < 600 AND end_minute > 540"
+        )
+        details = [detail for _, _, _, detail in plan]
+        assert any("USING INDEX ix_availability_dentist_day_start" in detail for detail in details), details
+
+def add_slot(session: Session, dentist_id: str, clinic_id: str, day: str, start_time: str, end_time: str, status: str = "FREE") -> Availability:
+    return Availability.add_appointment(
+        session=session,
+        appointment=AppointmentModel(
+            id="0",
+            dentist_id=dentist_id,
+            clinic_id=clinic_id,
+            day_of_week=day,
+            start_time=start_time,
+            end_time=end_time,
+            status=status,
+        ),
+    ).unwrap()
+
+@pytest.fixture
+def schedule(db: Database) -> Database:
+    with Session(db.engine) as session:
+        for dentist_id, clinic_id in (("101", "1"), ("102", "1"), ("103", "2")):
+            for day in ("2024-12-02", "2024-12-03", "2024-12-04"):
+                for hour in range(8, 17):
+                    status = "BOOKED" if hour == 12 else "FREE"
+                    add_slot(session, dentist_id, clinic_id, day, f"{hour:02d}:00", f"{hour:02d}:45", status)
+    return db
+
+def search_all(session: Session, search: AvailabilitySearch, index: Optional[ScheduleIndex] = None) -> List[AvailabilityOutput]:
+    found: List[AvailabilityOutput] = []
+    while True:
+        if index is not None:
+            page, next_cursor = index.search(search=search, after=search.after())
+        else:
+            page, next_cursor = Availability.search_appointments(session=session, search=search, after=search.after()).unwrap()
+        found.extend(page)
+        if next_cursor is None:
+            return found
+        search = search.model_copy(update={"cursor": next_cursor})
+
+def test_search_appointments_filters(schedule: Database):
+    with Session(schedule.engine) as session:
+        search = AvailabilitySearch(
+            dentist_id="101", days=["2024-12-04", "2024-12-02"], start_time="10:00", end_time="13:00", status="FREE"
+        )
+        found = search_all(session, search)
+        assert [(slot.day_of_week, slot.start_time) for slot in found] == [
+            ("2024-12-02", "10:00"),
+            ("2024-12-02", "11:00"),
+            ("2024-12-04", "10:00"),
+            ("2024-12-04", "11:00"),
+        ]
+        assert {slot.dentist_id for slot in found} == {"101"}
+
+        by_clinic = search_all(session, AvailabilitySearch(clinic_id="1", days=["2024-12-03"], end_time="09:00"))
+        assert [(slot.dentist_id, slot.start_time) for slot in by_clinic] == [("101", "08:00"), ("102", "08:00")]
+
+def test_search_appointments_pages_with_a_cursor(schedule: Database):
+    with Session(schedule.engine) as session:
+        everything = search_all(session, AvailabilitySearch(clinic_id="1", limit=1000))
+        assert len(everything) == 2 * 3 * 9
+
+        pages: List[AvailabilityOutput] = []
+        search = AvailabilitySearch(clinic_id="1", limit=7)
+        while True:
+            page, next_cursor = Availability.search_appointments(session=session, search=search, after=search.after()).unwrap()
+            assert len(page) <= 7
+            pages.extend(page)
+            if next_cursor is None:
+                break
+            search = search.model_copy(update={"cursor": next_cursor})
+
+        assert [slot.id for slot in pages] == [slot.id for slot in everything]
+        assert everything == sorted(everything, key=lambda slot: (slot.day_of_week, slot.start_time, slot.id))
+
+@pytest.mark.parametrize(
+    "search",
+    [
+        AvailabilitySearch(dentist_id="101", limit=4),
+        AvailabilitySearch(dentist_id="101", days=["2024-12-03", "2024-12-09"], limit=2),
+        AvailabilitySearch(dentist_id="102", start_time="09:30", end_time="14:45", limit=3),
+        AvailabilitySearch(dentist_id="103", clinic_id="2", status="BOOKED"),
+        AvailabilitySearch(dentist_id="103", clinic_id="1"),
+        AvailabilitySearch(dentist_id="999"),
+    ],
+)
+def test_schedule_index_answers_like_the_database(schedule: Database, search: AvailabilitySearch):
+    def load(dentist_id: str):
+        with Session(schedule.engine) as session:
+            return Availability.get_dentist_schedule(session=session, dentist_id=dentist_id).unwrap()
+
+    index = ScheduleIndex(max_dentists=2, loader=load)
+    with Session(schedule.engine) as session:
+        assert search_all(session, search, index=index) == search_all(session, search)
+
+def test_schedule_index_follows_the_writes(schedule: Database):
+    loads: List[str] = []
+
+    def load(dentist_id: str):
+        loads.append(dentist_id)
+        with Session(schedule.engine) as session:
+            return Availability.get_dentist_schedule(session=session, dentist_id=dentist_id).unwrap()
+
+    index = ScheduleIndex(max_dentists=1, loader=load)
+    search = AvailabilitySearch(dentist_id="101", days=["2024-12-05"])
+    with Session(schedule.engine) as session:
+        assert index.search(search=search) == ([], None)
+
+        added = add_slot(session, "101", "1", "2024-12-05", "08:00", "08:30")
+        index.add(start_minute=added.start_minute, end_minute=added.end_minute, slot=Availability.to_output(added))
+        assert [slot.id for slot in index.search(search=search)[0]] == [added.id]
+
+        index.set_status(appointment_id=added.id, status="BOOKED")
+        assert index.search(search=search)[0][0].status == "BOOKED"
+
+        index.remove(appointment_id=added.id)
+        assert index.search(search=search) == ([], None)
+        assert loads == ["101"]
+
+        # NOTE: only one dentist fits, searching another one drops the first
+        index.search(search=AvailabilitySearch(dentist_id="102"))
+        index.search(search=search)
+        assert loads == ["101", "102", "101"]
+
+def test_search_validation():
+    with pytest.raises(ValidationError):
+        AvailabilitySearch(days=["2024-12-02"])
+    with pytest.raises(ValidationError):
+        AvailabilitySearch(dentist_id="101", start_time="10:00", end_time="09:00")
+    with pytest.raises(ValidationError):
+        AvailabilitySearch(dentist_id="101", cursor="not a cursor")
+    assert decode_cursor(encode_cursor(("2024-12-02", 540, 7))) == ("2024-12-02", 540, 7)
+
+def test_search_route_is_not_shadowed_by_the_id_route(db: Database):
+    router = AppointmentsMqttRouter(app_config=AppConfig.from_env(), database=db)
+    route, params = router.router.find_route(HttpMethod.GET, "/appointments/search")
+    assert route.handler == router.search_appointments
+    assert params == {}
+
+@pytest.mark.parametrize(
+    "search",
+    [
+        AvailabilitySearch(dentist_id="101"),
+        AvailabilitySearch(clinic_id="1", days=["2024-12-02", "2024-12-03"], start_time="08:00", end_time="12:00", status="FREE"),
+        AvailabilitySearch(dentist_id="101", clinic_id="1", days=["2024-12-02"], cursor=encode_cursor(("2024-12-02", 540, 3))),
+    ],
+)
+def test_search_seeks_an_index(db: Database, search: AvailabilitySearch):
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with Session(db.engine) as session:
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            Availability.search_appointments(session=session, search=search, after=search.after())
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+        plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statements[0][0]}", statements[0][1])
+        details = [detail for _, _, _, detail in plan]
+        assert not any(detail.startswith("SCAN ") for detail in details), details
+        assert any("USING INDEX ix_availability_" in detail for detail in details), details
+
+def template(**overrides: Any) -> AvailabilityTemplateInput:
+    fields = dict(
+        dentist_id="101",
+        clinic_id="1",
+        weekdays=[Weekday.MONDAY, Weekday.WEDNESDAY],
+        start_time="09:00",
+        end_time="12:00",
+        slot_minutes=30,
+        # Monday to Sunday of the following week
+        start_date=date(2024, 12, 2),
+        end_date=date(2024, 12, 15),
+    )
+    fields.update(overrides)
+    return AvailabilityTemplateInput(**fields)
+
+def test_add_template_materializes_up_to_the_window(db: Database):
+    with Session(db.engine) as session:
+        added, slots = AvailabilityTemplate.add_template(
+            session=session, template=template(), until=date(2024, 12, 8)
+        ).unwrap()
+        assert added.materialized_until == date(2024, 12, 8)
+        assert added.to_output(slots_created=len(slots)).weekdays == [Weekday.MONDAY, Weekday.WEDNESDAY]
+
+        found = search_all(session, AvailabilitySearch(dentist_id="101", limit=1000))
+        # Monday 2 and Wednesday 4, 6 slots of 30 minutes from 9:00 to 12:00
+        assert len(found) == len(slots) == 2 * 6
+        assert {slot.day_of_week for slot in found} == {"2024-12-02", "2024-12-04"}
+        assert (found[0].start_time, found[0].end_time, found[-1].start_time) == ("09:00", "09:30", "11:30")
+
+def test_templates_are_materialized_once_searched(db: Database):
+    with Session(db.engine) as session:
+        AvailabilityTemplate.add_template(session=session, template=template(), until=date(2024, 12, 1)).unwrap()
+        assert search_all(session, AvailabilitySearch(dentist_id="101")) == []
+
+        template_ids = AvailabilityTemplate.get_pending_template_ids(
+            session=session, until=date(2024, 12, 9), dentist_id="101"
+        ).unwrap()
+        assert len(template_ids) == 1
+        assert AvailabilityTemplate.get_pending_template_ids(
+            session=session, until=date(2024, 12, 9), clinic_id="2"
+        ).unwrap() == []
+
+        slots = AvailabilityTemplate.materialize_templates(
+            session=session, template_ids=template_ids, until=date(2024, 12, 9)
+        ).unwrap()
+        assert {slot.day_of_week for _, _, slot in slots} == {"2024-12-02", "2024-12-04", "2024-12-09"}
+
+        # NOTE: past the template's end date, only the Wednesday 11 is left
+        slots = AvailabilityTemplate.materialize_templates(
+            session=session, template_ids=template_ids, until=date(2025, 1, 1)
+        ).unwrap()
+        assert {slot.day_of_week for _, _, slot in slots} == {"2024-12-11"}
+        assert AvailabilityTemplate.get_pending_template_ids(
+            session=session, until=date(2025, 1, 1), dentist_id="101"
+        ).unwrap() == []
+        assert len(search_all(session, AvailabilitySearch(dentist_id="101", limit=1000))) == 4 * 6
+
+def test_materialize_skips_overlapping_slots(db: Database):
+    with Session(db.engine) as session:
+        add_slot(session, "101", "1", "2024-12-02", "09:15", "10:00")
+        AvailabilityTemplate.add_template(session=session, template=template(), until=date(2024, 12, 2)).unwrap()
+        # the one-hour template overlaps every slot of the first one
+        AvailabilityTemplate.add_template(
+            session=session, template=template(slot_minutes=60), until=date(2024, 12, 2)
+        ).unwrap()
+
+        found = search_all(session, AvailabilitySearch(dentist_id="101", days=["2024-12-02"]))
+        assert [(slot.start_time, slot.end_time) for slot in found] == [
+            ("09:15", "10:00"),
+            ("10:00", "10:30"),
+            ("10:30", "11:00"),
+            ("11:00", "11:30"),
+            ("11:30", "12:00"),
+        ]
+
+def test_materialize_only_once_for_concurrent_searches(db: Database):
+    with Session(db.engine) as session:
+        added, _ = AvailabilityTemplate.add_template(session=session, template=template(), until=date(2024, 12, 1)).unwrap()
+        template_id = added.id
+
+    with Session(db.engine) as first, Session(db.engine) as second:
+        loaded = first.query(AvailabilityTemplate).filter_by(id=template_id).one()
+        assert AvailabilityTemplate.materialize_templates(
+            session=second, template_ids=[template_id], until=date(2024, 12, 8)
+        ).unwrap()
+
+        # loaded before the other search materialized the same days
+        assert loaded.materialize(session=first, until=date(2024, 12, 8)) == []
+        first.commit()
+        assert len(search_all(first, AvailabilitySearch(dentist_id="101"))) == 2 * 6
+
+def test_template_validation():
+    with pytest.raises(ValidationError):
+        template(weekdays=[])
+    with pytest.raises(ValidationError):
+        template(start_time="11:45", end_time="12:00")
+    with pytest.raises(ValidationError):
+        template(end_date=date(2024, 12, 1))
+    with pytest.raises(ValidationError):
+        template(end_date=date(2026, 12, 1))
+
+def test_search_route_materializes_the_searched_days(db: Database):
+    router = AppointmentsMqttRouter(app_config=AppConfig.from_env(), database=db)
+    with Session(db.engine) as session:
+        AvailabilityTemplate.add_template(
+            session=session, template=template(start_date=date.today(), end_date=date.today() + timedelta(days=90)),
+            until=date.today(),
+        ).unwrap()
+
+    later = (date.today() + timedelta(days=60)).isoformat()
+    router._materialize_templates(search=AvailabilitySearch(clinic_id="1", days=[later]))
+    with Session(db.engine) as session:
+        found = search_all(session, AvailabilitySearch(dentist_id="101", days=[later]))
+        assert len(found) == (6 if date.fromisoformat(later).weekday() in (0, 2) else 0)
+        assert AvailabilityTemplate.get_pending_template_ids(
+            session=session, until=date.fromisoformat(later), dentist_id="101"
+        ).unwrap() == []
+
+@pytest.mark.parametrize("filters", [{"dentist_id": "101"}, {"clinic_id": "1"}])
+def test_pending_templates_lookup_seeks_an_index(db: Database, filters: dict):
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with Session(db.engine) as session:
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            AvailabilityTemplate.get_pending_template_ids(session=session, until=date(2024, 12, 9), **filters)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statements[0][0]}", statements[0][1])
+        details = [detail for _, _, _, detail in plan]
+        assert any("USING INDEX ix_availability_template_" in detail for detail in details), details
+
+def slot_input(start_time: str, end_time: str, dentist_id: str = "101", day: str = "2024-12-02", clinic_id: str = "1") -> AvailabilityInput:
+    return AvailabilityInput(
+        dentist_id=dentist_id, clinic_id=clinic_id, day_of_week=day, start_time=start_time, end_time=end_time
+    )
+
+def count_statements(db: Database) -> List[str]:
+    statements: List[str] = []
+    event.listen(
+        db.engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement.split()[0]),
+    )
+    return statements
+
+def test_add_appointments_reports_conflicts_in_order(db: Database):
+    with Session(db.engine) as session:
+        add_slot(session, "101", "1", "2024-12-02", "09:00", "10:00")
+
+        added = Availability.add_appointments(
+            session=session,
+            appointments=[
+                slot_input("10:00", "11:00"),
+                slot_input("09:30", "10:30"),  # overlaps the slot already there
+                slot_input("10:30", "11:30"),  # overlaps the first one of the list
+                slot_input("09:30", "10:30", dentist_id="102"),
+                slot_input("09:30", "10:30", day="2024-12-03"),
+            ],
+        ).unwrap()
+
+        assert [slot is not None for slot in added] == [True, False, False, True, True]
+        assert [(slot[2].dentist_id, slot[2].day_of_week, slot[2].start_time) for slot in added if slot is not None] == [
+            ("101", "2024-12-02", "10:00"),
+            ("102", "2024-12-02", "09:30"),
+            ("101", "2024-12-03", "09:30"),
+        ]
+        assert len(search_all(session, AvailabilitySearch(clinic_id="1"))) == 4
+
+def test_add_appointments_is_set_based(db: Database):
+    appointments = [
+        slot_input(to_time(8 * 60 + idx % 20 * 30), to_time(8 * 60 + idx % 20 * 30 + 30), dentist_id=str(idx // 20))
+        for idx in range(1000)
+    ]
+    statements = count_statements(db)
+    with Session(db.engine) as session:
+        added = Availability.add_appointments(session=session, appointments=appointments, chunk_size=500).unwrap()
+
+    assert all(slot is not None for slot in added)
+    # one lookup of the dentists' days and one 'INSERT ... RETURNING' per chunk
+    assert statements.count("SELECT") == 1
+    assert statements.count("INSERT") == 2
+
+def test_delete_appointments_by_ids_and_by_filters(schedule: Database):
+    statements = count_statements(schedule)
+    with Session(schedule.engine) as session:
+        deleted = Availability.delete_appointments(
+            session=session, selection=AvailabilitySelection(clinic_id="1", days=["2024-12-03"])
+        ).unwrap()
+        assert len(deleted) == 2 * 9
+        assert {(slot.clinic_id, slot.day_of_week) for slot in deleted} == {("1", "2024-12-03")}
+        assert statements == ["DELETE"]
+
+        ids = [slot.id for slot in search_all(session, AvailabilitySearch(dentist_id="103", days=["2024-12-02"]))]
+        deleted = Availability.delete_appointments(session=session, selection=AvailabilitySelection(ids=ids + [999_999])).unwrap()
+        assert sorted(slot.id for slot in deleted) == sorted(ids)
+        assert search_all(session, AvailabilitySearch(dentist_id="103", days=["2024-12-02"])) == []
+
+def test_change_appointments_status_only_moves_the_selected_status(schedule: Database):
+    router = AppointmentsMqttRouter(app_config=AppConfig.from_env(), database=schedule)
+    with Session(schedule.engine) as session:
+        ids = [slot.id for slot in search_all(session, AvailabilitySearch(dentist_id="101", days=["2024-12-02"], start_time="11:00", end_time="13:00"))]
+        change = AvailabilityStatusChange(ids=ids + [999_999], status="FREE", new_status="BOOKED")
+
+        updated = Availability.change_appointments_status(session=session, selection=change, new_status=change.new_status).unwrap()
+        # 12:00 was already booked
+        assert [slot.start_time for slot in updated] == ["11:00"]
+        assert updated[0].status == "BOOKED"
+
+        results = router._bulk_results(
+            session=session, selection=change, written=updated, status=BulkAvailabilityStatus.UPDATED
         )
+        assert [(result.id, result.status) for result in results] == [
+            (ids[0], BulkAvailabilityStatus.UPDATED),
+            (ids[1], BulkAvailabilityStatus.CONFLICT),
+            (999_999, BulkAvailabilityStatus.NOT_FOUND),
+        ]
+
+        closed = Availability.change_appointments_status(
+            session=session, selection=AvailabilitySelection(clinic_id="2", days=["2024-12-04"]), new_status="CLOSED"
+        ).unwrap()
+        assert len(closed) == 9
+        assert {slot.status for slot in search_all(session, AvailabilitySearch(clinic_id="2", days=["2024-12-04"]))} == {"CLOSED"}
+
+def test_single_delete_and_status_change(schedule: Database):
+    with Session(schedule.engine) as session:
+        slot_id = str(search_all(session, AvailabilitySearch(dentist_id="101"))[0].id)
+
+        assert Availability.change_appointment_status(session=session, appointment_id=slot_id, new_status="BOOKED").is_ok()
+        assert Availability.get_appointment(session=session, appointment_id=slot_id).unwrap().status == "BOOKED"
+        assert Availability.delete_appointment(session=session, appointment_id=slot_id).is_ok()
+
+        for missing in (slot_id, "not-an-id"):
+            result = Availability.delete_appointment(session=session, appointment_id=missing)
+            assert result.error.error_type == DbErrorType.RECORD_NOT_FOUND
+            result = Availability.change_appointment_status(session=session, appointment_id=missing, new_status="FREE")
+            assert result.error.error_type == DbErrorType.RECORD_NOT_FOUND
+
+def test_selection_validation(db: Database):
+    with pytest.raises(ValidationError):
+        AvailabilitySelection(days=["2024-12-02"], status="FREE")
+    with pytest.raises(ValidationError):
+        AvailabilitySelection(ids=[])
+    with pytest.raises(ValidationError):
+        slot_input("10:00", "10:00")
 
-    Availability.add_appointment(session=session, appointment=appointment_data)
-    result = Availability.get_appointment(session=session, appointment_id="1091923809143847")
-    assert result.is_ok() is True
+    router = AppointmentsMqttRouter(app_config=AppConfig.from_env(), database=db)
+    for method, path, handler in (
+        (HttpMethod.POST, "/appointments/bulk", router.register_appointments),
+        (HttpMethod.DELETE, "/appointments/bulk", router.delete_appointments),
+        (HttpMethod.DELETE, "/appointments/12", router.delete_appointment),
+        (HttpMethod.PUT, "/appointments/bulk/status", router.change_appointments_status),
+        (HttpMethod.PUT, "/appointments/12/status", router.change_appointment_status),
+    ):
+        assert router.router.find_route(method, path)[0].handler == handler
@@ -1,5 +1,12 @@
+import os
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
 import bcrypt
 
+T = TypeVar("T")
+
 
 def hash_password(plain_password: str) -> str:
     return bcrypt.hashpw(
@@ -11,3 +18,48 @@ def is_correct_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(
         password=plain_password.encode(), hashed_password=hashed_password.encode()
     )
+
+
+class PasswordHasher:
+    """
+    Offloads bcrypt hashing and verification to a pool of processes, so that
+    hashing can use every core instead of one at a time.
+
+    With 'workers' set to 0 the work is done in-line and an already resolved future is returned.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        # NOTE: 'spawn' since the service forks from a process that already runs
+        # MQTT and worker threads, which does not mix well with 'fork'
+        self.executor: Optional[ProcessPoolExecutor] = (
+            ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            if self.workers > 0
+            else None
+        )
+
+    def hash_password(self, plain_password: str) -> "Future[str]":
+        return self._submit(hash_password, plain_password)
+
+    def is_correct_password(
+        self, plain_password: str, hashed_password: str
+    ) -> "Future[bool]":
+        return self._submit(is_correct_password, plain_password, hashed_password)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _submit(self, fn: Callable[..., T], *args) -> "Future[T]":
+        if self.executor is not None:
+            return self.executor.submit(fn, *args)
+
+        future: Future[T] = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
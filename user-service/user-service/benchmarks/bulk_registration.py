@@ -0,0 +1,109 @@
+"""
+Time to register a clinic's patients with one 'POST /users' request each, against a single 'POST /users/bulk' request.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.bulk_registration --users 200
+"""
+
+import os
+import json
+import time
+import tempfile
+import argparse
+from typing import Any, List
+
+from paho.mqtt.client import MQTTMessage, MQTTv311
+
+from auth.encryption import PasswordHasher
+from config.app import AppConfig
+from db.sqlite import Sqlite
+from db.writer import GroupCommitWriter
+from user.router import UserMqttRouter
+
+
+class NullClient:
+    def __init__(self) -> None:
+        self.protocol = MQTTv311
+
+    def publish(self, topic: str, payload: bytes, properties=None) -> None:
+        pass
+
+
+def request(path: str, data: Any) -> MQTTMessage:
+    message = MQTTMessage(topic=b"dit356g2/users/req")
+    message.payload = json.dumps(
+        {"msgId": "aabb", "method": "POST", "path": path, "data": data}
+    ).encode()
+    return message
+
+
+def patients(count: int) -> List[Any]:
+    return [
+        {
+            "first_name": "Joe",
+            "last_name": "Doe",
+            "email": f"joeDoe{idx}@email.com",
+            "role": "patient",
+            "password": "password",
+        }
+        for idx in range(count)
+    ]
+
+
+def run(bulk: bool, users: int, workers: int, parent_directory: str) -> float:
+    with tempfile.TemporaryDirectory(dir=parent_directory) as directory:
+        database = Sqlite(db_path=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        password_hasher = PasswordHasher(workers=workers)
+        writer = GroupCommitWriter(engine=database.engine)
+        router = UserMqttRouter(
+            app_config=AppConfig.from_env(),
+            database=database,
+            password_hasher=password_hasher,
+            writer=writer,
+        )
+        client = NullClient()
+        # warm-up, so process start-up time is not measured
+        password_hasher.hash_password("warm-up").result()
+
+        started_at = time.perf_counter()
+        if bulk:
+            router.serve(
+                client=client, userdata={}, msg=request("/users/bulk", patients(users))
+            )
+        else:
+            for patient in patients(users):
+                router.serve(client=client, userdata={}, msg=request("/users", patient))
+        elapsed = time.perf_counter() - started_at
+
+        writer.shutdown()
+        password_hasher.shutdown()
+        database.engine.dispose()
+        database.read_engine.dispose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--directory", default=None)
+    args = parser.parse_args()
+
+    single = run(
+        bulk=False,
+        users=args.users,
+        workers=args.workers,
+        parent_directory=args.directory,
+    )
+    print(f"{args.users} single requests {single:8.2f} s")
+    bulk = run(
+        bulk=True,
+        users=args.users,
+        workers=args.workers,
+        parent_directory=args.directory,
+    )
+    print(f"1 bulk request       {bulk:8.2f} s ({single / bulk:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
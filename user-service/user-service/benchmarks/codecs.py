@@ -0,0 +1,76 @@
+"""
+Size and decoding time of a big list response (like 'GET /users/preferences') for every wire codec.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.codecs --preferences 200
+"""
+
+import time
+import argparse
+from datetime import date
+
+from core.schema import DayOfWeek
+from mqtt.codec import CBOR, JSON, MSGPACK
+from mqtt.schema import MqttStatus
+from mqtt.serializers import response_serializers
+from user.schema import TimeSlotOutput, UserPreferenceOutput
+
+
+def make_preferences(count: int):
+    return [
+        UserPreferenceOutput(
+            id=f"preference-{idx}",
+            user_id=f"user-{idx % 20}",
+            start_date=date(2024, 12, 1),
+            end_date=date(2024, 12, 31),
+            is_active=idx % 2 == 0,
+            days_of_week=[DayOfWeek.MONDAY, DayOfWeek.WEDNESDAY, DayOfWeek.FRIDAY],
+            time_slots=[
+                TimeSlotOutput(id=f"slot-{idx}-{slot}", start_time=f"{8 + slot}:00")
+                for slot in range(6)
+            ],
+        )
+        for idx in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preferences", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    preferences = make_preferences(count=args.preferences)
+    json_size = None
+    for codec in (JSON, MSGPACK, CBOR):
+        payload = response_serializers.render(
+            message_id="aabb",
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=preferences,
+            codec=codec,
+        )
+        json_size = json_size or len(payload)
+
+        started_at = time.perf_counter()
+        for _ in range(args.repeat):
+            response_serializers.render(
+                message_id="aabb",
+                status_code=MqttStatus.STATUS_200_OK,
+                payload=preferences,
+                codec=codec,
+            )
+        encode_us = (time.perf_counter() - started_at) / args.repeat * 1e6
+
+        started_at = time.perf_counter()
+        for _ in range(args.repeat):
+            codec.decode(payload)
+        decode_us = (time.perf_counter() - started_at) / args.repeat * 1e6
+
+        print(
+            f"{codec.content_type.value:20s} {len(payload):8d} B ({len(payload) / json_size:.2f}x) "
+            f"encode {encode_us:8.1f} us  decode {decode_us:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compression ratio and CPU cost of compressing big list responses (like 'GET /users/preferences'),
+against the time saved publishing them over a link of the given bandwidth.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.compression --bandwidth-mbps 100
+"""
+
+import time
+import argparse
+
+from benchmarks.codecs import make_preferences
+from mqtt.codec import JSON
+from mqtt.compression import COMPRESSORS, DECOMPRESSORS
+from mqtt.schema import MqttStatus
+from mqtt.serializers import response_serializers
+
+
+def measure(fn, repeat: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started_at) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bandwidth-mbps", type=float, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    bytes_per_second = args.bandwidth_mbps * 1e6 / 8
+    for count in (100, 1000, 10000):
+        data = response_serializers.render(
+            message_id="aabb",
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=make_preferences(count=count),
+            codec=JSON,
+        )
+        publish_ms = len(data) / bytes_per_second * 1e3
+        print(
+            f"{count} preferences, {len(data) / 1024:.0f} KiB, {publish_ms:.2f} ms to publish"
+        )
+
+        for compression, compress in COMPRESSORS.items():
+            compressed = compress(data)
+            compress_ms = measure(lambda: compress(data), repeat=args.repeat) * 1e3
+            decompress_ms = (
+                measure(
+                    lambda: DECOMPRESSORS[compression](compressed), repeat=args.repeat
+                )
+                * 1e3
+            )
+            compressed_publish_ms = len(compressed) / bytes_per_second * 1e3
+            saved_ms = publish_ms - compressed_publish_ms - compress_ms - decompress_ms
+            print(
+                f"  {compression.value:4s} ratio {len(data) / len(compressed):5.1f}x "
+                f"compress {compress_ms:7.2f} ms  decompress {decompress_ms:6.2f} ms  "
+                f"publish {compressed_publish_ms:6.2f} ms  saved {saved_ms:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Write throughput of a registration burst, with every handler thread committing its own writes
+against the group-commit writer batching them, for each SQLite profile.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.group_commit --threads 8 --writes 2000
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from core.schema import DayOfWeek
+from db.engine import SQLITE_PROFILES
+from db.sqlite import Sqlite
+from db.writer import GroupCommitWriter
+from user.model import User, UserPreference
+from user.schema import TimeSlotInput, UserInput, UserPreferenceInput
+
+
+def register_with_preference(session: Session, idx: int) -> None:
+    # NOTE: the registration and preference-saving requests of a new user, 4 commits in total
+    user = User.add_user(
+        session=session,
+        user=UserInput(
+            first_name="Joe",
+            last_name="Doe",
+            email=f"joeDoe{idx}@email.com",
+            role="patient",
+            password="password",
+        ),
+        hashed_password="hashed",
+    ).unwrap()
+    UserPreference.add_user_preference(
+        session=session,
+        user_id=str(user.id),
+        user_preference=UserPreferenceInput(
+            start_date=date(2024, 12, 5),
+            end_date=date(2024, 12, 10),
+            is_active=True,
+            time_slots=[TimeSlotInput(start_time="10:15")],
+            days_of_week=[DayOfWeek.MONDAY],
+        ),
+    ).unwrap()
+
+
+def run(
+    profile: str, max_batch_size: int, threads: int, writes: int, parent_directory: str
+) -> float:
+    with tempfile.TemporaryDirectory(dir=parent_directory) as directory:
+        db = Sqlite(
+            db_path=f"sqlite:///{os.path.join(directory, 'bench.db')}", profile=profile
+        )
+        # NOTE: creates the role and the week day up-front, which concurrent registrations would race for
+        with Session(db.engine) as session:
+            register_with_preference(session=session, idx=-1)
+        writer = GroupCommitWriter(engine=db.engine, max_batch_size=max_batch_size)
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(
+                executor.map(
+                    lambda idx: writer.submit(
+                        lambda session: register_with_preference(session, idx)
+                    ).result(),
+                    range(writes),
+                )
+            )
+        elapsed = time.perf_counter() - started_at
+
+        writer.shutdown()
+        db.engine.dispose()
+    return writes / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=2000)
+    # NOTE: commits are only as expensive as the fsync of the disk the database is on
+    parser.add_argument("--directory", default=None)
+    args = parser.parse_args()
+
+    for profile in SQLITE_PROFILES:
+        inline = run(
+            profile=profile,
+            max_batch_size=0,
+            threads=args.threads,
+            writes=args.writes,
+            parent_directory=args.directory,
+        )
+        print(f"{profile:12s} in-line          {inline:8.1f} registrations/s")
+        for max_batch_size in (8, 64):
+            batched = run(
+                profile=profile,
+                max_batch_size=max_batch_size,
+                threads=args.threads,
+                writes=args.writes,
+                parent_directory=args.directory,
+            )
+            print(
+                f"{profile:12s} batches of {max_batch_size:3d}   {batched:8.1f} registrations/s ({batched / inline:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Login throughput of the password hasher for an increasing number of worker processes.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.password_hashing --logins 64
+"""
+
+import os
+import time
+import argparse
+
+from auth.encryption import PasswordHasher, hash_password
+
+
+def run(workers: int, logins: int, hashed_password: str) -> float:
+    hasher = PasswordHasher(workers=workers)
+    # warm-up, so process start-up time is not measured
+    hasher.is_correct_password("warm-up", hashed_password).result()
+
+    started_at = time.perf_counter()
+    verifications = [
+        hasher.is_correct_password("password", hashed_password) for _ in range(logins)
+    ]
+    for verification in verifications:
+        assert verification.result()
+    elapsed = time.perf_counter() - started_at
+
+    hasher.shutdown()
+    return logins / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    hashed_password = hash_password("password")
+
+    workers = 1
+    baseline = run(workers=0, logins=args.logins, hashed_password=hashed_password)
+    print(f"in-line       {baseline:8.2f} logins/s")
+    while workers <= args.max_workers:
+        throughput = run(
+            workers=workers, logins=args.logins, hashed_password=hashed_password
+        )
+        print(
+            f"{workers:3d} processes {throughput:8.2f} logins/s ({throughput / baseline:.2f}x)"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
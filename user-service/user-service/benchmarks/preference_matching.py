@@ -0,0 +1,236 @@
+"""
+Time to match a batch of availability slots against every active user preference, checking each
+(slot, preference) pair in Python against the vectorized 'PreferenceMatcher', and the time to load
+the matcher's arrays from the database.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.preference_matching --preferences 1000000 --slots 10000
+"""
+
+import os
+import time
+import uuid
+import random
+import tempfile
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Set
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from core.model import WeekDay
+from db.sqlite import Sqlite
+from user.matching import PreferenceMatcher, Slot, slot_time_mask
+from user.model import (
+    PreferredTimeSlot,
+    User,
+    UserPreference,
+    UserPreferenceWeekDay,
+    UserRole,
+)
+
+FIRST_DAY = date(2025, 1, 6)
+DAYS = 90
+# start times of the preferences and slots, every half hour from 8:00 to 18:00
+OPENING_MINUTES = list(range(8 * 60, 18 * 60, 30))
+
+
+def synthetic_matcher(preferences: int, rng: random.Random) -> PreferenceMatcher:
+    # NOTE: built straight from arrays, a million preferences take too long to insert for a benchmark
+    users = preferences // 2
+    start_days = np.array(
+        [FIRST_DAY.toordinal() + rng.randrange(DAYS) for _ in range(preferences)],
+        dtype=np.int32,
+    )
+    return PreferenceMatcher(
+        user_ids=[str(uuid.UUID(int=idx)) for idx in range(users)],
+        users=np.array(
+            [rng.randrange(users) for _ in range(preferences)], dtype=np.int32
+        ),
+        start_days=start_days,
+        end_days=start_days
+        + np.array([rng.randrange(7, 60) for _ in range(preferences)], dtype=np.int32),
+        weekdays=np.array(
+            [rng.randrange(1, 128) for _ in range(preferences)], dtype=np.uint8
+        ),
+        time_bits=np.array(
+            [
+                sum(1 << (minute // 30) for minute in rng.sample(OPENING_MINUTES, 3))
+                for _ in range(preferences)
+            ],
+            dtype=np.uint64,
+        ),
+    )
+
+
+def synthetic_slots(slots: int, rng: random.Random) -> List[Slot]:
+    found: List[Slot] = []
+    for _ in range(slots):
+        start_minute = rng.choice(OPENING_MINUTES)
+        found.append(
+            (
+                FIRST_DAY + timedelta(days=rng.randrange(DAYS)),
+                start_minute,
+                start_minute + rng.choice((30, 60)),
+            )
+        )
+    return found
+
+
+def match_pairwise(matcher: PreferenceMatcher, slots: List[Slot]) -> List[Set[int]]:
+    # NOTE: the columns as Python lists, indexing numpy arrays one item at a time is even slower
+    users, start_days, end_days = (
+        matcher.users.tolist(),
+        matcher.start_days.tolist(),
+        matcher.end_days.tolist(),
+    )
+    weekdays, time_bits = matcher.weekdays.tolist(), matcher.time_bits.tolist()
+    matches: List[Set[int]] = []
+    for day, start_minute, end_minute in slots:
+        ordinal, weekday = day.toordinal(), 1 << day.weekday()
+        mask = slot_time_mask(start_minute, end_minute)
+        matches.append(
+            {
+                users[idx]
+                for idx in range(len(users))
+                if start_days[idx] <= ordinal <= end_days[idx]
+                and weekdays[idx] & weekday
+                and time_bits[idx] & mask
+            }
+        )
+    return matches
+
+
+def seed(db: Sqlite, preferences: int, rng: random.Random) -> None:
+    now = datetime.now(timezone.utc)
+    timestamps = {"created_at": now, "updated_at": now}
+    with Session(db.engine) as session:
+        role_id = str(uuid.uuid4())
+        session.execute(
+            insert(UserRole), [{"id": role_id, "role": "patient", **timestamps}]
+        )
+        week_day_ids = [id for (id,) in session.query(WeekDay.id).order_by(WeekDay.id)]
+        if not week_day_ids:
+            week_day_ids = [str(uuid.uuid4()) for _ in range(7)]
+            session.execute(
+                insert(WeekDay),
+                [
+                    {"id": id, "name": name, **timestamps}
+                    for id, name in zip(
+                        week_day_ids,
+                        (
+                            "monday",
+                            "tuesday",
+                            "wednesday",
+                            "thursday",
+                            "friday",
+                            "saturday",
+                            "sunday",
+                        ),
+                    )
+                ],
+            )
+
+        user_ids = [str(uuid.uuid4()) for _ in range(preferences // 2)]
+        session.execute(
+            insert(User),
+            [
+                {
+                    "id": id,
+                    "first_name": "Joe",
+                    "last_name": f"Doe {idx}",
+                    "email": f"joeDoe{idx}@email.com",
+                    "password": "$2b$12$" + "x" * 53,
+                    "role_id": role_id,
+                    **timestamps,
+                }
+                for idx, id in enumerate(user_ids)
+            ],
+        )
+
+        rows, week_days, time_slots = [], [], []
+        for _ in range(preferences):
+            id = str(uuid.uuid4())
+            start_date = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+            rows.append(
+                {
+                    "id": id,
+                    "user_id": rng.choice(user_ids),
+                    "start_date": start_date,
+                    "end_date": start_date + timedelta(days=rng.randrange(7, 60)),
+                    "is_active": True,
+                    **timestamps,
+                }
+            )
+            week_days.extend(
+                {"user_preference_id": id, "week_day_id": week_day_id}
+                for week_day_id in rng.sample(week_day_ids, 3)
+            )
+            time_slots.extend(
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_preference_id": id,
+                    "start_time": (datetime.min + timedelta(minutes=minute)).time(),
+                    **timestamps,
+                }
+                for minute in rng.sample(OPENING_MINUTES, 3)
+            )
+        session.execute(insert(UserPreference), rows)
+        session.execute(insert(UserPreferenceWeekDay), week_days)
+        session.execute(insert(PreferredTimeSlot), time_slots)
+        session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preferences", type=int, default=1_000_000)
+    parser.add_argument("--slots", type=int, default=10_000)
+    # the pairwise check is sampled on this many slots, all of them would take hours
+    parser.add_argument("--pairwise-slots", type=int, default=20)
+    parser.add_argument("--db-preferences", type=int, default=100_000)
+    parser.add_argument("--directory", default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    matcher = synthetic_matcher(preferences=args.preferences, rng=rng)
+    slots = synthetic_slots(slots=args.slots, rng=rng)
+
+    started_at = time.perf_counter()
+    matches = matcher.match(slots)
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"vectorized {args.slots:6d} slots x {args.preferences} preferences "
+        f"{elapsed:8.3f} s ({elapsed / args.slots * 1_000_000:8.1f} us/slot)"
+    )
+
+    sample = slots[: args.pairwise_slots]
+    started_at = time.perf_counter()
+    pairwise = match_pairwise(matcher=matcher, slots=sample)
+    pairwise_elapsed = time.perf_counter() - started_at
+    assert pairwise == [set(users.tolist()) for users in matches[: len(sample)]]
+    print(
+        f"pairwise   {len(sample):6d} slots x {args.preferences} preferences "
+        f"{pairwise_elapsed:8.3f} s ({pairwise_elapsed / len(sample) * 1_000_000:8.1f} us/slot, "
+        f"{pairwise_elapsed / len(sample) / (elapsed / args.slots):.0f}x slower)"
+    )
+
+    if args.db_preferences <= 0:
+        return
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        db = Sqlite(db_path=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        seed(db=db, preferences=args.db_preferences, rng=rng)
+
+        with Session(db.read_engine) as session:
+            started_at = time.perf_counter()
+            loaded = PreferenceMatcher.load(session=session)
+            elapsed = time.perf_counter() - started_at
+        print(f"load       {len(loaded):7d} preferences from SQLite {elapsed:8.3f} s")
+
+        db.engine.dispose()
+        db.read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
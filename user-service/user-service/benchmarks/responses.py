@@ -0,0 +1,113 @@
+"""
+Response rendering throughput and memory allocated per response, generic 'MqttResponse.model_dump_json'
+against the serializer registry and the pre-rendered error frames.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.responses --responses 20000
+"""
+
+import time
+import argparse
+import tracemalloc
+from datetime import date
+from typing import Any, Callable, Dict
+
+from auth.schema import JwtValidationResult
+from core.schema import DayOfWeek
+from mqtt.schema import ErrorBody, MqttResponse, MqttStatus
+from mqtt.serializers import error_frame, response_serializers
+from user.schema import TimeSlotOutput, UserOutput, UserPreferenceOutput
+
+Render = Callable[[], bytes]
+
+
+def make_payloads() -> Dict[str, Any]:
+    return {
+        "UserOutput": UserOutput(
+            id="b6a1f0d4",
+            first_name="Jane",
+            last_name="Doe",
+            email="jane.doe@example.com",
+            role="patient",
+        ),
+        "List[UserPreferenceOutput]": [
+            UserPreferenceOutput(
+                id=f"preference-{idx}",
+                user_id="b6a1f0d4",
+                start_date=date(2024, 12, 1),
+                end_date=date(2024, 12, 31),
+                is_active=True,
+                days_of_week=[DayOfWeek.MONDAY, DayOfWeek.FRIDAY],
+                time_slots=[
+                    TimeSlotOutput(id=f"slot-{slot}", start_time=f"{8 + slot}:00")
+                    for slot in range(4)
+                ],
+            )
+            for idx in range(10)
+        ],
+        "JwtValidationResult": JwtValidationResult(is_valid=True, reason=""),
+    }
+
+
+def measure(render: Render, responses: int) -> str:
+    render()  # warm-up, so building the serializers is not measured
+
+    started_at = time.perf_counter()
+    rendered_bytes = 0
+    for _ in range(responses):
+        rendered_bytes += len(render())
+    elapsed = time.perf_counter() - started_at
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return f"{rendered_bytes / elapsed / 1e6:8.2f} MB/s {responses / elapsed:10.0f} responses/s {peak - baseline:7d} B allocated/response"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--responses", type=int, default=20000)
+    args = parser.parse_args()
+
+    cases: Dict[str, Dict[str, Render]] = dict()
+    for name, payload in make_payloads().items():
+        cases[name] = {
+            "before": lambda payload=payload: MqttResponse(
+                msgId="aabb", status=MqttStatus.STATUS_200_OK, data=payload
+            )
+            .model_dump_json()
+            .encode(),
+            "after": lambda payload=payload: response_serializers.render(
+                message_id="aabb", status_code=MqttStatus.STATUS_200_OK, payload=payload
+            ),
+        }
+    cases["Unauthorized error"] = {
+        "before": lambda: MqttResponse(
+            msgId="aabb",
+            status=MqttStatus.STATUS_401_UNAUTHORIZED,
+            data=ErrorBody(
+                message="Invalid email or password",
+                details="Invalid email or password",
+            ),
+        )
+        .model_dump_json()
+        .encode(),
+        "after": lambda: error_frame(
+            status_code=MqttStatus.STATUS_401_UNAUTHORIZED,
+            error_msg="Invalid email or password",
+            details="Invalid email or password",
+        ).render(message_id="aabb"),
+    }
+
+    for name, renders in cases.items():
+        print(name)
+        for label, render in renders.items():
+            print(f"  {label:6s} {measure(render=render, responses=args.responses)}")
+
+
+if __name__ == "__main__":
+    main()
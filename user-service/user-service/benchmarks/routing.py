@@ -0,0 +1,69 @@
+"""
+Route lookup cost of the router's segment trie against a linear 'match_route' scan,
+for an increasing number of registered routes.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.routing --lookups 20000
+"""
+
+import time
+import argparse
+from typing import Callable
+
+from mqtt.router import MqttRouter
+from mqtt.schema import HttpMethod
+
+
+def handler(*args) -> None:
+    pass
+
+
+def make_router(routes: int) -> MqttRouter:
+    router = MqttRouter()
+    for idx in range(routes):
+        router.register_route(HttpMethod.GET, f"/resource{idx}/:id", handler)
+        router.register_route(HttpMethod.GET, f"/resource{idx}/:id/items", handler)
+    return router
+
+
+def linear_scan(router: MqttRouter, path: str) -> None:
+    for saved_path in router.registered_routes[HttpMethod.GET]:
+        _, matches = router.match_route(requested_path=path, saved_path=saved_path)
+        if matches:
+            return
+
+
+def measure(lookup: Callable[[str], None], paths: list, lookups: int) -> float:
+    started_at = time.perf_counter()
+    for idx in range(lookups):
+        lookup(paths[idx % len(paths)])
+    return lookups / (time.perf_counter() - started_at)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    for routes in (10, 100, 250, 500):
+        router = make_router(routes=routes)
+        # spread the lookups over the whole table, the linear scan is fastest on the first routes
+        paths = [f"/resource{idx}/aabb/items" for idx in range(routes)]
+
+        scan = measure(
+            lambda path: linear_scan(router=router, path=path),
+            paths=paths,
+            lookups=args.lookups,
+        )
+        trie = measure(
+            lambda path: router.find_route(method=HttpMethod.GET, path=path),
+            paths=paths,
+            lookups=args.lookups,
+        )
+        print(
+            f"{routes * 2:5d} routes  linear {scan:10.0f} lookups/s  trie {trie:10.0f} lookups/s ({trie / scan:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Write and read throughput of the SQLite profiles ('db.engine.SQLITE_PROFILES'), with
+writer and reader threads sharing one engine the way the request handlers do.
+
+Run from the 'user-service' source directory:
+    python -m benchmarks.sqlite_profiles --writers 4 --readers 4 --seconds 5
+"""
+
+import os
+import time
+import random
+import tempfile
+import argparse
+import threading
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from db.engine import SQLITE_PROFILES
+from db.sqlite import Sqlite
+from user.model import User
+from user.schema import UserInput
+
+
+def add_user(session: Session, idx: str) -> User:
+    result = User.add_user(
+        session=session,
+        user=UserInput(
+            first_name="Joe",
+            last_name="Doe",
+            email=f"joeDoe{idx}@email.com",
+            role="patient",
+            password="password",
+        ),
+        hashed_password="hashed",
+    )
+    return result.unwrap()
+
+
+def run_threads(threads: int, seconds: float, operation: Callable[[int], None]) -> int:
+    deadline = time.monotonic() + seconds
+    counts = [0] * threads
+
+    def loop(thread_idx: int) -> None:
+        while time.monotonic() < deadline:
+            operation(thread_idx)
+            counts[thread_idx] += 1
+
+    workers = [
+        threading.Thread(target=loop, args=(thread_idx,))
+        for thread_idx in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts)
+
+
+def run(profile: str, writers: int, readers: int, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        db = Sqlite(
+            db_path=f"sqlite:///{os.path.join(directory, 'bench.db')}", profile=profile
+        )
+        with Session(db.engine) as session:
+            user_ids: List[str] = [
+                str(add_user(session=session, idx=f"seed-{idx}").id)
+                for idx in range(1000)
+            ]
+
+        written = [0] * writers
+
+        def write(thread_idx: int) -> None:
+            with Session(db.engine) as session:
+                add_user(session=session, idx=f"{thread_idx}-{written[thread_idx]}")
+            written[thread_idx] += 1
+
+        def read(thread_idx: int) -> None:
+            with Session(db.engine) as session:
+                User.get_user_by_id(
+                    session=session, id=random.choice(user_ids)
+                ).unwrap()
+
+        writes = run_threads(threads=writers, seconds=seconds, operation=write)
+        reads = run_threads(threads=readers, seconds=seconds, operation=read)
+
+        # both at the same time, which is where the journal mode matters most
+        mixed_writes, mixed_reads = [0], [0]
+        mixed = [
+            threading.Thread(
+                target=lambda: mixed_writes.__setitem__(
+                    0, run_threads(threads=writers, seconds=seconds, operation=write)
+                )
+            ),
+            threading.Thread(
+                target=lambda: mixed_reads.__setitem__(
+                    0, run_threads(threads=readers, seconds=seconds, operation=read)
+                )
+            ),
+        ]
+        for thread in mixed:
+            thread.start()
+        for thread in mixed:
+            thread.join()
+
+        db.engine.dispose()
+
+    print(
+        f"{profile:12s} writes {writes / seconds:8.1f}/s  reads {reads / seconds:8.1f}/s  "
+        f"mixed writes {mixed_writes[0] / seconds:8.1f}/s  mixed reads {mixed_reads[0] / seconds:8.1f}/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    for profile in SQLITE_PROFILES:
+        run(
+            profile=profile,
+            writers=args.writers,
+            readers=args.readers,
+            seconds=args.seconds,
+        )
+
+
+if __name__ == "__main__":
+    main()
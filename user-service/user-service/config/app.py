@@ -1,4 +1,6 @@
 import os
+import uuid
+import socket
 from dataclasses import dataclass
 
 
@@ -7,11 +9,22 @@ class AppConfig:
     ENV: str
     DB_PATH: str
     TEST_DB_PATH: str
+    DB_PROFILE: str
+    DB_WRITE_BATCH_SIZE: int
+    DB_WRITE_BATCH_DELAY_MS: float
     MQTT_BROKER: str
     MQTT_PORT: str
     JWT_SECRET: str
     JWT_ALGORITHM: str
     JWT_EXP_TIME: int
+    MQTT_RUNTIME: str
+    MQTT_SHARED_GROUP: str
+    INSTANCE_ID: str
+    WORKER_POOL_SIZE: int
+    RESPONSE_COMPRESSION: str
+    RESPONSE_COMPRESSION_THRESHOLD: int
+    PASSWORD_HASHER_WORKERS: int
+    PREFERENCE_MATCHER_MAX_AGE_S: float
 
     @classmethod
     def from_env(cls) -> "AppConfig":
@@ -19,6 +32,11 @@ class AppConfig:
             ENV=os.getenv("ENV", "dev"),
             TEST_DB_PATH="sqlite:///data/test.db",
             DB_PATH=os.getenv("DB_PATH", "sqlite:///data/main.db"),
+            DB_PROFILE=os.getenv("DB_PROFILE", "performance"),  # or 'default'
+            DB_WRITE_BATCH_SIZE=int(
+                os.getenv("DB_WRITE_BATCH_SIZE", 64)
+            ),  # 0 commits every write on the thread serving the request
+            DB_WRITE_BATCH_DELAY_MS=float(os.getenv("DB_WRITE_BATCH_DELAY_MS", 1)),
             MQTT_BROKER=os.getenv("MQTT_BROKER", "localhost"),
             MQTT_PORT=os.getenv("MQTT_BROKER_PORT", "1883"),
             JWT_SECRET=os.getenv("JWT_SECRET", ""),
@@ -26,6 +44,29 @@ class AppConfig:
             JWT_EXP_TIME=int(
                 os.getenv("JWT_EXP_TIME", 3600 * 12)
             ),  # default to 12 hours
+            MQTT_RUNTIME=os.getenv("MQTT_RUNTIME", "threaded"),  # or 'asyncio'
+            MQTT_SHARED_GROUP=os.getenv(
+                "MQTT_SHARED_GROUP", ""
+            ),  # non-empty runs the service as one of many replicas
+            INSTANCE_ID=os.getenv(
+                "INSTANCE_ID",
+                f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}",
+            ),
+            WORKER_POOL_SIZE=int(
+                os.getenv("WORKER_POOL_SIZE", 8)
+            ),  # 0 serves requests on the MQTT network thread
+            RESPONSE_COMPRESSION=os.getenv(
+                "RESPONSE_COMPRESSION", "zstd"
+            ),  # or 'gzip'
+            RESPONSE_COMPRESSION_THRESHOLD=int(
+                os.getenv("RESPONSE_COMPRESSION_THRESHOLD", 0)
+            ),  # in bytes, 0 never compresses responses
+            PASSWORD_HASHER_WORKERS=int(
+                os.getenv("PASSWORD_HASHER_WORKERS", os.cpu_count() or 1)
+            ),  # 0 hashes passwords on the thread serving the request
+            PREFERENCE_MATCHER_MAX_AGE_S=float(
+                os.getenv("PREFERENCE_MATCHER_MAX_AGE_S", 60)
+            ),  # preferences changed by other replicas are matched after at most this long
         )
 
     def get_db_path_from_current_environment(self) -> str:
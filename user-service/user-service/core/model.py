@@ -1,5 +1,5 @@
 from dataclasses import asdict
-from typing import Tuple
+from typing import Iterable, List, Optional, Tuple
 
 from sqlalchemy import Column, Enum
 from sqlalchemy.exc import IntegrityError
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from db.model import BaseModel
 from db.dataclasses import DbErrorType, DbResult
 from core.schema import DayOfWeek
+from core.reference_cache import ReferenceCache
 
 
 class WeekDay(BaseModel):
@@ -45,6 +46,33 @@ class WeekDay(BaseModel):
 
         return DbResult.as_success(data=(existing_week_day, created))
 
+    @classmethod
+    def get_or_add_many(
+        cls,
+        session: Session,
+        week_days: Iterable[DayOfWeek],
+        cache: Optional[ReferenceCache["WeekDay"]] = None,
+    ) -> List["WeekDay"]:
+        """
+        Looks all the week days up in one query (or in the 'cache', without any), the missing ones are only
+        added to the session (they are inserted with the rest of the caller's transaction, which commits them).
+        """
+
+        names = list(dict.fromkeys(week_day.value for week_day in week_days))
+        if cache is not None:
+            return cache.resolve(session=session, names=names)
+
+        existing_week_days = {
+            week_day.name: week_day
+            for week_day in session.query(cls).filter(cls.name.in_(names))
+        }
+        for name in names:
+            if name not in existing_week_days:
+                existing_week_days[name] = WeekDay(name=name)
+                session.add(existing_week_days[name])
+
+        return [existing_week_days[name] for name in names]
+
     @classmethod
     def add_week_day(cls, session: Session, week_day: DayOfWeek) -> DbResult["WeekDay"]:
         try:
@@ -0,0 +1,89 @@
+import base64
+import binascii
+from typing import Any, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import Column
+from sqlalchemy.orm import Query
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key: str) -> str:
+    # NOTE: opaque to the clients, so that the key the pages are sorted by can change without breaking them
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+class PageQuery(BaseModel):
+    # NOTE: without 'limit' nor 'cursor' the whole collection is sent in one response, as before
+    limit: Optional[int] = Field(default=None, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+    stream: bool = False
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, cursor: Optional[str]) -> Optional[str]:
+        if cursor is not None:
+            decode_cursor(cursor)
+        return cursor
+
+    def is_paginated(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+    def page_size(self) -> int:
+        return self.limit or DEFAULT_PAGE_SIZE
+
+    def after(self) -> Optional[str]:
+        return decode_cursor(self.cursor) if self.cursor is not None else None
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str]
+
+
+class Chunk(BaseModel, Generic[T]):
+    seq: int
+    last: bool
+    items: List[T]
+
+
+def keyset_page(
+    query: Query, key: Column, limit: int, after: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetches up to 'limit' rows that come after the 'after' key, sorted by the (indexed) 'key' column.
+
+    Unlike an offset, the cost of a page does not grow with how deep into the table it is.
+    One row more than asked is fetched to know whether there is a next page.
+    """
+
+    if after is not None:
+        query = query.filter(key > after)
+    rows = query.order_by(key).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(str(getattr(rows[-1], key.key)))
+
+
+def batched(rows: Iterable[T], size: int) -> Iterator[List[T]]:
+    batch: List[T] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,54 @@
+import threading
+from typing import Dict, Generic, Iterable, List, Type, TypeVar
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from db.model import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class ReferenceCache(Generic[M]):
+    """
+    In-process cache of a small reference table ('week_day', 'user_role'), resolving names to rows
+    without querying the table.
+
+    The names and IDs are loaded up-front and only reloaded when a name is missing,
+    names that are still missing then are added to the caller's session (and inserted with its transaction).
+    """
+
+    def __init__(self, model: Type[M], name_column: str) -> None:
+        self.model = model
+        self.name_column = name_column
+        self.ids: Dict[str, str] = dict()
+        self.lock = threading.Lock()
+
+    def load(self, session: Session) -> None:
+        # NOTE: through the caller's session, the writer's connection may be in the middle of a transaction
+        column = getattr(self.model, self.name_column)
+        ids = {
+            str(name): str(id)
+            for name, id in session.query(column, self.model.id).all()
+        }
+        with self.lock:
+            self.ids = ids
+
+    def resolve(self, session: Session, names: Iterable[str]) -> List[M]:
+        names = list(dict.fromkeys(names))
+        if any(name not in self.ids for name in names):
+            self.load(session)
+
+        rows: List[M] = []
+        for name in names:
+            id = self.ids.get(name, None)
+            if id is None:
+                row = self.model(**{self.name_column: name})
+                session.add(row)
+            else:
+                # NOTE: attached as an already persistent row, so the session neither loads nor inserts it
+                row = self.model(id=id, **{self.name_column: name})
+                make_transient_to_detached(row)
+                row = session.merge(row, load=False)
+            rows.append(row)
+
+        return rows
@@ -1,9 +1,10 @@
-from typing import TypeVar, Generic, Optional, Union
+from typing import Callable, TypeVar, Generic, Optional, Union
 from enum import Enum
 from dataclasses import dataclass
 
 
 T = TypeVar("T")
+U = TypeVar("U")
 
 
 class DbErrorType(Enum):
@@ -51,6 +52,11 @@ class DbResult(Generic[T]):
             return self.result.data
         raise ValueError("Unwrapping on error")
 
+    def map(self, fn: Callable[[T], U]) -> "DbResult[U]":
+        if isinstance(self.result, DbSuccess):
+            return DbResult.as_success(data=fn(self.result.data))
+        return DbResult(result=self.result)
+
     def unwrap_err(self) -> DbError:
         if isinstance(self.result, DbError):
             return self.result
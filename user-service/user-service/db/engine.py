@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+
+
+@dataclass(frozen=True)
+class SqliteProfile:
+    """
+    How SQLite connections are set up (applied to every new connection) and pooled.
+    """
+
+    journal_mode: str
+    synchronous: str
+    cache_size_kib: int
+    mmap_size_bytes: int
+    busy_timeout_ms: int
+    temp_store: str
+    pool_size: int
+    max_overflow: int
+
+    def pragmas(self, read_only: bool = False) -> List[str]:
+        # NOTE: the busy timeout goes first, switching the journal mode may have to wait for a lock
+        pragmas = [f"PRAGMA busy_timeout={self.busy_timeout_ms}"]
+        if not read_only:
+            # (read-only connections cannot switch it, they use whatever the writers set)
+            pragmas += [
+                f"PRAGMA journal_mode={self.journal_mode}",
+                f"PRAGMA synchronous={self.synchronous}",
+            ]
+        return pragmas + [
+            # NOTE: a negative cache size is in KiB rather than in pages
+            f"PRAGMA cache_size=-{self.cache_size_kib}",
+            f"PRAGMA mmap_size={self.mmap_size_bytes}",
+            f"PRAGMA temp_store={self.temp_store}",
+        ]
+
+
+SQLITE_PROFILES: Dict[str, SqliteProfile] = {
+    # SQLite's own defaults: rollback journal and an fsync on every commit
+    "default": SqliteProfile(
+        journal_mode="DELETE",
+        synchronous="FULL",
+        cache_size_kib=2000,
+        mmap_size_bytes=0,
+        busy_timeout_ms=5000,
+        temp_store="DEFAULT",
+        pool_size=5,
+        max_overflow=10,
+    ),
+    # WAL lets readers and the writer (of any process) work at the same time, and with
+    # 'synchronous=NORMAL' commits only fsync on checkpoints, which can lose the last
+    # transactions on power loss but never corrupts the database
+    "performance": SqliteProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size_kib=64 * 1024,
+        mmap_size_bytes=256 * 1024 * 1024,
+        busy_timeout_ms=30_000,
+        temp_store="MEMORY",
+        pool_size=10,
+        max_overflow=20,
+    ),
+}
+
+
+def is_in_memory(db_path: str) -> bool:
+    return make_url(db_path).database in (None, "", ":memory:")
+
+
+def create_sqlite_engine(
+    db_path: str,
+    profile: str = "performance",
+    echo: bool = False,
+    read_only: bool = False,
+) -> Engine:
+    """
+    With 'read_only' the connections are opened with 'mode=ro', so they can never take the write lock
+    (the database has to exist already, in-memory databases cannot be opened that way).
+    """
+
+    sqlite_profile = SQLITE_PROFILES.get(profile, None)
+    if sqlite_profile is None:
+        raise ValueError(
+            f"Unknown SQLite profile '{profile}', expected one of: {', '.join(SQLITE_PROFILES)}"
+        )
+
+    engine_args: Dict[str, Any] = dict()
+    if read_only:
+        if is_in_memory(db_path):
+            raise ValueError("In-memory databases cannot be opened read-only")
+        db_path = str(
+            make_url(db_path).set(
+                database=f"file:{make_url(db_path).database}",
+                query={"mode": "ro", "uri": "true"},
+            )
+        )
+
+    if not is_in_memory(db_path):
+        # NOTE: the handlers run on a thread pool, so keep a connection per handler thread around,
+        # reused last-in-first-out so that the page caches of the busiest connections stay warm
+        # (in-memory databases keep SQLAlchemy's single connection per thread pool instead)
+        engine_args.update(
+            pool_size=sqlite_profile.pool_size,
+            max_overflow=sqlite_profile.max_overflow,
+            pool_use_lifo=True,
+        )
+
+    engine = create_engine(url=db_path, echo=echo, **engine_args)
+
+    def on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_profile.pragmas(read_only=read_only):
+            cursor.execute(pragma)
+        cursor.close()
+
+    event.listen(engine, "connect", on_connect)
+    return engine
@@ -1,12 +1,42 @@
-from sqlalchemy import create_engine
+import os
 
-from db.model import BaseModel
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from db.engine import create_sqlite_engine, is_in_memory
+
+MIGRATIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+# NOTE: the revision matching the schema 'create_all' used to generate, before the migrations were managed
+INITIAL_REVISION = "05dd3dd81876"
 
 
 class Sqlite:
-    def __init__(self, db_path: str, echo=False) -> None:
-        self.engine = create_engine(url=db_path, echo=echo)
-        self._generate_schema()
+    def __init__(self, db_path: str, echo=False, profile="performance") -> None:
+        # NOTE: see 'db.engine.SQLITE_PROFILES' for what each profile sets up
+        self.engine = create_sqlite_engine(db_path=db_path, profile=profile, echo=echo)
+        self.migrate()
+        # NOTE: read-only routes get connections from a pool of their own, so they never wait behind
+        # the writers for a connection (and with WAL, never for the database either)
+        self.read_engine = (
+            self.engine
+            if is_in_memory(db_path)
+            else create_sqlite_engine(
+                db_path=db_path, profile=profile, echo=echo, read_only=True
+            )
+        )
+
+    def migrate(self, revision: str = "head") -> None:
+        config = Config()
+        config.set_main_option("script_location", MIGRATIONS_PATH)
+
+        with self.engine.begin() as connection:
+            config.attributes["connection"] = connection
+
+            # databases created before the migrations existed have the initial schema,
+            # but no record of it
+            tables = inspect(connection).get_table_names()
+            if tables and "alembic_version" not in tables:
+                command.stamp(config, INITIAL_REVISION)
 
-    def _generate_schema(self) -> None:
-        BaseModel.metadata.create_all(self.engine)
+            command.upgrade(config, revision)
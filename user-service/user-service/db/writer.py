@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+WriteUnit = Callable[[Session], T]
+
+
+class GroupCommitWriter:
+    """
+    Runs the writes of every handler on a single thread and commits them together, in batches of up to
+    'max_batch_size' units collected for at most 'max_delay_seconds', so a burst of writes pays for one
+    commit (and one fsync) per batch instead of one per write.
+
+    Each unit gets its own session, in its own SAVEPOINT: the commits and rollbacks of the model methods only
+    reach that savepoint, and a unit that raises is rolled back without undoing the rest of the batch.
+    The future of a unit is resolved once its batch is committed.
+    Sessions do not expire their objects on commit, a unit builds its result from what it just wrote.
+
+    With 'max_batch_size' set to 0 every unit is run and committed in-line and an already resolved future is returned.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_batch_size: int = 64,
+        max_delay_seconds: float = 0.001,
+    ) -> None:
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_delay_seconds = max_delay_seconds
+        self.queue: "queue.Queue[Optional[Tuple[Future, WriteUnit]]]" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        if self.max_batch_size > 0:
+            self.thread = threading.Thread(
+                target=self._run, name="group-commit-writer", daemon=True
+            )
+            self.thread.start()
+
+    def submit(self, unit: WriteUnit[T]) -> "Future[T]":
+        future: Future[T] = Future()
+        if self.thread is not None:
+            self.queue.put((future, unit))
+            return future
+
+        try:
+            with Session(self.engine, expire_on_commit=False) as session:
+                future.set_result(unit(session))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self.thread is not None:
+            # NOTE: the units queued before are still committed
+            self.queue.put(None)
+            if wait:
+                self.thread.join()
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay_seconds
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopped = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+
+    def _commit(self, batch: List[Tuple[Future, WriteUnit]]) -> None:
+        outcomes: List[Tuple[Future, bool, Any]] = []
+        try:
+            with self.engine.connect() as connection:
+                if connection.dialect.name == "sqlite":
+                    # NOTE: the driver only begins a transaction before DML, a SAVEPOINT outside of one
+                    # would be committed as soon as it is released (and IMMEDIATE takes the write lock up-front)
+                    connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+                for future, unit in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+
+                    savepoint = connection.begin_nested()
+                    try:
+                        with Session(
+                            bind=connection,
+                            join_transaction_mode="create_savepoint",
+                            expire_on_commit=False,
+                        ) as session:
+                            outcomes.append((future, True, unit(session)))
+                        savepoint.commit()
+                    except Exception as e:
+                        savepoint.rollback()
+                        outcomes.append((future, False, e))
+
+                connection.commit()
+        except Exception as e:
+            for future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, succeeded, outcome in outcomes:
+            if succeeded:
+                future.set_result(outcome)
+            else:
+                future.set_exception(outcome)
@@ -1,3 +1,7 @@
+import signal
+import argparse
+import dataclasses
+
 from dotenv import load_dotenv
 
 from logger.loguru import Loguru
@@ -8,14 +12,30 @@ from user.router import UserMqttRouter
 from user.service import UserService
 
 from db.sqlite import Sqlite
+from db.writer import GroupCommitWriter
 
+from auth.encryption import PasswordHasher
 
-def main():
-    load_dotenv()
+from process.supervisor import WorkerSupervisor
 
-    app_config = AppConfig.from_env()
 
-    db = Sqlite(db_path=app_config.get_db_path_from_current_environment())
+def serve(worker_idx: int, app_config: AppConfig) -> None:
+    # NOTE: the supervisor stops workers with SIGTERM, let it unwind the same way as Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    app_config = dataclasses.replace(
+        app_config, INSTANCE_ID=f"{app_config.INSTANCE_ID}-{worker_idx}"
+    )
+
+    db = Sqlite(
+        db_path=app_config.get_db_path_from_current_environment(),
+        profile=app_config.DB_PROFILE,
+    )
+    password_hasher = PasswordHasher(workers=app_config.PASSWORD_HASHER_WORKERS)
+    writer = GroupCommitWriter(
+        engine=db.engine,
+        max_batch_size=app_config.DB_WRITE_BATCH_SIZE,
+        max_delay_seconds=app_config.DB_WRITE_BATCH_DELAY_MS / 1000,
+    )
 
     user_service = UserService(logger=Loguru(), app_config=app_config)
     user_service.mount_router(
@@ -23,9 +43,54 @@ def main():
         router=UserMqttRouter(
             app_config=app_config,
             database=db,
+            password_hasher=password_hasher,
+            writer=writer,
+        ),
+    )
+    try:
+        user_service.listen_and_serve()
+    finally:
+        password_hasher.shutdown()
+        writer.shutdown()
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="User Service")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes, each serving requests with its own MQTT client and database engine",
+    )
+    args = parser.parse_args()
+
+    app_config = AppConfig.from_env()
+    if args.workers <= 1:
+        serve(worker_idx=0, app_config=app_config)
+        return
+
+    # NOTE: migrate the schema once, before the workers race each other doing it
+    Sqlite(
+        db_path=app_config.get_db_path_from_current_environment(),
+        profile=app_config.DB_PROFILE,
+    ).engine.dispose()
+
+    app_config = dataclasses.replace(
+        app_config,
+        # NOTE: the workers split the requests between them through a shared subscription
+        MQTT_SHARED_GROUP=app_config.MQTT_SHARED_GROUP or "user-service",
+        # NOTE: the cores are already shared between the workers
+        PASSWORD_HASHER_WORKERS=(
+            max(1, app_config.PASSWORD_HASHER_WORKERS // args.workers)
+            if app_config.PASSWORD_HASHER_WORKERS > 0
+            else 0
         ),
     )
-    user_service.listen_and_serve()
+    WorkerSupervisor(
+        target=serve, workers=args.workers, logger=Loguru(), args=(app_config,)
+    ).run()
 
 
 if __name__ == "__main__":
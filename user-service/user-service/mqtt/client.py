@@ -1,4 +1,5 @@
 import json
+import base64
 import time
 from typing import Callable, Dict, Any, Set, Optional, List
 
@@ -7,27 +8,51 @@ from paho.mqtt.properties import Properties
 from paho.mqtt.reasoncodes import ReasonCode
 from paho.mqtt.enums import MQTTErrorCode, CallbackAPIVersion
 
-from mqtt.schema import ErrorBody, MqttResponse, MqttStatus
+from mqtt.schema import Compression, MqttResponse, MqttStatus
+from mqtt.codec import JSON, Codec, current_codec, publish_properties
+from mqtt.compression import decompress
+from mqtt.serializers import error_frame, response_serializers
 from logger.protocol import LoggerProto
 
 
 class MqttClient:
-    def __init__(self, broker_uri: str, client_id: str, logger: LoggerProto) -> None:
-        self.client = paho_mqtt.Client(
-            callback_api_version=CallbackAPIVersion.VERSION2,
-            client_id=client_id,
-            clean_session=False,
-        )
+    def __init__(
+        self,
+        broker_uri: str,
+        client_id: str,
+        logger: LoggerProto,
+        broker_port: int = 1883,
+        protocol: paho_mqtt.MQTTProtocolVersion = paho_mqtt.MQTTv311,
+    ) -> None:
+        if protocol == paho_mqtt.MQTTv5:
+            # NOTE: MQTT v5 has no 'clean_session', the session is resumed by default on reconnect
+            self.client = paho_mqtt.Client(
+                callback_api_version=CallbackAPIVersion.VERSION2,
+                client_id=client_id,
+                protocol=protocol,
+            )
+        else:
+            self.client = paho_mqtt.Client(
+                callback_api_version=CallbackAPIVersion.VERSION2,
+                client_id=client_id,
+                clean_session=False,
+            )
         self.client.on_subscribe = self._on_subscribe
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
 
         self.broker_uri = broker_uri
+        self.broker_port = broker_port
         self.logger = logger
         self.subscribed_topics: Set[str] = set()
         self.disconnected = False
         self.is_user_interrupt = False
 
+    @staticmethod
+    def shared_topic(topic: str, group: str) -> str:
+        # NOTE: the broker delivers each message on a shared subscription to only one member of the group
+        return f"$share/{group}/{topic}"
+
     @staticmethod
     def send_error_response(
         client: paho_mqtt.Client,
@@ -37,15 +62,14 @@ class MqttClient:
         error_msg: str,
         details: str,
     ) -> None:
-        MqttClient.send_response(
-            client=client,
-            origin_topic=origin_topic,
-            message_id=message_id,
-            status_code=status_code,
-            payload=ErrorBody(
-                message=error_msg,
-                details=details,
-            ),
+        frame = error_frame(
+            status_code=status_code, error_msg=error_msg, details=details
+        )
+        codec = current_codec.get()
+        client.publish(
+            topic=origin_topic.replace("/req", "/res"),
+            payload=frame.render(message_id=message_id, codec=codec),
+            properties=publish_properties(client=client, codec=codec),
         )
 
     @staticmethod
@@ -57,13 +81,35 @@ class MqttClient:
         payload: Any,
     ) -> None:
         destination_topic = origin_topic.replace("/req", "/res")
-        response = MqttResponse(msgId=message_id, status=status_code, data=payload)
-        client.publish(topic=destination_topic, payload=response.model_dump_json())
+        codec = current_codec.get()
+        client.publish(
+            topic=destination_topic,
+            payload=response_serializers.render(
+                message_id=message_id,
+                status_code=status_code,
+                payload=payload,
+                codec=codec,
+            ),
+            properties=publish_properties(client=client, codec=codec),
+        )
+
+    @staticmethod
+    def decode_response(payload: bytes, codec: Codec = JSON) -> MqttResponse[Any]:
+        response = codec.decode(payload)
+        compression = response.pop("compression", None)
+        if compression is not None:
+            compressed = response["data"]
+            if codec is JSON:
+                compressed = base64.b64decode(compressed)
+            response["data"] = codec.decode(
+                decompress(compression=Compression(compression), data=compressed)
+            )
+        return MqttResponse[Any].model_validate(response)
 
     def retry_connect(self, retries=5, delay_seconds=5) -> bool:
         for conn_attempt in range(1, retries + 1):
             try:
-                error_code: MQTTErrorCode = self.client.connect(self.broker_uri)
+                error_code: MQTTErrorCode = self.client.connect(self.broker_uri, self.broker_port)
                 if error_code == paho_mqtt.MQTT_ERR_SUCCESS:
                     self.logger.info(
                         message=f"Connected to the broker: {self.broker_uri}"
@@ -104,6 +150,10 @@ class MqttClient:
             self.logger.info(message=f"MQTT connection clean-up")
             self.client.disconnect()
 
+    def stop(self) -> None:
+        self.is_user_interrupt = True
+        self.client.disconnect()
+
     def publish(self, topic: str, message: Dict[str, Any]) -> None:
         try:
             self.logger.info(f"Publishing on topic '{topic}', message '{message}'")
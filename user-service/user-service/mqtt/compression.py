@@ -0,0 +1,46 @@
+import gzip
+from typing import Callable, Dict, Optional
+
+import zstandard
+
+from mqtt.schema import Compression
+
+COMPRESSORS: Dict[Compression, Callable[[bytes], bytes]] = {
+    Compression.GZIP: lambda data: gzip.compress(data, compresslevel=6),
+    Compression.ZSTD: lambda data: zstandard.compress(data, 3),
+}
+DECOMPRESSORS: Dict[Compression, Callable[[bytes], bytes]] = {
+    Compression.GZIP: gzip.decompress,
+    Compression.ZSTD: zstandard.decompress,
+}
+
+
+class ResponseCompression:
+    """
+    Compresses response payloads once their (encoded) size reaches 'threshold_bytes'.
+    Smaller payloads are sent as they are, compressing them costs more than it saves.
+    """
+
+    def __init__(self, compression: Compression, threshold_bytes: int) -> None:
+        self.compression = compression
+        self.threshold_bytes = threshold_bytes
+        self.compress = COMPRESSORS[compression]
+
+    @staticmethod
+    def from_config(
+        compression: str, threshold_bytes: int
+    ) -> Optional["ResponseCompression"]:
+        # NOTE: a threshold of 0 disables the compression
+        if threshold_bytes <= 0:
+            return None
+        return ResponseCompression(
+            compression=Compression(compression.lower()),
+            threshold_bytes=threshold_bytes,
+        )
+
+    def should_compress(self, data: bytes) -> bool:
+        return len(data) >= self.threshold_bytes
+
+
+def decompress(compression: Compression, data: bytes) -> bytes:
+    return DECOMPRESSORS[compression](data)
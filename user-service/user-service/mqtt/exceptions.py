@@ -86,6 +86,18 @@ class MqttUnauthorized(MqttException):
         )
 
 
+class MqttInternalError(MqttException):
+    def __init__(self, client, topic: str, message_id: str, details: str) -> None:
+        super().__init__(
+            client=client,
+            topic=topic,
+            message_id=message_id,
+            status_code=MqttStatus.STATUS_500_INTERNAL_ERROR,
+            error_msg="Internal server error",
+            details=details,
+        )
+
+
 class MqttParametersNotFound(MqttException):
     def __init__(
         self, client, topic: str, message_id: str, error_msg: str, details: str
@@ -1,5 +1,10 @@
-import json
+import asyncio
+import inspect
+import contextvars
+import functools
 from collections import defaultdict
+from dataclasses import dataclass
+from concurrent.futures import Executor
 from typing import (
     Callable,
     Protocol,
@@ -9,11 +14,16 @@ from typing import (
     Optional,
     Any,
     Tuple,
+    Union,
+    Awaitable,
+    List,
 )
 
 from paho.mqtt.client import Client, MQTTMessage
+from pydantic import TypeAdapter
 
-from mqtt.schema import MqttRequest, HttpMethod
+from mqtt.codec import JSON, codec_of, current_codec
+from mqtt.schema import MqttRequest, MqttRequestHeader, HttpMethod, RouteAccess
 from mqtt.exceptions import (
     MqttInvalidDataFormat,
     MqttHandlerNotFoundForMethod,
@@ -25,62 +35,247 @@ Params: TypeAlias = Dict[str, str]
 MessageHandler: TypeAlias = Callable[
     [Client, Any, MQTTMessage, Optional[Params], MqttRequest[Any]], None
 ]
+AsyncMessageHandler: TypeAlias = Callable[
+    [Client, Any, MQTTMessage, Optional[Params], MqttRequest[Any]], Awaitable[None]
+]
+AnyMessageHandler: TypeAlias = Union[MessageHandler, AsyncMessageHandler]
+
+# NOTE: set by the router for every request, so that the handler can pick the database connections
+# matching how its route was registered
+current_route_access: contextvars.ContextVar[RouteAccess] = contextvars.ContextVar(
+    "current_route_access", default=RouteAccess.WRITE
+)
 
 
 class MqttRouterProto(Protocol):
     def serve(self, client, userdata, msg) -> None:
         pass
 
+    async def serve_async(self, client, userdata, msg, executor=None) -> None:
+        pass
+
+
+def as_async_handler(
+    handler: AnyMessageHandler, executor: Optional[Executor] = None
+) -> AsyncMessageHandler:
+    """
+    Adapts a regular (blocking) handler, so it can be awaited in the asyncio runtime.
+    The handler is run on the given executor (the loop's default one when not provided).
+    """
+    if inspect.iscoroutinefunction(handler):
+        return handler
+
+    async def adapter(
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[Any],
+    ) -> None:
+        context = contextvars.copy_context()
+        await asyncio.get_running_loop().run_in_executor(
+            executor, context.run, handler, client, userdata, msg, params, payload
+        )
+
+    return adapter
+
+
+@functools.lru_cache(maxsize=None)
+def request_adapter(body: Any) -> TypeAdapter:
+    # NOTE: building a validator is expensive, so there is one per body schema
+    return TypeAdapter(MqttRequest[body])
+
+
+@dataclass(frozen=True)
+class Route:
+    handler: AnyMessageHandler
+    # validates the routed request, body included, from the decoded payload
+    request_adapter: TypeAdapter
+    access: RouteAccess = RouteAccess.WRITE
+
+
+class RouteNode:
+    """
+    One segment of the registered paths, the routes of a method form a trie of those.
+
+    Static segments are tried before parameters, so '/users/preferences' wins over '/users/:id'
+    no matter in which order the routes were registered.
+    """
+
+    def __init__(self) -> None:
+        self.static_children: Dict[str, "RouteNode"] = dict()
+        self.param_child: Optional["RouteNode"] = None
+        # route and the names of the parameters along the path, set on the last segment
+        self.route: Optional[Tuple[Route, Tuple[str, ...]]] = None
+
+    def insert(self, segments: List[str], route: Route) -> None:
+        node = self
+        param_names: List[str] = []
+        for segment in segments:
+            if segment.startswith(":"):
+                param_names.append(segment[1:])
+                if node.param_child is None:
+                    node.param_child = RouteNode()
+                node = node.param_child
+            else:
+                node = node.static_children.setdefault(segment, RouteNode())
+        node.route = (route, tuple(param_names))
+
+    def lookup(
+        self, segments: List[str], idx: int = 0, values: Optional[List[str]] = None
+    ) -> Optional[Tuple[Route, Params]]:
+        values = [] if values is None else values
+        if idx == len(segments):
+            if self.route is None:
+                return None
+            route, param_names = self.route
+            return route, dict(zip(param_names, values))
+
+        segment = segments[idx]
+        static_child = self.static_children.get(segment, None)
+        if static_child is not None:
+            found = static_child.lookup(segments=segments, idx=idx + 1, values=values)
+            if found is not None:
+                return found
+
+        # NOTE: fall back to the parameter, e.g. '/users/preferences/roles' for '/users/:id/roles'
+        if self.param_child is not None:
+            values.append(segment)
+            found = self.param_child.lookup(
+                segments=segments, idx=idx + 1, values=values
+            )
+            if found is not None:
+                return found
+            values.pop()
+
+        return None
+
 
 class MqttRouter:
     def __init__(self) -> None:
-        self.registered_routes: DefaultDict[HttpMethod, Dict[Path, MessageHandler]] = (
-            defaultdict(dict)
-        )
+        self.registered_routes: DefaultDict[
+            HttpMethod, Dict[Path, AnyMessageHandler]
+        ] = defaultdict(dict)
+        self.route_trees: DefaultDict[HttpMethod, RouteNode] = defaultdict(RouteNode)
 
     def register_route(
-        self, method: HttpMethod, path: Path, handler: MessageHandler
+        self,
+        method: HttpMethod,
+        path: Path,
+        handler: AnyMessageHandler,
+        body: Any = Any,
+        access: Optional[RouteAccess] = None,
     ) -> None:
+        """
+        'body' is the schema of the request's 'data', the handler then receives an already
+        validated 'MqttRequest[body]' (requests that do not match are answered with a 400).
+
+        'access' tells whether the handler only reads ('GET' routes by default) or also writes.
+        """
+        if access is None:
+            access = RouteAccess.READ if method == HttpMethod.GET else RouteAccess.WRITE
+
         self.registered_routes[method][path] = handler
+        self.route_trees[method].insert(
+            segments=path.split("/"),
+            route=Route(
+                handler=handler, request_adapter=request_adapter(body), access=access
+            ),
+        )
+
+    def find_route(
+        self, method: HttpMethod, path: Path
+    ) -> Optional[Tuple[Route, Params]]:
+        route_tree = self.route_trees.get(method, None)
+        if route_tree is None:
+            return None
+        return route_tree.lookup(segments=path.split("/"))
 
     def serve(self, client: Client, userdata: Any, msg: MQTTMessage) -> None:
+        resolved = self.resolve(client=client, msg=msg)
+        if resolved is None:
+            return
+
+        handler, params, mqtt_request = resolved
+        if inspect.iscoroutinefunction(handler):
+            asyncio.run(handler(client, userdata, msg, params, mqtt_request))
+        else:
+            handler(client, userdata, msg, params, mqtt_request)
+
+    async def serve_async(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        resolved = self.resolve(client=client, msg=msg)
+        if resolved is None:
+            return
+
+        handler, params, mqtt_request = resolved
+        await as_async_handler(handler=handler, executor=executor)(
+            client, userdata, msg, params, mqtt_request
+        )
+
+    def resolve(
+        self, client: Client, msg: MQTTMessage
+    ) -> Optional[Tuple[AnyMessageHandler, Optional[Params], MqttRequest[Any]]]:
         response_topic = msg.topic.replace("/req", "/res")
+        codec = codec_of(msg)
+        current_codec.set(codec)
+
+        # NOTE: the payload is parsed once, the body is then validated (from what was parsed)
+        # against the schema of the route only, so that body errors can still report 'msgId'
         try:
-            mqtt_request = MqttRequest[Any](**json.loads(msg.payload.decode()))
+            if codec is JSON:
+                header = MqttRequestHeader.model_validate_json(msg.payload)
+            else:
+                header = MqttRequestHeader.model_validate(codec.decode(msg.payload))
         except Exception as e:
             MqttInvalidDataFormat(client=client, topic=response_topic, details=str(e))
-            return
+            return None
 
-        path_handlers = self.registered_routes.get(mqtt_request.method, None)
-        if path_handlers is None:
+        if header.method not in self.route_trees:
             MqttHandlerNotFoundForMethod(
                 client=client,
                 topic=response_topic,
-                message_id=mqtt_request.msgId,
-                method=mqtt_request.method,
+                message_id=header.msgId,
+                method=header.method,
             )
-            return
+            return None
 
-        for path, handler in path_handlers.items():
-            params, matches = self.match_route(
-                requested_path=mqtt_request.path,
-                saved_path=path,
+        found = self.find_route(method=header.method, path=header.path)
+        if found is None:
+            MqttHandlerNotFoundForMethodAndPath(
+                client=client,
+                topic=response_topic,
+                message_id=header.msgId,
+                method=header.method,
+                path=header.path,
             )
-            if matches and handler is not None:
-                handler(client, userdata, msg, params, mqtt_request)
-                return
-
-        MqttHandlerNotFoundForMethodAndPath(
-            client=client,
-            topic=response_topic,
-            message_id=mqtt_request.msgId,
-            method=mqtt_request.method,
-            path=mqtt_request.path,
-        )
+            return None
+
+        route, params = found
+        current_route_access.set(route.access)
+        try:
+            mqtt_request = route.request_adapter.validate_python(header.request())
+        except Exception as e:
+            MqttInvalidDataFormat(
+                client=client,
+                topic=response_topic,
+                message_id=header.msgId,
+                details=str(e),
+            )
+            return None
+
+        return route.handler, params, mqtt_request
 
     def match_route(
         self, requested_path: Path, saved_path: Path
     ) -> Tuple[Optional[Params], bool]:
+        # NOTE: not used to serve requests anymore ('find_route' is), kept as the reference
+        # behaviour the route trie is checked against
         requested_path_segmented = requested_path.split("/")
         saved_path_segmented = saved_path.split("/")
 
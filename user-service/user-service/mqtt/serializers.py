@@ -0,0 +1,162 @@
+import base64
+import functools
+import threading
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import SchemaSerializer, to_json
+
+from mqtt.codec import JSON, Codec
+from mqtt.compression import ResponseCompression
+from mqtt.schema import ErrorBody, MqttStatus
+
+# NOTE: the response envelope is the same for every response, so it is rendered once
+# and only the message ID and the payload are serialized per response
+MESSAGE_ID_SEGMENT = b'{"msgId":'
+STATUS_SEGMENTS: Dict[MqttStatus, bytes] = {
+    status: b',"status":' + to_json(status.value) + b',"data":' for status in MqttStatus
+}
+END_SEGMENT = b"}"
+
+
+def payload_type_of(payload: Any) -> Any:
+    if isinstance(payload, BaseModel):
+        return type(payload)
+    if isinstance(payload, list) and payload and isinstance(payload[0], BaseModel):
+        return List[type(payload[0])]  # type: ignore[misc]
+    return Any
+
+
+class ResponseSerializers:
+    """
+    Registry of payload serializers keyed by payload type ('UserOutput', 'List[UserPreferenceOutput]', ...).
+
+    Serializers are built the first time a payload type is seen (or when registered up-front),
+    every later response of that type reuses the compiled serializer.
+    """
+
+    def __init__(self) -> None:
+        self.serializers: Dict[Any, SchemaSerializer] = dict()
+        self.lock = threading.Lock()
+        self.compression: Optional[ResponseCompression] = None
+
+    def configure_compression(self, compression: Optional[ResponseCompression]) -> None:
+        self.compression = compression
+
+    def register(self, payload_type: Any) -> SchemaSerializer:
+        serializer = self.serializers.get(payload_type, None)
+        if serializer is not None:
+            return serializer
+
+        with self.lock:
+            return self.serializers.setdefault(
+                payload_type, TypeAdapter(payload_type).serializer
+            )
+
+    def render(
+        self,
+        message_id: str,
+        status_code: MqttStatus,
+        payload: Any,
+        codec: Codec = JSON,
+    ) -> bytes:
+        serializer = self.register(payload_type_of(payload))
+        if codec is not JSON:
+            data = serializer.to_python(payload, mode="json")
+            if self.compression is not None:
+                encoded_data = codec.encode(data)
+                if self.compression.should_compress(encoded_data):
+                    return self._render_compressed(
+                        message_id=message_id,
+                        status_code=status_code,
+                        encoded_data=encoded_data,
+                        codec=codec,
+                    )
+
+            return codec.encode(
+                {"msgId": message_id, "status": status_code.value, "data": data}
+            )
+
+        encoded_data = serializer.to_json(payload)
+        if self.compression is not None and self.compression.should_compress(
+            encoded_data
+        ):
+            return self._render_compressed(
+                message_id=message_id,
+                status_code=status_code,
+                encoded_data=encoded_data,
+                codec=codec,
+            )
+
+        return b"".join(
+            (
+                MESSAGE_ID_SEGMENT,
+                to_json(message_id),
+                STATUS_SEGMENTS[status_code],
+                encoded_data,
+                END_SEGMENT,
+            )
+        )
+
+    def _render_compressed(
+        self,
+        message_id: str,
+        status_code: MqttStatus,
+        encoded_data: bytes,
+        codec: Codec,
+    ) -> bytes:
+        assert self.compression is not None
+
+        # NOTE: 'data' holds the compressed, encoded payload and 'compression' tells how to get it back,
+        # JSON has no bytes so there it is base64 encoded
+        compressed = self.compression.compress(encoded_data)
+        return codec.encode(
+            {
+                "msgId": message_id,
+                "status": status_code.value,
+                "compression": self.compression.compression.value,
+                "data": (
+                    base64.b64encode(compressed).decode()
+                    if codec is JSON
+                    else compressed
+                ),
+            }
+        )
+
+
+response_serializers = ResponseSerializers()
+
+
+class ErrorFrame:
+    """
+    Error response rendered once, only the message ID is filled in when it is sent.
+    """
+
+    def __init__(self, status_code: MqttStatus, error_msg: str, details: str) -> None:
+        self.status_code = status_code
+        self.body = {"message": error_msg, "details": details}
+        self.suffix = b"".join(
+            (
+                STATUS_SEGMENTS[status_code],
+                to_json(ErrorBody(message=error_msg, details=details)),
+                END_SEGMENT,
+            )
+        )
+
+    def render(self, message_id: str, codec: Codec = JSON) -> bytes:
+        if codec is not JSON:
+            return codec.encode(
+                {
+                    "msgId": message_id,
+                    "status": self.status_code.value,
+                    "data": self.body,
+                }
+            )
+
+        return MESSAGE_ID_SEGMENT + to_json(message_id) + self.suffix
+
+
+# NOTE: bounded, since some errors carry details that change with every request
+@functools.lru_cache(maxsize=256)
+def error_frame(status_code: MqttStatus, error_msg: str, details: str) -> ErrorFrame:
+    return ErrorFrame(status_code=status_code, error_msg=error_msg, details=details)
@@ -0,0 +1,60 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from paho.mqtt.client import Client, MQTTMessage
+
+from logger.protocol import LoggerProto
+
+MessageCallback = Callable[..., None]
+
+
+class MqttWorkerPool:
+    """
+    Runs message callbacks away from the paho network thread.
+
+    With 'size' set to 0 the callbacks are executed in-line (the paho network thread),
+    which is the same as not using the pool at all.
+    """
+
+    def __init__(
+        self, size: int, logger: LoggerProto, thread_name_prefix: str = "mqtt-worker"
+    ) -> None:
+        self.size = size
+        self.logger = logger
+        self.executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=size, thread_name_prefix=thread_name_prefix)
+            if size > 0
+            else None
+        )
+
+    def submit(
+        self,
+        callback: MessageCallback,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+    ) -> None:
+        if self.executor is None:
+            callback(client=client, userdata=userdata, msg=msg)
+            return
+
+        future = self.executor.submit(
+            callback, client=client, userdata=userdata, msg=msg
+        )
+        future.add_done_callback(
+            lambda f: self._log_unhandled_error(future=f, topic=msg.topic)
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _log_unhandled_error(self, future: Future, topic: str) -> None:
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            self.logger.error(
+                message=f"Unhandled error while serving message on topic '{topic}': {error}"
+            )
@@ -0,0 +1,114 @@
+import time
+import signal
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Dict, Tuple
+
+from logger.protocol import LoggerProto
+
+WorkerTarget = Callable[..., None]
+
+
+class WorkerSupervisor:
+    """
+    Runs 'workers' copies of the service, each in its own process, and restarts
+    any worker that exits until the supervisor itself is stopped (SIGINT, SIGTERM or 'stop').
+
+    Every worker is started as 'target(worker_idx, *args)', so everything it needs
+    (MQTT client, database engine, ...) has to be created inside the worker.
+    """
+
+    def __init__(
+        self,
+        target: WorkerTarget,
+        workers: int,
+        logger: LoggerProto,
+        args: Tuple[Any, ...] = (),
+        restart_delay_seconds: float = 1.0,
+        shutdown_timeout_seconds: float = 10.0,
+    ) -> None:
+        self.target = target
+        self.workers = workers
+        self.logger = logger
+        self.args = args
+        self.restart_delay_seconds = restart_delay_seconds
+        self.shutdown_timeout_seconds = shutdown_timeout_seconds
+        # NOTE: 'spawn' so that workers start from a clean interpreter instead of
+        # inheriting the supervisor's state (loggers, open files, ...)
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: Dict[int, BaseProcess] = dict()
+        self.pending_restarts: Dict[int, float] = dict()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+
+        try:
+            for worker_idx in range(self.workers):
+                self._start_worker(worker_idx)
+
+            while not self.stopped.is_set():
+                self._supervise()
+        except KeyboardInterrupt:
+            self.logger.info(message="Supervisor stopped by user")
+        finally:
+            self._stop_workers()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def _supervise(self) -> None:
+        now = time.monotonic()
+        for worker_idx, restart_at in list(self.pending_restarts.items()):
+            if restart_at <= now:
+                del self.pending_restarts[worker_idx]
+                self._start_worker(worker_idx)
+
+        sentinels = {
+            process.sentinel: worker_idx
+            for worker_idx, process in self.processes.items()
+        }
+        # NOTE: wake up regularly to notice 'stop' and to run pending restarts
+        for sentinel in wait(list(sentinels), timeout=0.1):
+            worker_idx = sentinels[sentinel]
+            process = self.processes.pop(worker_idx)
+            if self.stopped.is_set():
+                continue
+
+            self.logger.error(
+                message=f"Worker {worker_idx} (pid {process.pid}) exited with code {process.exitcode}. Restarting..."
+            )
+            self.pending_restarts[worker_idx] = (
+                time.monotonic() + self.restart_delay_seconds
+            )
+
+    def _start_worker(self, worker_idx: int) -> None:
+        process = self.context.Process(
+            target=self.target,
+            args=(worker_idx, *self.args),
+            name=f"worker-{worker_idx}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[worker_idx] = process
+        self.logger.info(message=f"Started worker {worker_idx} (pid {process.pid})")
+
+    def _stop_workers(self) -> None:
+        self.logger.info(message="Stopping the workers")
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_timeout_seconds
+        for process in self.processes.values():
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                self.logger.warning(
+                    message=f"Worker pid {process.pid} did not stop in time, killing it"
+                )
+                process.kill()
+                process.join()
+        self.processes.clear()
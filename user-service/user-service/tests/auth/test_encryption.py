@@ -0,0 +1,39 @@
+import pytest
+
+from auth.encryption import PasswordHasher, is_correct_password
+
+
+@pytest.fixture(params=[0, 1], ids=["inline", "process-pool"])
+def password_hasher(request):
+    hasher = PasswordHasher(workers=request.param)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_password_hasher_hash_password(password_hasher: PasswordHasher):
+    hashed_password = password_hasher.hash_password("admin").result(timeout=30)
+
+    assert hashed_password != "admin"
+    assert is_correct_password(plain_password="admin", hashed_password=hashed_password)
+
+
+def test_password_hasher_is_correct_password(password_hasher: PasswordHasher):
+    hashed_password = password_hasher.hash_password("admin").result(timeout=30)
+
+    assert password_hasher.is_correct_password(
+        plain_password="admin", hashed_password=hashed_password
+    ).result(timeout=30)
+    assert not password_hasher.is_correct_password(
+        plain_password="not-admin", hashed_password=hashed_password
+    ).result(timeout=30)
+
+
+def test_password_hasher_reports_errors_through_future():
+    hasher = PasswordHasher(workers=0)
+
+    verification = hasher.is_correct_password(
+        plain_password="admin", hashed_password="not-a-bcrypt-hash"
+    )
+
+    assert verification.done()
+    assert isinstance(verification.exception(), ValueError)
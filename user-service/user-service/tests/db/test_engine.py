@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, SingletonThreadPool
+
+from db.engine import SQLITE_PROFILES, create_sqlite_engine
+
+
+def test_performance_profile_sets_up_every_connection(tmp_path):
+    engine = create_sqlite_engine(db_path=f"sqlite:///{tmp_path / 'test.db'}")
+
+    with engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("cache_size") == -64 * 1024
+        assert pragma("mmap_size") == 256 * 1024 * 1024
+        assert pragma("busy_timeout") == 30_000
+        assert pragma("temp_store") == 2  # MEMORY
+
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == SQLITE_PROFILES["performance"].pool_size
+    engine.dispose()
+
+
+def test_in_memory_databases_keep_a_connection_per_thread():
+    engine = create_sqlite_engine(db_path="sqlite:///:memory:")
+
+    assert isinstance(engine.pool, SingletonThreadPool)
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        create_sqlite_engine(db_path="sqlite:///:memory:", profile="fastest")
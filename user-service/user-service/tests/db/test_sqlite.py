@@ -0,0 +1,62 @@
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from db.model import BaseModel
+from db.sqlite import Sqlite
+
+import core.model  # noqa: F401
+import user.model  # noqa: F401
+
+
+def test_migrations_match_the_models():
+    db = Sqlite(db_path="sqlite:///:memory:")
+
+    with db.engine.connect() as connection:
+        assert (
+            compare_metadata(MigrationContext.configure(connection), BaseModel.metadata)
+            == []
+        )
+
+
+def test_migrate_upgrades_a_database_created_without_migrations(tmp_path):
+    db_path = f"sqlite:///{tmp_path / 'legacy.db'}"
+
+    # the schema as 'create_all' generated it, before the foreign keys were indexed
+    engine = create_engine(db_path)
+    with engine.begin() as connection:
+        BaseModel.metadata.create_all(connection)
+        for table in BaseModel.metadata.tables.values():
+            for index in table.indexes:
+                connection.execute(text(f"DROP INDEX {index.name}"))
+    engine.dispose()
+
+    db = Sqlite(db_path=db_path)
+
+    indexes = {
+        index["name"]
+        for table in ("user_preference", "preferred_time_slot")
+        for index in inspect(db.engine).get_indexes(table)
+    }
+    assert indexes == {
+        "ix_user_preference_user_id",
+        "ix_preferred_time_slot_user_preference_id",
+    }
+
+
+def test_reads_get_a_read_only_pool_of_their_own(tmp_path):
+    db = Sqlite(db_path=f"sqlite:///{tmp_path / 'test.db'}")
+
+    assert db.read_engine is not db.engine
+    with db.read_engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        with pytest.raises(OperationalError):
+            connection.execute(text("DELETE FROM user_account"))
+
+
+def test_in_memory_databases_read_and_write_through_the_same_engine():
+    db = Sqlite(db_path="sqlite:///:memory:")
+
+    assert db.read_engine is db.engine
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db.sqlite import Sqlite
+from db.writer import GroupCommitWriter
+from user.model import User
+from user.schema import UserInput, UserOutput
+
+
+@pytest.fixture
+def db(tmp_path) -> Sqlite:
+    # NOTE: a file, since the writer thread would get an in-memory database of its own
+    return Sqlite(db_path=f"sqlite:///{tmp_path / 'test.db'}")
+
+
+def add_user(email: str):
+    def unit(session: Session):
+        return User.add_user(
+            session=session,
+            user=UserInput(
+                first_name="Joe",
+                last_name="Doe",
+                email=email,
+                role="admin",
+                password="admin",
+            ),
+            hashed_password="hashed",
+        ).map(User.to_schema)
+
+    return unit
+
+
+def emails(db: Sqlite) -> List[str]:
+    with Session(db.engine) as session:
+        return sorted(str(user.email) for user in session.query(User).all())
+
+
+def test_writer_commits_a_burst_of_writes_together(db: Sqlite):
+    commits = []
+    event.listen(db.engine, "commit", lambda connection: commits.append(connection))
+    writer = GroupCommitWriter(engine=db.engine, max_delay_seconds=0.05)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(
+                lambda idx: writer.submit(add_user(f"joeDoe{idx}@email.com")).result(),
+                range(16),
+            )
+        )
+    writer.shutdown()
+
+    assert all(result.is_ok() for result in results)
+    assert all(isinstance(result.unwrap(), UserOutput) for result in results)
+    assert emails(db) == sorted(f"joeDoe{idx}@email.com" for idx in range(16))
+    assert len(commits) < 16
+
+
+def test_writer_returns_each_unit_its_own_result(db: Sqlite):
+    def failing_unit(session: Session):
+        add_user("rolledBack@email.com")(session)
+        raise RuntimeError("Unit failed")
+
+    writer = GroupCommitWriter(engine=db.engine, max_delay_seconds=0.05)
+    first = writer.submit(add_user("joeDoe@email.com"))
+    failing = writer.submit(failing_unit)
+    duplicate = writer.submit(add_user("joeDoe@email.com"))
+    last = writer.submit(add_user("janeDoe@email.com"))
+    writer.shutdown()
+
+    assert first.result().is_ok() is True
+    with pytest.raises(RuntimeError):
+        failing.result()
+    assert duplicate.result().unwrap_err().message == "User already exists"
+    assert last.result().is_ok() is True
+
+    # the failing unit is rolled back, entirely, without undoing the rest of the batch
+    assert emails(db) == ["janeDoe@email.com", "joeDoe@email.com"]
+
+
+def test_writer_without_batches_writes_in_line(db: Sqlite):
+    writer = GroupCommitWriter(engine=db.engine, max_batch_size=0)
+
+    future = writer.submit(add_user("joeDoe@email.com"))
+
+    assert future.done() is True
+    assert future.result().is_ok() is True
+    assert emails(db) == ["joeDoe@email.com"]
@@ -0,0 +1,267 @@
+import asyncio
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# packet types
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+MQTT_V5 = 5
+
+
+def encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte, value = value % 128, value // 128
+        encoded.append(byte | 0x80 if value > 0 else byte)
+        if value == 0:
+            return bytes(encoded)
+
+
+def decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value, multiplier = 0, 1
+    while True:
+        byte = data[offset]
+        offset += 1
+        value += (byte & 0x7F) * multiplier
+        multiplier *= 128
+        if byte & 0x80 == 0:
+            return value, offset
+
+
+def decode_string(data: bytes, offset: int) -> Tuple[str, int]:
+    length = int.from_bytes(data[offset : offset + 2], "big")
+    offset += 2
+    return data[offset : offset + length].decode(), offset + length
+
+
+def encode_string(value: str) -> bytes:
+    encoded = value.encode()
+    return len(encoded).to_bytes(2, "big") + encoded
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for idx, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if idx >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[idx]:
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+@dataclass
+class BrokerSession:
+    client_id: str
+    protocol_level: int
+    writer: asyncio.StreamWriter
+    received: List[str] = field(default_factory=list)
+
+
+class StandInBroker:
+    """
+    A minimal, in-process MQTT broker used to test the services without a real broker.
+
+    It supports QoS 0 only, MQTT 3.1.1 and 5 clients, and '$share/<group>/<filter>'
+    subscriptions, which are served round-robin between the members of a group.
+    """
+
+    def __init__(self, host: str = "127.0.0.1") -> None:
+        self.host = host
+        self.port: Optional[int] = None
+        self.sessions: Dict[str, BrokerSession] = dict()
+        self.subscriptions: List[Tuple[BrokerSession, str]] = []
+        self.shared_subscriptions: Dict[Tuple[str, str], List[BrokerSession]] = dict()
+        self.round_robin: Dict[Tuple[str, str], itertools.count] = dict()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    def start(self) -> "StandInBroker":
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_server(), self.loop).result()
+        return self
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._stop_server(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def session(self, client_id: str) -> BrokerSession:
+        return self.sessions[client_id]
+
+    def is_subscribed(self, client_id: str, topic_filter: str) -> bool:
+        return any(
+            subscriber.client_id == client_id and subscribed_filter == topic_filter
+            for subscriber, subscribed_filter in self.subscriptions
+        )
+
+    async def _start_server(self) -> None:
+        self.server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def _stop_server(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        for session in self.sessions.values():
+            session.writer.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        session: Optional[BrokerSession] = None
+        try:
+            while True:
+                header = await reader.readexactly(1)
+                remaining_length, multiplier = 0, 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    remaining_length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if byte & 0x80 == 0:
+                        break
+                body = await reader.readexactly(remaining_length)
+
+                packet_type, flags = header[0] >> 4, header[0] & 0x0F
+                if packet_type == CONNECT:
+                    session = self._connect(body=body, writer=writer)
+                elif session is None:
+                    break
+                elif packet_type == SUBSCRIBE:
+                    self._subscribe(session=session, body=body)
+                elif packet_type == UNSUBSCRIBE:
+                    packet_id = body[:2]
+                    writer.write(bytes([UNSUBACK << 4, 2]) + packet_id)
+                elif packet_type == PUBLISH:
+                    self._publish(session=session, flags=flags, body=body)
+                elif packet_type == PINGREQ:
+                    writer.write(bytes([PINGRESP << 4, 0]))
+                elif packet_type == DISCONNECT:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if session is not None:
+                self._drop(session)
+            writer.close()
+
+    def _connect(self, body: bytes, writer: asyncio.StreamWriter) -> BrokerSession:
+        _, offset = decode_string(body, 0)
+        protocol_level = body[offset]
+        offset += 4  # protocol level, connect flags, keep alive
+        if protocol_level == MQTT_V5:
+            properties_length, offset = decode_varint(body, offset)
+            offset += properties_length
+        client_id, _ = decode_string(body, offset)
+        if not client_id:
+            client_id = f"anonymous-{id(writer)}"
+
+        previous = self.sessions.get(client_id)
+        if previous is not None:
+            # same as a real broker: a second connection with the same ID takes over
+            self._drop(previous)
+            previous.writer.close()
+
+        session = BrokerSession(
+            client_id=client_id, protocol_level=protocol_level, writer=writer
+        )
+        self.sessions[client_id] = session
+
+        if protocol_level == MQTT_V5:
+            writer.write(bytes([CONNACK << 4, 3, 0, 0, 0]))
+        else:
+            writer.write(bytes([CONNACK << 4, 2, 0, 0]))
+        return session
+
+    def _subscribe(self, session: BrokerSession, body: bytes) -> None:
+        packet_id, offset = body[:2], 2
+        if session.protocol_level == MQTT_V5:
+            properties_length, offset = decode_varint(body, offset)
+            offset += properties_length
+
+        granted = bytearray()
+        while offset < len(body):
+            topic_filter, offset = decode_string(body, offset)
+            offset += 1  # subscription options
+            if topic_filter.startswith("$share/"):
+                _, group, shared_filter = topic_filter.split("/", 2)
+                members = self.shared_subscriptions.setdefault(
+                    (group, shared_filter), []
+                )
+                if session not in members:
+                    members.append(session)
+                self.round_robin.setdefault((group, shared_filter), itertools.count())
+            self.subscriptions.append((session, topic_filter))
+            granted.append(0)
+
+        properties = b"\x00" if session.protocol_level == MQTT_V5 else b""
+        variable_header = packet_id + properties + bytes(granted)
+        session.writer.write(
+            bytes([SUBACK << 4]) + encode_varint(len(variable_header)) + variable_header
+        )
+
+    def _publish(self, session: BrokerSession, flags: int, body: bytes) -> None:
+        topic, offset = decode_string(body, 0)
+        if (flags >> 1) & 0x03 > 0:
+            offset += 2  # packet id, everything is delivered as QoS 0 anyway
+        properties = b"\x00"
+        if session.protocol_level == MQTT_V5:
+            properties_length, properties_offset = decode_varint(body, offset)
+            properties = body[offset : properties_offset + properties_length]
+            offset = properties_offset + properties_length
+        payload = body[offset:]
+
+        receivers = [
+            subscriber
+            for subscriber, topic_filter in self.subscriptions
+            if not topic_filter.startswith("$share/")
+            and topic_matches(topic_filter, topic)
+        ]
+        for (group, topic_filter), members in self.shared_subscriptions.items():
+            if members and topic_matches(topic_filter, topic):
+                turn = next(self.round_robin[(group, topic_filter)])
+                receivers.append(members[turn % len(members)])
+
+        for receiver in receivers:
+            receiver.received.append(topic)
+            self._deliver(
+                receiver=receiver, topic=topic, properties=properties, payload=payload
+            )
+
+    def _deliver(
+        self, receiver: BrokerSession, topic: str, properties: bytes, payload: bytes
+    ) -> None:
+        variable_header = encode_string(topic)
+        if receiver.protocol_level == MQTT_V5:
+            variable_header += properties
+        packet = variable_header + payload
+        receiver.writer.write(
+            bytes([PUBLISH << 4]) + encode_varint(len(packet)) + packet
+        )
+
+    def _drop(self, session: BrokerSession) -> None:
+        if self.sessions.get(session.client_id) is session:
+            del self.sessions[session.client_id]
+        self.subscriptions = [
+            (subscriber, topic_filter)
+            for subscriber, topic_filter in self.subscriptions
+            if subscriber is not session
+        ]
+        for members in self.shared_subscriptions.values():
+            if session in members:
+                members.remove(session)
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+from typing import Any, Optional
+
+import pytest
+
+from paho.mqtt.client import Client, MQTTMessage
+from paho.mqtt.enums import CallbackAPIVersion
+
+from logger.loguru import Loguru
+from mqtt.aio import AsyncMqttClient
+from mqtt.client import MqttClient
+from mqtt.router import MqttRouter, Params, as_async_handler
+from mqtt.schema import HttpMethod, MqttRequest, MqttStatus
+
+from tests.mqtt.broker import StandInBroker
+
+
+@pytest.fixture
+def broker():
+    broker = StandInBroker().start()
+    yield broker
+    broker.stop()
+
+
+def make_message(payload: str, topic: str = "/topic/req") -> MQTTMessage:
+    message = MQTTMessage()
+    message.topic = topic.encode()
+    message.payload = payload.encode()
+    return message
+
+
+def test_as_async_handler_runs_sync_handler_off_the_loop():
+    loop_thread = threading.current_thread()
+    served_on = []
+
+    def handler(client, userdata, msg, params, payload):
+        served_on.append(threading.current_thread())
+
+    asyncio.run(as_async_handler(handler)(None, {}, None, None, None))
+
+    assert len(served_on) == 1
+    assert served_on[0] is not loop_thread
+
+
+def test_serve_async_calls_async_and_sync_handlers():
+    served = []
+
+    async def async_handler(
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[Any],
+    ):
+        await asyncio.sleep(0)
+        served.append(("async", params))
+
+    def sync_handler(
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[Any],
+    ):
+        served.append(("sync", params))
+
+    router = MqttRouter()
+    router.register_route(HttpMethod.GET, "/foo/:id", async_handler)
+    router.register_route(HttpMethod.POST, "/foo/:id", sync_handler)
+
+    async def serve():
+        await router.serve_async(
+            client=None,
+            userdata={},
+            msg=make_message(
+                '{"msgId": "a", "method": "GET", "path": "/foo/1", "data": {}}'
+            ),
+        )
+        await router.serve_async(
+            client=None,
+            userdata={},
+            msg=make_message(
+                '{"msgId": "b", "method": "POST", "path": "/foo/2", "data": {}}'
+            ),
+        )
+
+    asyncio.run(serve())
+
+    assert served == [("async", {"id": "1"}), ("sync", {"id": "2"})]
+
+
+def test_connect_async_backs_off_without_blocking_the_loop():
+    client = AsyncMqttClient(
+        broker_uri="127.0.0.1", broker_port=1, client_id="test", logger=Loguru()
+    )
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def connect():
+        ticker_task = asyncio.create_task(ticker())
+        connected = await client.connect_async(
+            retries=3, min_delay_seconds=0.05, max_delay_seconds=0.1
+        )
+        ticker_task.cancel()
+        return connected
+
+    assert asyncio.run(connect()) is False
+    # the loop kept running while waiting between the attempts
+    assert len(ticks) > 5
+
+
+def test_async_client_serves_requests_through_the_broker(broker: StandInBroker):
+    responses: queue.Queue = queue.Queue()
+
+    requester = Client(
+        callback_api_version=CallbackAPIVersion.VERSION2, client_id="requester"
+    )
+    requester.on_message = lambda client, userdata, msg: responses.put(msg.payload)
+    requester.connect("127.0.0.1", broker.port)
+    requester.subscribe("dit356g2/test/res")
+    requester.loop_start()
+
+    async def handler(client, userdata, msg, params, payload):
+        await asyncio.sleep(0.01)
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=params,
+        )
+
+    router = MqttRouter()
+    router.register_route(HttpMethod.GET, "/things/:id", handler)
+
+    service_client = AsyncMqttClient(
+        broker_uri="127.0.0.1",
+        broker_port=broker.port,
+        client_id="async-service",
+        logger=Loguru(),
+    )
+
+    async def serve():
+        assert await service_client.connect_async(retries=1)
+        service_client.subscribe("dit356g2/test/req")
+        service_client.set_on_message_async(
+            lambda client, userdata, msg: router.serve_async(client, userdata, msg)
+        )
+        serving = asyncio.create_task(service_client.run())
+
+        # wait for the subscriptions to reach the broker
+        while not (
+            broker.is_subscribed("async-service", "dit356g2/test/req")
+            and broker.is_subscribed("requester", "dit356g2/test/res")
+        ):
+            await asyncio.sleep(0.01)
+
+        for idx in range(10):
+            requester.publish(
+                "dit356g2/test/req",
+                json.dumps(
+                    {
+                        "msgId": str(idx),
+                        "method": "GET",
+                        "path": f"/things/{idx}",
+                        "data": {},
+                    }
+                ),
+            )
+
+        received = []
+        while len(received) < 10:
+            try:
+                received.append(json.loads(responses.get_nowait()))
+            except queue.Empty:
+                await asyncio.sleep(0.01)
+
+        service_client.stop()
+        await serving
+        return received
+
+    received = asyncio.run(asyncio.wait_for(serve(), timeout=10))
+    requester.loop_stop()
+    requester.disconnect()
+
+    assert sorted(response["msgId"] for response in received) == [
+        str(idx) for idx in range(10)
+    ]
+    for response in received:
+        assert response["status"] == 200
+        assert response["data"] == {"id": response["msgId"]}
@@ -0,0 +1,157 @@
+from typing import Any, List, Optional
+
+import cbor2
+import msgpack
+import pytest
+from pydantic import BaseModel
+
+from paho.mqtt.client import MQTTMessage, MQTTv5, MQTTv311
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from mqtt.client import MqttClient
+from mqtt.codec import CBOR, JSON, MSGPACK, codec_of, codec_topics
+from mqtt.router import MqttRouter, Params
+from mqtt.schema import HttpMethod, MqttRequest, MqttStatus
+
+
+class Thing(BaseModel):
+    name: str
+    count: int
+
+
+class RecordingClient:
+    def __init__(self, protocol: int = MQTTv5) -> None:
+        self.protocol = protocol
+        self.published: List[Any] = []
+
+    def publish(self, topic: str, payload: bytes, properties=None):
+        self.published.append((topic, payload, properties))
+
+
+def make_message(
+    topic: str, payload: bytes, content_type: Optional[str] = None
+) -> MQTTMessage:
+    message = MQTTMessage(topic=topic.encode())
+    message.payload = payload
+    if content_type is not None:
+        message.properties = Properties(PacketTypes.PUBLISH)
+        message.properties.ContentType = content_type
+    return message
+
+
+def make_router() -> MqttRouter:
+    def handler(
+        client: Any,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[Thing],
+    ):
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=[payload.data, payload.data],
+        )
+
+    router = MqttRouter()
+    router.register_route(HttpMethod.POST, "/things/:id", handler, body=Thing)
+    return router
+
+
+REQUEST = {
+    "msgId": "aabb",
+    "method": "POST",
+    "path": "/things/1",
+    "data": {"name": "foo", "count": 2},
+}
+RESPONSE = {
+    "msgId": "aabb",
+    "status": 200,
+    "data": [{"name": "foo", "count": 2}, {"name": "foo", "count": 2}],
+}
+
+
+def test_codec_of():
+    assert codec_of(make_message("a/req", b"")) is JSON
+    assert codec_of(make_message("a/req/msgpack", b"")) is MSGPACK
+    assert codec_of(make_message("a/req/cbor", b"")) is CBOR
+    assert codec_of(make_message("a/req", b"", "application/cbor")) is CBOR
+    # the content type wins over the topic suffix
+    assert codec_of(make_message("a/req/cbor", b"", "application/msgpack")) is MSGPACK
+    # unknown content types are ignored
+    assert codec_of(make_message("a/req", b"", "text/plain")) is JSON
+
+
+def test_codec_topics():
+    assert codec_topics("a/req") == ["a/req", "a/req/msgpack", "a/req/cbor"]
+
+
+@pytest.mark.parametrize(
+    "topic, content_type, encode, decode, expected_content_type",
+    [
+        ("a/req/msgpack", None, msgpack.packb, msgpack.unpackb, "application/msgpack"),
+        ("a/req/cbor", None, cbor2.dumps, cbor2.loads, "application/cbor"),
+        (
+            "a/req",
+            "application/msgpack",
+            msgpack.packb,
+            msgpack.unpackb,
+            "application/msgpack",
+        ),
+        ("a/req", "application/cbor", cbor2.dumps, cbor2.loads, "application/cbor"),
+    ],
+)
+def test_responses_use_the_codec_of_the_request(
+    topic, content_type, encode, decode, expected_content_type
+):
+    client = RecordingClient()
+
+    make_router().serve(
+        client=client,
+        userdata={},
+        msg=make_message(topic, encode(REQUEST), content_type),
+    )
+
+    [(response_topic, payload, properties)] = client.published
+    assert response_topic == topic.replace("/req", "/res")
+    assert decode(payload) == RESPONSE
+    assert properties.ContentType == expected_content_type
+
+
+def test_json_stays_the_default():
+    client = RecordingClient(protocol=MQTTv311)
+
+    make_router().serve(
+        client=client,
+        userdata={},
+        msg=make_message(
+            "a/req",
+            b'{"msgId": "aabb", "method": "POST", "path": "/things/1", "data": {"name": "foo", "count": 2}}',
+        ),
+    )
+
+    [(response_topic, payload, properties)] = client.published
+    assert response_topic == "a/res"
+    assert JSON.decode(payload) == RESPONSE
+    assert properties is None
+
+
+def test_invalid_binary_body_is_answered_in_the_same_codec():
+    client = RecordingClient()
+
+    make_router().serve(
+        client=client,
+        userdata={},
+        msg=make_message(
+            "a/req/msgpack", msgpack.packb({**REQUEST, "data": {"name": "foo"}})
+        ),
+    )
+
+    [(_, payload, _)] = client.published
+    response = msgpack.unpackb(payload)
+    assert response["msgId"] == "aabb"
+    assert response["status"] == 400
+    assert response["data"]["message"] == "Invalid data format"
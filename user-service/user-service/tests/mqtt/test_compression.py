@@ -0,0 +1,76 @@
+import pytest
+from pydantic import BaseModel
+
+from mqtt.client import MqttClient
+from mqtt.codec import JSON, MSGPACK, CBOR
+from mqtt.compression import ResponseCompression
+from mqtt.schema import Compression, MqttStatus
+from mqtt.serializers import ResponseSerializers
+
+
+class Thing(BaseModel):
+    id: str
+    name: str
+
+
+THINGS = [Thing(id=str(idx), name=f"thing number {idx}") for idx in range(200)]
+
+
+def test_from_config():
+    assert (
+        ResponseCompression.from_config(compression="zstd", threshold_bytes=0) is None
+    )
+
+    compression = ResponseCompression.from_config(
+        compression="GZIP", threshold_bytes=1024
+    )
+    assert compression is not None
+    assert compression.compression == Compression.GZIP
+    assert compression.threshold_bytes == 1024
+
+    with pytest.raises(ValueError):
+        ResponseCompression.from_config(compression="brotli", threshold_bytes=1024)
+
+
+@pytest.mark.parametrize("compression", [Compression.GZIP, Compression.ZSTD])
+@pytest.mark.parametrize("codec", [JSON, MSGPACK, CBOR])
+def test_large_responses_are_compressed(compression, codec):
+    serializers = ResponseSerializers()
+    serializers.configure_compression(
+        ResponseCompression(compression=compression, threshold_bytes=1024)
+    )
+    uncompressed = ResponseSerializers().render(
+        message_id="aabb",
+        status_code=MqttStatus.STATUS_200_OK,
+        payload=THINGS,
+        codec=codec,
+    )
+
+    rendered = serializers.render(
+        message_id="aabb",
+        status_code=MqttStatus.STATUS_200_OK,
+        payload=THINGS,
+        codec=codec,
+    )
+
+    assert len(rendered) < len(uncompressed) / 2
+    assert codec.decode(rendered)["compression"] == compression.value
+
+    response = MqttClient.decode_response(payload=rendered, codec=codec)
+    assert response.msgId == "aabb"
+    assert response.status == MqttStatus.STATUS_200_OK
+    assert response.data == [thing.model_dump() for thing in THINGS]
+
+
+def test_small_responses_are_not_compressed():
+    serializers = ResponseSerializers()
+    serializers.configure_compression(
+        ResponseCompression(compression=Compression.ZSTD, threshold_bytes=1024)
+    )
+
+    rendered = serializers.render(
+        message_id="aabb", status_code=MqttStatus.STATUS_200_OK, payload=THINGS[0]
+    )
+
+    assert "compression" not in JSON.decode(rendered)
+    assert MqttClient.decode_response(payload=rendered).data == THINGS[0].model_dump()
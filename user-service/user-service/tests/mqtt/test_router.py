@@ -1,12 +1,13 @@
 from typing import Any, Optional
 
 import pytest
+from pydantic import BaseModel
 
 from paho.mqtt.client import Client, MQTTMessage
 from paho.mqtt.enums import CallbackAPIVersion
 
-from mqtt.router import MqttRouter, Params
-from mqtt.schema import HttpMethod, MqttRequest, MqttStatus
+from mqtt.router import MqttRouter, Params, current_route_access
+from mqtt.schema import HttpMethod, MqttRequest, MqttStatus, RouteAccess
 from mqtt.client import MqttClient
 
 
@@ -54,7 +55,7 @@ def test_match_route_params():
     )
 
 
-def test_serve_invalid_payload_format(paho_client):
+def test_serve_invalid_payload_format(paho_client, monkeypatch):
     def send_error_response(
         client: Client,
         origin_topic: str,
@@ -78,7 +79,7 @@ def test_serve_invalid_payload_format(paho_client):
         # should not be called during the test run
         raise NotImplementedError()
 
-    MqttClient.send_error_response = send_error_response
+    monkeypatch.setattr(MqttClient, "send_error_response", send_error_response)
 
     router = MqttRouter()
 
@@ -91,7 +92,7 @@ def test_serve_invalid_payload_format(paho_client):
     router.serve(client=paho_client, userdata={}, msg=message)
 
 
-def test_serve_handler_not_found_for_method(paho_client):
+def test_serve_handler_not_found_for_method(paho_client, monkeypatch):
     def send_error_response(
         client: Client,
         origin_topic: str,
@@ -116,7 +117,7 @@ def test_serve_handler_not_found_for_method(paho_client):
         # should not be called during the test run
         raise NotImplementedError()
 
-    MqttClient.send_error_response = send_error_response
+    monkeypatch.setattr(MqttClient, "send_error_response", send_error_response)
 
     router = MqttRouter()
 
@@ -131,7 +132,7 @@ def test_serve_handler_not_found_for_method(paho_client):
     router.serve(client=paho_client, userdata={}, msg=message)
 
 
-def test_serve_handler_not_found_for_method_and_path(paho_client):
+def test_serve_handler_not_found_for_method_and_path(paho_client, monkeypatch):
     def send_error_response(
         client: Client,
         origin_topic: str,
@@ -156,7 +157,7 @@ def test_serve_handler_not_found_for_method_and_path(paho_client):
         # should not be called during the test run
         raise NotImplementedError()
 
-    MqttClient.send_error_response = send_error_response
+    monkeypatch.setattr(MqttClient, "send_error_response", send_error_response)
 
     router = MqttRouter()
 
@@ -171,7 +172,7 @@ def test_serve_handler_not_found_for_method_and_path(paho_client):
     router.serve(client=paho_client, userdata={}, msg=message)
 
 
-def test_serve_handler_calls_correct_handler(paho_client):
+def test_serve_handler_calls_correct_handler(paho_client, monkeypatch):
     def send_error_response(
         client: Client,
         origin_topic: str,
@@ -196,7 +197,7 @@ def test_serve_handler_calls_correct_handler(paho_client):
         assert payload.method == HttpMethod.GET
         assert payload.data == {}
 
-    MqttClient.send_error_response = send_error_response
+    monkeypatch.setattr(MqttClient, "send_error_response", send_error_response)
 
     router = MqttRouter()
 
@@ -207,3 +208,166 @@ def test_serve_handler_calls_correct_handler(paho_client):
     message.topic = "/topic/req".encode()
 
     router.serve(client=paho_client, userdata={}, msg=message)
+
+
+def find_handler(router: MqttRouter, method: HttpMethod, path: str):
+    found = router.find_route(method=method, path=path)
+    if found is None:
+        return None
+    route, params = found
+    return route.handler, params
+
+
+def test_find_route_prefers_static_segments():
+    def by_id(*args):
+        pass
+
+    def preferences(*args):
+        pass
+
+    for routes in (
+        [("/users/:id", by_id), ("/users/preferences", preferences)],
+        [("/users/preferences", preferences), ("/users/:id", by_id)],
+    ):
+        router = MqttRouter()
+        for path, handler in routes:
+            router.register_route(HttpMethod.GET, path, handler)
+
+        assert find_handler(router, HttpMethod.GET, "/users/preferences") == (
+            preferences,
+            {},
+        )
+        assert find_handler(router, HttpMethod.GET, "/users/aabb") == (
+            by_id,
+            {"id": "aabb"},
+        )
+
+
+def test_find_route_falls_back_to_params():
+    def roles(*args):
+        pass
+
+    def preferences(*args):
+        pass
+
+    router = MqttRouter()
+    router.register_route(HttpMethod.GET, "/users/preferences", preferences)
+    router.register_route(HttpMethod.GET, "/users/:id/roles", roles)
+
+    assert find_handler(router, HttpMethod.GET, "/users/preferences/roles") == (
+        roles,
+        {"id": "preferences"},
+    )
+    assert find_handler(router, HttpMethod.GET, "/users/preferences/foo") is None
+    assert find_handler(router, HttpMethod.POST, "/users/preferences") is None
+
+
+def test_find_route_agrees_with_match_route():
+    saved_paths = [
+        "/",
+        "/foo",
+        "/foo/bar",
+        "/foo/:id",
+        "/foo/:id/bar",
+        "/foo/bar/:id",
+        "/:a/:b/:c",
+    ]
+    requested_paths = [
+        "/",
+        "/foo",
+        "/foo/bar",
+        "/foo/aabb",
+        "/foo/aabb/bar",
+        "/foo/bar/aabb",
+        "/foo/bar/baz/qux",
+        "/x/y/z",
+        "/foo/",
+        "",
+    ]
+
+    for saved_path in saved_paths:
+        router = MqttRouter()
+        router.register_route(HttpMethod.GET, saved_path, saved_path)
+
+        for requested_path in requested_paths:
+            params, matches = router.match_route(
+                requested_path=requested_path, saved_path=saved_path
+            )
+            expected = (saved_path, params) if matches else None
+            assert (
+                find_handler(router, HttpMethod.GET, requested_path) == expected
+            ), f"{saved_path} {requested_path}"
+
+
+class Thing(BaseModel):
+    name: str
+    count: int
+
+
+def test_serve_validates_body_schema(paho_client, monkeypatch):
+    served = []
+    errors = []
+
+    def send_error_response(
+        client: Client,
+        origin_topic: str,
+        message_id: str,
+        status_code: MqttStatus,
+        error_msg: str,
+        details: str,
+    ):
+        errors.append((message_id, status_code, error_msg))
+
+    def handler(
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[Thing],
+    ):
+        served.append(payload.data)
+
+    monkeypatch.setattr(MqttClient, "send_error_response", send_error_response)
+
+    router = MqttRouter()
+    router.register_route(HttpMethod.POST, "/things", handler, body=Thing)
+
+    message = MQTTMessage()
+    message.topic = "/topic/req".encode()
+
+    message.payload = b'{"msgId": "aabb", "method": "POST", "path": "/things", "data": {"name": "foo", "count": "2"}}'
+    router.serve(client=paho_client, userdata={}, msg=message)
+
+    message.payload = b'{"msgId": "ccdd", "method": "POST", "path": "/things", "data": {"name": "foo"}}'
+    router.serve(client=paho_client, userdata={}, msg=message)
+
+    message.payload = b'{"msgId": "eeff", "method": "POST", "path": "/things"}'
+    router.serve(client=paho_client, userdata={}, msg=message)
+
+    assert served == [Thing(name="foo", count=2)]
+    assert errors == [
+        ("ccdd", MqttStatus.STATUS_400_BAD_REQUEST, "Invalid data format"),
+        ("eeff", MqttStatus.STATUS_400_BAD_REQUEST, "Invalid data format"),
+    ]
+
+
+def test_serve_sets_the_access_of_the_route(paho_client):
+    accesses = []
+
+    def handler(client, userdata, msg, params, payload):
+        accesses.append(current_route_access.get())
+
+    router = MqttRouter()
+    router.register_route(HttpMethod.GET, "/foo", handler)
+    router.register_route(HttpMethod.POST, "/foo", handler)
+    router.register_route(HttpMethod.POST, "/login", handler, access=RouteAccess.READ)
+
+    for method, path in (("GET", "/foo"), ("POST", "/foo"), ("POST", "/login")):
+        message = MQTTMessage()
+        message.payload = (
+            f'{{"msgId": "aabb", "method": "{method}", "path": "{path}", "data": {{}}}}'
+        ).encode()
+        message.topic = "/topic/req".encode()
+        router.serve(client=paho_client, userdata={}, msg=message)
+
+    assert accesses == [RouteAccess.READ, RouteAccess.WRITE, RouteAccess.READ]
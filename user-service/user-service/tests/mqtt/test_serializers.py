@@ -0,0 +1,75 @@
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from mqtt.schema import ErrorBody, MqttResponse, MqttStatus
+from mqtt.serializers import (
+    ErrorFrame,
+    ResponseSerializers,
+    error_frame,
+    payload_type_of,
+)
+
+
+class Thing(BaseModel):
+    id: str
+    tags: List[str]
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        Thing(id="1", tags=["a", "b"]),
+        [Thing(id="1", tags=[]), Thing(id="2", tags=["c"])],
+        [],
+        None,
+        {"message": "Appointment deleted successfully"},
+        ErrorBody(message="Invalid data format", details='"quoted" \\ details'),
+    ],
+)
+def test_render_matches_model_dump_json(payload):
+    serializers = ResponseSerializers()
+
+    rendered = serializers.render(
+        message_id="aabb", status_code=MqttStatus.STATUS_200_OK, payload=payload
+    )
+
+    expected = MqttResponse(
+        msgId="aabb", status=MqttStatus.STATUS_200_OK, data=payload
+    ).model_dump_json()
+    assert rendered.decode() == expected
+
+
+def test_serializers_are_reused_per_payload_type():
+    serializers = ResponseSerializers()
+
+    first = serializers.register(payload_type_of([Thing(id="1", tags=[])]))
+    second = serializers.register(payload_type_of([Thing(id="2", tags=["a"])]))
+
+    assert first is second
+    assert list(serializers.serializers) == [List[Thing]]
+
+
+@pytest.mark.parametrize("message_id", ["aabb", "", 'with "quotes" and \\'])
+def test_error_frame_matches_model_dump_json(message_id):
+    frame = ErrorFrame(
+        status_code=MqttStatus.STATUS_401_UNAUTHORIZED,
+        error_msg="Invalid email or password",
+        details="Invalid email or password",
+    )
+
+    expected = MqttResponse(
+        msgId=message_id,
+        status=MqttStatus.STATUS_401_UNAUTHORIZED,
+        data=ErrorBody(
+            message="Invalid email or password", details="Invalid email or password"
+        ),
+    ).model_dump_json()
+    assert frame.render(message_id=message_id).decode() == expected
+
+
+def test_error_frames_are_cached():
+    assert error_frame(
+        MqttStatus.STATUS_404_NOT_FOUND, "Not found", "Not found"
+    ) is error_frame(MqttStatus.STATUS_404_NOT_FOUND, "Not found", "Not found")
@@ -0,0 +1,112 @@
+import json
+import time
+import threading
+import dataclasses
+from collections import Counter
+from typing import List, Tuple
+
+import pytest
+
+from paho.mqtt.client import Client
+from paho.mqtt.enums import CallbackAPIVersion
+
+from config.app import AppConfig
+from logger.loguru import Loguru
+from mqtt.client import MqttClient
+from user.service import UserService
+
+from tests.mqtt.broker import StandInBroker
+
+REQUEST_TOPIC = "dit356g2/users/req"
+
+
+class RecordingRouter:
+    def __init__(self, replica: str, served: List[Tuple[str, str]]) -> None:
+        self.replica = replica
+        self.served = served
+
+    def serve(self, client, userdata, msg) -> None:
+        self.served.append((self.replica, json.loads(msg.payload)["msgId"]))
+
+
+@pytest.fixture
+def broker():
+    broker = StandInBroker().start()
+    yield broker
+    broker.stop()
+
+
+def make_replica(
+    broker: StandInBroker, instance_id: str, served: List[Tuple[str, str]]
+) -> UserService:
+    app_config = dataclasses.replace(
+        AppConfig.from_env(),
+        MQTT_BROKER="127.0.0.1",
+        MQTT_PORT=str(broker.port),
+        MQTT_SHARED_GROUP="user-service",
+        INSTANCE_ID=instance_id,
+        WORKER_POOL_SIZE=0,
+    )
+    replica = UserService(logger=Loguru(), app_config=app_config)
+    replica.mount_router(
+        topic=REQUEST_TOPIC, router=RecordingRouter(replica=instance_id, served=served)
+    )
+    return replica
+
+
+def wait_until(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_shared_topic():
+    assert (
+        MqttClient.shared_topic(topic=REQUEST_TOPIC, group="user-service")
+        == f"$share/user-service/{REQUEST_TOPIC}"
+    )
+
+
+def test_replicas_split_requests_without_duplicates(broker: StandInBroker):
+    served: List[Tuple[str, str]] = []
+    replicas = [
+        make_replica(broker=broker, instance_id=instance_id, served=served)
+        for instance_id in ("a", "b")
+    ]
+    threads = [
+        threading.Thread(target=replica.listen_and_serve, daemon=True)
+        for replica in replicas
+    ]
+    for thread in threads:
+        thread.start()
+
+    shared_filter = f"$share/user-service/{REQUEST_TOPIC}"
+    wait_until(
+        lambda: broker.is_subscribed("user-service-a", shared_filter)
+        and broker.is_subscribed("user-service-b", shared_filter)
+    )
+
+    requester = Client(callback_api_version=CallbackAPIVersion.VERSION2)
+    requester.connect("127.0.0.1", broker.port)
+    requester.loop_start()
+    for idx in range(20):
+        requester.publish(
+            REQUEST_TOPIC,
+            json.dumps({"msgId": str(idx), "method": "GET", "path": "/", "data": {}}),
+        )
+    wait_until(lambda: len(served) == 20)
+    requester.loop_stop()
+    requester.disconnect()
+
+    for replica in replicas:
+        replica.client.stop()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # every request was handled exactly once...
+    assert sorted(msg_id for _, msg_id in served) == sorted(
+        str(idx) for idx in range(20)
+    )
+    # ...and both replicas got their share
+    assert Counter(replica for replica, _ in served) == {"a": 10, "b": 10}
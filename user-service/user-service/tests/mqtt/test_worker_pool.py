@@ -0,0 +1,73 @@
+import threading
+
+from paho.mqtt.client import MQTTMessage
+
+from logger.loguru import Loguru
+from mqtt.worker_pool import MqttWorkerPool
+
+
+def make_message(topic: str = "/topic/req") -> MQTTMessage:
+    message = MQTTMessage()
+    message.topic = topic.encode()
+    message.payload = b"{}"
+    return message
+
+
+def test_worker_pool_inline_runs_on_caller_thread():
+    pool = MqttWorkerPool(size=0, logger=Loguru())
+    served_on = []
+
+    def serve(client, userdata, msg):
+        served_on.append(threading.current_thread())
+
+    pool.submit(serve, client=None, userdata={}, msg=make_message())
+
+    assert served_on == [threading.current_thread()]
+
+
+def test_worker_pool_serves_off_caller_thread():
+    pool = MqttWorkerPool(size=2, logger=Loguru())
+    served_on = []
+
+    def serve(client, userdata, msg):
+        served_on.append(threading.current_thread())
+
+    pool.submit(serve, client=None, userdata={}, msg=make_message())
+    pool.shutdown()
+
+    assert len(served_on) == 1
+    assert served_on[0] is not threading.current_thread()
+
+
+def test_worker_pool_serves_messages_concurrently():
+    pool = MqttWorkerPool(size=2, logger=Loguru())
+    # both handlers have to be running at the same time for the barrier to pass
+    barrier = threading.Barrier(2, timeout=5)
+    passed = []
+
+    def serve(client, userdata, msg):
+        barrier.wait()
+        passed.append(msg.topic)
+
+    pool.submit(serve, client=None, userdata={}, msg=make_message("/a/req"))
+    pool.submit(serve, client=None, userdata={}, msg=make_message("/b/req"))
+    pool.shutdown()
+
+    assert sorted(passed) == ["/a/req", "/b/req"]
+
+
+def test_worker_pool_keeps_serving_after_handler_error():
+    pool = MqttWorkerPool(size=1, logger=Loguru())
+    served = []
+
+    def failing_serve(client, userdata, msg):
+        raise RuntimeError("boom")
+
+    def serve(client, userdata, msg):
+        served.append(msg.topic)
+
+    pool.submit(failing_serve, client=None, userdata={}, msg=make_message())
+    pool.submit(serve, client=None, userdata={}, msg=make_message())
+    pool.shutdown()
+
+    assert served == ["/topic/req"]
@@ -0,0 +1,59 @@
+import os
+import sys
+import threading
+import multiprocessing
+from typing import List, Tuple
+
+from logger.loguru import Loguru
+from process.supervisor import WorkerSupervisor
+
+
+def crash_once(worker_idx: int, started, crash: bool) -> None:
+    started.put((worker_idx, os.getpid()))
+    if crash:
+        sys.exit(1)
+    threading.Event().wait()
+
+
+def collect(started, count: int) -> List[Tuple[int, int]]:
+    return [started.get(timeout=30) for _ in range(count)]
+
+
+def test_supervisor_runs_one_process_per_worker():
+    started = multiprocessing.get_context("spawn").Queue()
+    supervisor = WorkerSupervisor(
+        target=crash_once, workers=3, logger=Loguru(), args=(started, False)
+    )
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+
+    workers = collect(started, count=3)
+    supervisor.stop()
+    thread.join(timeout=30)
+
+    assert sorted(worker_idx for worker_idx, _ in workers) == [0, 1, 2]
+    assert len({pid for _, pid in workers}) == 3
+    assert not thread.is_alive()
+    assert supervisor.processes == {}
+
+
+def test_supervisor_restarts_crashed_workers():
+    started = multiprocessing.get_context("spawn").Queue()
+    supervisor = WorkerSupervisor(
+        target=crash_once,
+        workers=2,
+        logger=Loguru(),
+        args=(started, True),
+        restart_delay_seconds=0.01,
+    )
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+
+    # every worker crashes right away, so each one has to be started again
+    workers = collect(started, count=6)
+    supervisor.stop()
+    thread.join(timeout=30)
+
+    assert [worker_idx for worker_idx, _ in workers].count(0) >= 2
+    assert [worker_idx for worker_idx, _ in workers].count(1) >= 2
+    assert len({pid for _, pid in workers}) == 6
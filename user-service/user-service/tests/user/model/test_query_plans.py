@@ -0,0 +1,238 @@
+from datetime import date
+from typing import Any, Callable, List, Set, Tuple
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm.session import Session
+
+from core.model import WeekDay
+from core.pagination import decode_cursor
+from core.schema import DayOfWeek
+from db.sqlite import Sqlite
+from user.model import (
+    PreferredTimeSlot,
+    User,
+    UserPreference,
+    UserPreferenceWeekDay,
+    UserRole,
+)
+from user.schema import TimeSlotInput, UserInput, UserPreferenceInput
+
+
+@pytest.fixture
+def db() -> Sqlite:
+    db = Sqlite(db_path="sqlite:///:memory:")
+    with Session(db.engine) as session:
+        for idx in range(3):
+            user = User.add_user(
+                session=session,
+                user=UserInput(
+                    first_name="Joe",
+                    last_name=f"Doe {idx}",
+                    email=f"joeDoe{idx}@email.com",
+                    role="admin",
+                    password="admin",
+                ),
+                hashed_password="hashed",
+            ).unwrap()
+            UserPreference.add_user_preference(
+                session=session,
+                user_id=str(user.id),
+                user_preference=UserPreferenceInput(
+                    start_date=date(2024, 12, 5),
+                    end_date=date(2024, 12, 10),
+                    is_active=True,
+                    time_slots=[TimeSlotInput(start_time="10:15")],
+                    days_of_week=[DayOfWeek.MONDAY],
+                ),
+            ).unwrap()
+    return db
+
+
+def first_user(session: Session) -> User:
+    return session.query(User).filter_by(email="joeDoe0@email.com").one()
+
+
+def first_preference(session: Session) -> UserPreference:
+    return session.query(UserPreference).filter_by(user_id=first_user(session).id).one()
+
+
+# (model query, tables it may scan in full since it lists all their rows)
+MODEL_QUERIES: List[Tuple[str, Callable[[Session], Any], Set[str]]] = [
+    (
+        "User.get_users",
+        lambda session: User.get_users(session=session),
+        {"user_account"},
+    ),
+    (
+        "User.get_user_by_id",
+        lambda session: User.get_user_by_id(
+            session=session, id=str(first_user(session).id)
+        ),
+        set(),
+    ),
+    (
+        "User.get_users_outputs",
+        lambda session: User.get_users_outputs(session=session),
+        {"user_account"},
+    ),
+    (
+        "User.get_users_outputs_page",
+        lambda session: User.get_users_outputs_page(
+            session=session,
+            limit=1,
+            after=decode_cursor(User.get_users_outputs_page(session=session, limit=1).unwrap()[1]),  # type: ignore[arg-type]
+        ),
+        set(),
+    ),
+    (
+        "User.stream_users_outputs",
+        lambda session: list(User.stream_users_outputs(session=session, chunk_size=2)),
+        set(),
+    ),
+    (
+        "User.get_user_output_by_id",
+        lambda session: User.get_user_output_by_id(
+            session=session, id=str(first_user(session).id)
+        ),
+        set(),
+    ),
+    (
+        "UserPreference.get_users_preferences_outputs",
+        lambda session: UserPreference.get_users_preferences_outputs(session=session),
+        {"user_preference", "preferred_time_slot", "user_preference_week_day"},
+    ),
+    (
+        "UserPreference.get_users_preferences_outputs_page",
+        lambda session: UserPreference.get_users_preferences_outputs_page(
+            session=session, limit=2
+        ),
+        set(),
+    ),
+    (
+        "UserPreference.stream_users_preferences_outputs",
+        lambda session: list(
+            UserPreference.stream_users_preferences_outputs(
+                session=session, chunk_size=2
+            )
+        ),
+        set(),
+    ),
+    (
+        "UserPreference.get_user_preferences_outputs",
+        lambda session: UserPreference.get_user_preferences_outputs(
+            session=session, user_id=str(first_user(session).id)
+        ),
+        set(),
+    ),
+    (
+        "User.get_user_by_email",
+        lambda session: User.get_user_by_email(
+            session=session, email="joeDoe1@email.com"
+        ),
+        set(),
+    ),
+    (
+        "User.role.users",
+        lambda session: list(first_user(session).role.users),
+        set(),
+    ),
+    (
+        "UserRole.get_or_create",
+        lambda session: UserRole.get_or_create(session=session, role="admin"),
+        set(),
+    ),
+    (
+        "WeekDay.get_or_create",
+        lambda session: WeekDay.get_or_create(
+            session=session, week_day=DayOfWeek.MONDAY
+        ),
+        set(),
+    ),
+    (
+        "WeekDay.get_or_add_many",
+        lambda session: WeekDay.get_or_add_many(
+            session=session, week_days=[DayOfWeek.MONDAY, DayOfWeek.FRIDAY]
+        ),
+        set(),
+    ),
+    (
+        "UserPreference.get_users_preferences",
+        lambda session: UserPreference.get_users_preferences(session=session),
+        {"user_preference"},
+    ),
+    (
+        "UserPreference.get_user_preferences",
+        lambda session: UserPreference.get_user_preferences(
+            session=session, user_id=str(first_user(session).id)
+        ),
+        set(),
+    ),
+    (
+        "User.preferences",
+        lambda session: [
+            (preference.time_slots, preference.days_of_week)
+            for preference in first_user(session).preferences
+        ],
+        set(),
+    ),
+    (
+        "UserPreferenceWeekDay.remove_preference_week_days",
+        lambda session: UserPreferenceWeekDay.remove_preference_week_days(
+            session=session, user_preference_id=str(first_preference(session).id)
+        ),
+        set(),
+    ),
+    (
+        "PreferredTimeSlot.remove_time_slot",
+        lambda session: PreferredTimeSlot.remove_time_slot(
+            session=session,
+            time_slot_id=str(first_preference(session).time_slots[0].id),
+        ),
+        set(),
+    ),
+]
+
+
+def full_scans(session: Session, statement: str, parameters: Any) -> Set[str]:
+    plan = session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    # e.g. 'SCAN user_preference' against 'SEARCH user_preference USING INDEX ...'
+    return {
+        detail.split()[1]
+        for _, _, _, detail in plan
+        if detail.startswith("SCAN ") and "USING" not in detail
+    }
+
+
+@pytest.mark.parametrize(
+    "name, query, listed_tables",
+    MODEL_QUERIES,
+    ids=[name for name, _, _ in MODEL_QUERIES],
+)
+def test_model_queries_do_not_scan_whole_tables(
+    db: Sqlite,
+    name: str,
+    query: Callable[[Session], Any],
+    listed_tables: Set[str],
+):
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    with Session(db.engine) as session:
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            query(session)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert statements, name
+        for statement, parameters in statements:
+            scanned = full_scans(session, statement, parameters) - listed_tables
+            assert not scanned, f"{name} scans {scanned}:\n{statement}"
+
+        session.rollback()
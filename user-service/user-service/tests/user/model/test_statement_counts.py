@@ -0,0 +1,245 @@
+import re
+from datetime import date
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm.session import Session
+
+from core.model import WeekDay
+from core.reference_cache import ReferenceCache
+from core.schema import DayOfWeek
+from db.sqlite import Sqlite
+from user.model import User, UserPreference, UserPreferenceWeekDay, UserRole
+from user.schema import (
+    TimeSlotInput,
+    UserInput,
+    UserPreferenceInput,
+    UserPreferenceUpdate,
+)
+
+
+@pytest.fixture
+def db() -> Sqlite:
+    return Sqlite(db_path="sqlite:///:memory:")
+
+
+@pytest.fixture
+def statements(db: Sqlite) -> Iterator[List[str]]:
+    statements: List[str] = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", on_execute)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", on_execute)
+
+
+def user_input(email: str) -> UserInput:
+    return UserInput(
+        first_name="Joe",
+        last_name="Doe",
+        email=email,
+        role="admin",
+        password="admin",
+    )
+
+
+def user_preference_input() -> UserPreferenceInput:
+    return UserPreferenceInput(
+        start_date=date(2024, 12, 5),
+        end_date=date(2024, 12, 10),
+        is_active=True,
+        time_slots=[
+            TimeSlotInput(start_time="10:15"),
+            TimeSlotInput(start_time="11:15"),
+        ],
+        days_of_week=[DayOfWeek.MONDAY, DayOfWeek.TUESDAY],
+    )
+
+
+def test_add_user_statements(db: Sqlite, statements: List[str]):
+    with Session(db.engine, expire_on_commit=False) as session:
+        # role lookup, role insert, user insert
+        User.add_user(
+            session=session, user=user_input("joe0@email.com"), hashed_password="hashed"
+        ).unwrap().to_schema()
+        assert len(statements) == 3
+
+        statements.clear()
+        # role lookup, user insert
+        User.add_user(
+            session=session, user=user_input("joe1@email.com"), hashed_password="hashed"
+        ).unwrap().to_schema()
+        assert len(statements) == 2
+
+
+def test_add_user_preference_statements(db: Sqlite, statements: List[str]):
+    with Session(db.engine, expire_on_commit=False) as session:
+        user = User.add_user(
+            session=session, user=user_input("joe@email.com"), hashed_password="hashed"
+        ).unwrap()
+
+        statements.clear()
+        # week days lookup, week days insert, preference insert, time slots insert, week days link insert
+        UserPreference.add_user_preference(
+            session=session,
+            user_id=str(user.id),
+            user_preference=user_preference_input(),
+        ).unwrap().to_schema()
+        assert len(statements) == 5
+
+        statements.clear()
+        # same, the week days exist already
+        UserPreference.add_user_preference(
+            session=session,
+            user_id=str(user.id),
+            user_preference=user_preference_input(),
+        ).unwrap().to_schema()
+        assert len(statements) == 4
+
+
+def test_add_user_statements_with_role_cache(db: Sqlite, statements: List[str]):
+    role_cache = ReferenceCache(model=UserRole, name_column="role")
+    with Session(db.engine, expire_on_commit=False) as session:
+        role_cache.load(session=session)
+
+        statements.clear()
+        # role reload on the miss, role insert, user insert
+        User.add_user(
+            session=session,
+            user=user_input("joe0@email.com"),
+            hashed_password="hashed",
+            role_cache=role_cache,
+        ).unwrap().to_schema()
+        assert len(statements) == 3
+
+        statements.clear()
+        # role reload on the miss (the role was added after the last load), user insert
+        User.add_user(
+            session=session,
+            user=user_input("joe1@email.com"),
+            hashed_password="hashed",
+            role_cache=role_cache,
+        ).unwrap().to_schema()
+        assert len(statements) == 2
+
+    with Session(db.engine, expire_on_commit=False) as session:
+        statements.clear()
+        # user insert
+        user = User.add_user(
+            session=session,
+            user=user_input("joe2@email.com"),
+            hashed_password="hashed",
+            role_cache=role_cache,
+        ).unwrap()
+        assert user.to_schema().role == "admin"
+        assert len(statements) == 1
+
+
+def test_add_user_preference_does_not_touch_week_days_with_cache(
+    db: Sqlite, statements: List[str]
+):
+    week_day_cache = ReferenceCache(model=WeekDay, name_column="name")
+    with Session(db.engine, expire_on_commit=False) as session:
+        for day in DayOfWeek:
+            WeekDay.get_or_create(session=session, week_day=day)
+        week_day_cache.load(session=session)
+
+        user = User.add_user(
+            session=session, user=user_input("joe@email.com"), hashed_password="hashed"
+        ).unwrap()
+
+    with Session(db.engine, expire_on_commit=False) as session:
+        user_preference = user_preference_input()
+        user_preference.days_of_week = [
+            DayOfWeek.MONDAY,
+            DayOfWeek.TUESDAY,
+            DayOfWeek.WEDNESDAY,
+            DayOfWeek.THURSDAY,
+            DayOfWeek.FRIDAY,
+        ]
+
+        statements.clear()
+        # preference insert, time slots insert, week days link insert
+        output = (
+            UserPreference.add_user_preference(
+                session=session,
+                user_id=str(user.id),
+                user_preference=user_preference,
+                week_day_cache=week_day_cache,
+            )
+            .unwrap()
+            .to_schema()
+        )
+        assert output.days_of_week == user_preference.days_of_week
+        assert len(statements) == 3
+        assert not any(
+            re.search(r"\bweek_day\b", statement) for statement in statements
+        )
+
+
+def test_update_user_preference_only_writes_changed_week_days(
+    db: Sqlite, statements: List[str]
+):
+    with Session(db.engine, expire_on_commit=False) as session:
+        user = User.add_user(
+            session=session, user=user_input("joe@email.com"), hashed_password="hashed"
+        ).unwrap()
+        user_preference = UserPreference.add_user_preference(
+            session=session,
+            user_id=str(user.id),
+            user_preference=user_preference_input(),
+        ).unwrap()
+        monday_link = (
+            session.query(UserPreferenceWeekDay)
+            .join(WeekDay, WeekDay.id == UserPreferenceWeekDay.week_day_id)
+            .filter(WeekDay.name == DayOfWeek.MONDAY.value)
+            .one()
+        )
+
+        statements.clear()
+        output = (
+            UserPreference.update_user_preference(
+                session=session,
+                user_preference_id=str(user_preference.id),
+                updated_user_preference=UserPreferenceUpdate(
+                    days_of_week=[DayOfWeek.MONDAY, DayOfWeek.FRIDAY]
+                ),
+            )
+            .unwrap()
+            .to_schema()
+        )
+        assert output.days_of_week == [DayOfWeek.MONDAY, DayOfWeek.FRIDAY]
+
+        link_writes = [
+            statement.split()[0]
+            for statement in statements
+            if re.match(
+                r"(DELETE FROM|INSERT INTO) user_preference_week_day ", statement
+            )
+        ]
+        assert link_writes == ["DELETE", "INSERT"]
+
+        # the link of the day that stayed keeps its row
+        assert (
+            session.query(UserPreferenceWeekDay).filter_by(id=monday_link.id).count()
+            == 1
+        )
+
+
+def test_add_users_inserts_each_chunk_at_once(db: Sqlite, statements: List[str]):
+    with Session(db.engine, expire_on_commit=False) as session:
+        users = [user_input(f"joe{idx}@email.com") for idx in range(5)]
+
+        # role lookup, role insert, then per chunk: email lookup, users insert
+        new_users = User.add_users(
+            session=session,
+            users=users + [user_input("joe0@email.com")],
+            hashed_passwords=["hashed"] * 6,
+            chunk_size=3,
+        ).unwrap()
+        assert len(statements) == 2 + 2 * 2
+        assert [new_user is not None for new_user in new_users] == [True] * 5 + [False]
+        assert new_users[0].to_schema().role == "admin"
@@ -4,6 +4,8 @@ from sqlalchemy.orm.session import Session
 from db.sqlite import Sqlite
 from db.dataclasses import DbErrorType
 
+from core.pagination import decode_cursor
+
 from user.model import User
 from user.schema import UserInput
 
@@ -251,3 +253,91 @@ def test_remove_user_by_email(db: Sqlite):
         assert remove_user_result.is_ok() is True
 
         session.rollback()
+
+
+def add_users(session: Session, count: int) -> None:
+    for idx in range(count):
+        result = User.add_user(
+            session=session,
+            user=UserInput(
+                first_name="Joe",
+                last_name=f"Doe {idx}",
+                email=f"joeDoe{idx}@email.com",
+                role="admin",
+                password="admin",
+            ),
+            hashed_password="hashed",
+        )
+        assert result.is_ok() is True
+
+
+def test_get_users_outputs_page_walks_all_users_with_the_cursor(db: Sqlite):
+    with Session(db.engine) as session:
+        add_users(session=session, count=7)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            after = decode_cursor(cursor) if cursor is not None else None
+            page_result = User.get_users_outputs_page(
+                session=session, limit=3, after=after
+            )
+            assert page_result.is_ok() is True
+
+            users, cursor = page_result.unwrap()
+            seen.extend(str(user.email) for user in users)
+            pages += 1
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert sorted(seen) == sorted(f"joeDoe{idx}@email.com" for idx in range(7))
+
+        session.rollback()
+
+
+def test_stream_users_outputs_yields_chunks(db: Sqlite):
+    with Session(db.engine) as session:
+        add_users(session=session, count=5)
+
+        chunks = list(User.stream_users_outputs(session=session, chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert all(user.role == "admin" for chunk in chunks for user in chunk)
+
+        session.rollback()
+
+
+def test_users_outputs_match_the_orm_objects(db: Sqlite):
+    with Session(db.engine) as session:
+        add_users(session=session, count=5)
+        expected = sorted(
+            (
+                user.to_schema().model_dump()
+                for user in User.get_users(session).unwrap()
+            ),
+            key=lambda user: user["id"],
+        )
+
+        outputs = User.get_users_outputs(session=session).unwrap()
+        assert (
+            sorted(
+                (output.model_dump() for output in outputs), key=lambda user: user["id"]
+            )
+            == expected
+        )
+
+        page, next_cursor = User.get_users_outputs_page(
+            session=session, limit=3
+        ).unwrap()
+        assert [output.model_dump() for output in page] == expected[:3]
+        assert decode_cursor(next_cursor) == expected[2]["id"]  # type: ignore[arg-type]
+
+        chunks = list(User.stream_users_outputs(session=session, chunk_size=2))
+        assert [output.model_dump() for chunk in chunks for output in chunk] == expected
+
+        output = User.get_user_output_by_id(
+            session=session, id=expected[0]["id"]
+        ).unwrap()
+        assert output.model_dump() == expected[0]
+        assert User.get_user_output_by_id(session=session, id="missing").is_err()
+
+        session.rollback()
@@ -12,6 +12,7 @@ from user.schema import (
     UserPreferenceUpdate,
 )
 from core.schema import DayOfWeek
+from core.pagination import decode_cursor
 
 
 @pytest.fixture
@@ -214,3 +215,153 @@ def test_update_user_preference(db: Sqlite):
         assert len(added_user_preference.days_of_week) == 2
         assert str(added_user_preference.days_of_week[0].name) == "saturday"
         assert str(added_user_preference.days_of_week[1].name) == "sunday"
+
+
+def test_get_users_preferences_outputs_page_and_stream(db: Sqlite):
+    with Session(db.engine) as session:
+        user_result = User.add_user(
+            session=session,
+            user=UserInput(
+                first_name="Joe",
+                last_name="Doe",
+                email="joeDoe@email.com",
+                role="admin",
+                password="admin",
+            ),
+            hashed_password="hashed",
+        )
+        assert user_result.is_ok() is True
+        added_user = user_result.unwrap()
+
+        for day in range(1, 6):
+            user_preference_result = UserPreference.add_user_preference(
+                session=session,
+                user_id=str(added_user.id),
+                user_preference=UserPreferenceInput(
+                    start_date=date(2024, 12, day),
+                    end_date=date(2024, 12, 10),
+                    is_active=True,
+                    time_slots=[TimeSlotInput(start_time="10:15")],
+                    days_of_week=[DayOfWeek.MONDAY],
+                ),
+            )
+            assert user_preference_result.is_ok() is True
+
+        page_result = UserPreference.get_users_preferences_outputs_page(
+            session=session, limit=3
+        )
+        assert page_result.is_ok() is True
+
+        first_page, next_cursor = page_result.unwrap()
+        assert len(first_page) == 3
+        assert next_cursor is not None
+        assert all(len(preference.time_slots) == 1 for preference in first_page)
+
+        page_result = UserPreference.get_users_preferences_outputs_page(
+            session=session, limit=3, after=decode_cursor(next_cursor)
+        )
+        assert page_result.is_ok() is True
+
+        second_page, next_cursor = page_result.unwrap()
+        assert len(second_page) == 2
+        assert next_cursor is None
+
+        chunks = list(
+            UserPreference.stream_users_preferences_outputs(
+                session=session, chunk_size=2
+            )
+        )
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert {preference.id for chunk in chunks for preference in chunk} == {
+            preference.id for preference in first_page + second_page
+        }
+        assert all(
+            preference.days_of_week == [DayOfWeek.MONDAY]
+            for chunk in chunks
+            for preference in chunk
+        )
+
+        session.rollback()
+
+
+def test_users_preferences_outputs_match_the_orm_objects(db: Sqlite):
+    with Session(db.engine) as session:
+        user_ids = []
+        for idx in range(2):
+            user = User.add_user(
+                session=session,
+                user=UserInput(
+                    first_name="Joe",
+                    last_name="Doe",
+                    email=f"joeDoe{idx}@email.com",
+                    role="admin",
+                    password="admin",
+                ),
+                hashed_password="hashed",
+            ).unwrap()
+            user_ids.append(str(user.id))
+
+            for day in range(1, 4):
+                UserPreference.add_user_preference(
+                    session=session,
+                    user_id=str(user.id),
+                    user_preference=UserPreferenceInput(
+                        start_date=date(2024, 12, day),
+                        end_date=date(2024, 12, 10),
+                        is_active=day % 2 == 0,
+                        time_slots=[
+                            TimeSlotInput(start_time="10:15"),
+                            TimeSlotInput(start_time="8:00"),
+                        ],
+                        days_of_week=[DayOfWeek.MONDAY, DayOfWeek.FRIDAY],
+                    ),
+                ).unwrap()
+
+        def dumped(outputs):
+            return sorted(
+                (
+                    {
+                        **output.model_dump(),
+                        "days_of_week": sorted(output.days_of_week),
+                        "time_slots": sorted(
+                            output.model_dump()["time_slots"],
+                            key=lambda time_slot: time_slot["id"],
+                        ),
+                    }
+                    for output in outputs
+                ),
+                key=lambda output: output["id"],
+            )
+
+        expected = dumped(
+            user_preference.to_schema()
+            for user_preference in UserPreference.get_users_preferences(
+                session=session
+            ).unwrap()
+        )
+
+        outputs = UserPreference.get_users_preferences_outputs(session=session).unwrap()
+        assert dumped(outputs) == expected
+
+        page, next_cursor = UserPreference.get_users_preferences_outputs_page(
+            session=session, limit=4
+        ).unwrap()
+        assert dumped(page) == expected[:4]
+        assert next_cursor is not None
+
+        chunks = list(
+            UserPreference.stream_users_preferences_outputs(
+                session=session, chunk_size=4
+            )
+        )
+        assert [len(chunk) for chunk in chunks] == [4, 2]
+        assert dumped(output for chunk in chunks for output in chunk) == expected
+
+        outputs = UserPreference.get_user_preferences_outputs(
+            session=session, user_id=user_ids[0]
+        ).unwrap()
+        assert dumped(outputs) == [
+            output for output in expected if output["user_id"] == user_ids[0]
+        ]
+
+        session.rollback()
@@ -0,0 +1,197 @@
+import random
+from datetime import date, time, timedelta
+from typing import List, Set
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from core.schema import DayOfWeek
+from db.sqlite import Sqlite
+from user.matching import (
+    PreferenceMatcher,
+    PreferenceMatcherCache,
+    Slot,
+    slot_time_mask,
+    time_bit,
+)
+from user.model import User, UserPreference
+from user.schema import TimeSlotInput, UserInput, UserPreferenceInput
+
+MONDAY = date(2024, 12, 2)
+
+
+def add_user(session: Session, idx: int) -> str:
+    return str(
+        User.add_user(
+            session=session,
+            user=UserInput(
+                first_name="Joe",
+                last_name=f"Doe {idx}",
+                email=f"joeDoe{idx}@email.com",
+                role="patient",
+                password="patient",
+            ),
+            hashed_password="hashed",
+        )
+        .unwrap()
+        .id
+    )
+
+
+def add_preference(
+    session: Session,
+    user_id: str,
+    days_of_week: List[DayOfWeek],
+    start_times: List[str],
+    start_date: date = MONDAY,
+    end_date: date = MONDAY + timedelta(days=13),
+    is_active: bool = True,
+) -> None:
+    UserPreference.add_user_preference(
+        session=session,
+        user_id=user_id,
+        user_preference=UserPreferenceInput(
+            start_date=start_date,
+            end_date=end_date,
+            is_active=is_active,
+            days_of_week=days_of_week,
+            time_slots=[
+                TimeSlotInput(start_time=start_time) for start_time in start_times
+            ],
+        ),
+    ).unwrap()
+
+
+@pytest.fixture
+def db() -> Sqlite:
+    return Sqlite(db_path="sqlite:///:memory:")
+
+
+def test_slot_time_mask():
+    assert slot_time_mask(9 * 60, 9 * 60 + 30) == time_bit(time(9, 0))
+    assert slot_time_mask(9 * 60, 10 * 60) == time_bit(time(9, 0)) | time_bit(
+        time(9, 30)
+    )
+    # NOTE: a slot overlapping part of a half hour still matches the times in it
+    assert slot_time_mask(9 * 60 + 20, 9 * 60 + 40) == time_bit(time(9, 0)) | time_bit(
+        time(9, 45)
+    )
+    assert slot_time_mask(23 * 60 + 30, 24 * 60) == 1 << 47
+
+
+def test_match_loaded_preferences(db: Sqlite):
+    with Session(db.engine) as session:
+        users = [add_user(session, idx) for idx in range(5)]
+        add_preference(session, users[0], [DayOfWeek.MONDAY], ["9:00"])
+        add_preference(
+            session, users[1], [DayOfWeek.MONDAY, DayOfWeek.TUESDAY], ["9:15", "14:00"]
+        )
+        # not active, nor on a Monday, nor in the first week
+        add_preference(session, users[2], [DayOfWeek.MONDAY], ["9:00"], is_active=False)
+        add_preference(session, users[3], [DayOfWeek.WEDNESDAY], ["9:00"])
+        add_preference(
+            session,
+            users[4],
+            [DayOfWeek.MONDAY],
+            ["9:00"],
+            start_date=MONDAY + timedelta(days=7),
+        )
+        # a second preference of the same user matching the same slots
+        add_preference(session, users[0], [DayOfWeek.MONDAY], ["9:10"])
+
+        matcher = PreferenceMatcher.load(session=session)
+
+    assert len(matcher) == 5
+    slots: List[Slot] = [
+        (MONDAY, 9 * 60, 9 * 60 + 30),
+        (MONDAY + timedelta(days=7), 9 * 60, 10 * 60),
+        (MONDAY + timedelta(days=1), 14 * 60, 14 * 60 + 15),
+        (MONDAY, 10 * 60, 11 * 60),
+        (MONDAY + timedelta(days=14), 9 * 60, 10 * 60),
+        (MONDAY, 9 * 60, 9 * 60 + 30),
+    ]
+    matched = [set(matcher.user_ids_of(users)) for users in matcher.match(slots)]
+    assert matched == [
+        {users[0], users[1]},
+        {users[0], users[1], users[4]},
+        {users[1]},
+        set(),
+        set(),
+        {users[0], users[1]},
+    ]
+    assert all(
+        len(ids) == len(set(ids))
+        for ids in map(matcher.user_ids_of, matcher.match(slots))
+    )
+
+
+def test_match_agrees_with_a_row_by_row_check():
+    rng = random.Random(7)
+    preferences = 2_000
+    start_days = [MONDAY.toordinal() + rng.randrange(0, 30) for _ in range(preferences)]
+    matcher = PreferenceMatcher(
+        user_ids=[f"user-{idx}" for idx in range(preferences // 2)],
+        users=np.array(
+            [rng.randrange(preferences // 2) for _ in range(preferences)],
+            dtype=np.int32,
+        ),
+        start_days=np.array(start_days, dtype=np.int32),
+        end_days=np.array(
+            [day + rng.randrange(0, 30) for day in start_days], dtype=np.int32
+        ),
+        weekdays=np.array(
+            [rng.randrange(1, 128) for _ in range(preferences)], dtype=np.uint8
+        ),
+        time_bits=np.array(
+            [rng.getrandbits(48) for _ in range(preferences)], dtype=np.uint64
+        ),
+    )
+    slots: List[Slot] = []
+    for _ in range(200):
+        start_minute = rng.randrange(0, 24 * 60 - 15)
+        slots.append(
+            (
+                MONDAY + timedelta(days=rng.randrange(0, 60)),
+                start_minute,
+                rng.randrange(start_minute + 1, 24 * 60 + 1),
+            )
+        )
+
+    for (day, start_minute, end_minute), users in zip(slots, matcher.match(slots)):
+        expected: Set[int] = {
+            int(matcher.users[idx])
+            for idx in range(preferences)
+            if matcher.start_days[idx] <= day.toordinal() <= matcher.end_days[idx]
+            and matcher.weekdays[idx] & (1 << day.weekday())
+            and int(matcher.time_bits[idx]) & slot_time_mask(start_minute, end_minute)
+        }
+        assert users.tolist() == sorted(expected)
+
+
+def test_matcher_cache_reloads_when_invalidated_or_too_old():
+    loads: List[int] = []
+
+    def loader() -> PreferenceMatcher:
+        loads.append(len(loads))
+        return PreferenceMatcher(
+            user_ids=[],
+            users=np.empty(0, dtype=np.int32),
+            start_days=np.empty(0, dtype=np.int32),
+            end_days=np.empty(0, dtype=np.int32),
+            weekdays=np.empty(0, dtype=np.uint8),
+            time_bits=np.empty(0, dtype=np.uint64),
+        )
+
+    cache = PreferenceMatcherCache(loader=loader, max_age_s=60)
+    first = cache.get()
+    assert cache.get() is first
+    assert len(loads) == 1
+
+    cache.invalidate()
+    assert cache.get() is not first
+    assert len(loads) == 2
+
+    cache.max_age_s = 0
+    cache.get()
+    assert len(loads) == 3
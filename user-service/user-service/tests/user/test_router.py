@@ -0,0 +1,213 @@
+import json
+from typing import Any, List
+
+import pytest
+from sqlalchemy.orm import Session
+
+from paho.mqtt.client import MQTTMessage, MQTTv311
+
+from config.app import AppConfig
+from db.sqlite import Sqlite
+
+from user.model import User
+from user.router import UserMqttRouter
+from user.schema import UserInput
+
+
+class RecordingClient:
+    def __init__(self) -> None:
+        self.protocol = MQTTv311
+        self.published: List[Any] = []
+
+    def publish(self, topic: str, payload: bytes, properties=None):
+        self.published.append((topic, json.loads(payload)))
+
+
+@pytest.fixture
+def router() -> UserMqttRouter:
+    database = Sqlite(db_path="sqlite:///:memory:")
+    with Session(database.engine) as session:
+        for idx in range(5):
+            User.add_user(
+                session=session,
+                user=UserInput(
+                    first_name="Joe",
+                    last_name=f"Doe {idx}",
+                    email=f"joeDoe{idx}@email.com",
+                    role="admin",
+                    password="admin",
+                ),
+                hashed_password="hashed",
+            )
+
+    return UserMqttRouter(app_config=AppConfig.from_env(), database=database)
+
+
+def send(router: UserMqttRouter, method: str, path: str, data: Any) -> List[Any]:
+    client = RecordingClient()
+    message = MQTTMessage(topic=b"dit356g2/users/req")
+    message.payload = json.dumps(
+        {"msgId": "aabb", "method": method, "path": path, "data": data}
+    ).encode()
+    router.serve(client=client, userdata={}, msg=message)
+    return [payload for _, payload in client.published]
+
+
+def get_users(router: UserMqttRouter, data: Any) -> List[Any]:
+    return send(router, "GET", "/users", data)
+
+
+def test_get_users_without_paging_sends_every_user(router: UserMqttRouter):
+    [response] = get_users(router, data={})
+
+    assert response["status"] == 200
+    assert len(response["data"]) == 5
+
+
+def test_get_users_pages_follow_the_cursor(router: UserMqttRouter):
+    [first] = get_users(router, data={"limit": 3})
+    assert len(first["data"]["items"]) == 3
+    assert first["data"]["next_cursor"] is not None
+
+    [second] = get_users(
+        router, data={"limit": 3, "cursor": first["data"]["next_cursor"]}
+    )
+    assert len(second["data"]["items"]) == 2
+    assert second["data"]["next_cursor"] is None
+
+    emails = [
+        user["email"] for page in (first, second) for user in page["data"]["items"]
+    ]
+    assert sorted(emails) == [f"joeDoe{idx}@email.com" for idx in range(5)]
+
+
+def test_get_users_rejects_an_invalid_cursor(router: UserMqttRouter):
+    [response] = get_users(router, data={"limit": 3, "cursor": "not base64!"})
+
+    assert response["msgId"] == "aabb"
+    assert response["status"] == 400
+
+
+def test_get_users_streams_numbered_chunks(router: UserMqttRouter):
+    responses = get_users(router, data={"limit": 2, "stream": True})
+
+    assert [response["msgId"] for response in responses] == ["aabb"] * 3
+    assert [response["data"]["seq"] for response in responses] == [0, 1, 2]
+    assert [response["data"]["last"] for response in responses] == [
+        False,
+        False,
+        True,
+    ]
+    assert [len(response["data"]["items"]) for response in responses] == [2, 2, 1]
+
+
+def test_get_users_streams_one_empty_chunk_when_there_are_no_users():
+    router = UserMqttRouter(
+        app_config=AppConfig.from_env(), database=Sqlite(db_path="sqlite:///:memory:")
+    )
+
+    [response] = get_users(router, data={"stream": True})
+
+    assert response["data"] == {"seq": 0, "last": True, "items": []}
+
+
+def test_register_users_reports_each_user(router: UserMqttRouter):
+    client = RecordingClient()
+    message = MQTTMessage(topic=b"dit356g2/users/req")
+    message.payload = json.dumps(
+        {
+            "msgId": "aabb",
+            "method": "POST",
+            "path": "/users/bulk",
+            "data": [
+                {
+                    "first_name": "Jane",
+                    "last_name": "Doe",
+                    "email": email,
+                    "role": "patient",
+                    "password": "password",
+                }
+                for email in (
+                    "janeDoe@email.com",
+                    "joeDoe0@email.com",
+                    "janeDoe@email.com",
+                )
+            ],
+        }
+    ).encode()
+    router.serve(client=client, userdata={}, msg=message)
+
+    [(_, response)] = client.published
+    assert response["status"] == 200
+    assert [item["status"] for item in response["data"]] == [
+        "created",
+        "conflict",
+        "conflict",
+    ]
+    assert response["data"][0]["user"]["role"] == "patient"
+
+    with Session(router.database.engine) as session:
+        assert session.query(User).count() == 6
+
+
+def test_match_preferences_sees_the_preferences_just_added(router: UserMqttRouter):
+    with Session(router.database.engine) as session:
+        user_id = str(
+            session.query(User.id).filter_by(email="joeDoe0@email.com").scalar()
+        )
+
+    slots = [
+        {"id": "slot-1", "day": "2024-12-02", "start_time": "9:00", "end_time": "9:30"},
+        {"id": "slot-2", "day": "2024-12-03", "start_time": "9:00", "end_time": "9:30"},
+    ]
+    [before] = send(router, "POST", "/users/preferences/matches", {"slots": slots})
+    assert before["status"] == 200
+    assert [slot["matches"] for slot in before["data"]] == [0, 0]
+
+    [added] = send(
+        router,
+        "POST",
+        f"/users/{user_id}/preferences",
+        {
+            "start_date": "2024-12-01",
+            "end_date": "2024-12-31",
+            "is_active": True,
+            "days_of_week": ["monday"],
+            "time_slots": [{"start_time": "9:15"}],
+        },
+    )
+    assert added["status"] == 201
+
+    [after] = send(
+        router, "POST", "/users/preferences/matches", {"slots": slots, "limit": 1}
+    )
+    assert after["data"] == [
+        {
+            "id": "slot-1",
+            "day": "2024-12-02",
+            "start_time": "9:00",
+            "end_time": "9:30",
+            "matches": 1,
+            "user_ids": [user_id],
+        },
+        {
+            "id": "slot-2",
+            "day": "2024-12-03",
+            "start_time": "9:00",
+            "end_time": "9:30",
+            "matches": 0,
+            "user_ids": [],
+        },
+    ]
+
+
+def test_match_preferences_rejects_slots_ending_before_they_start(
+    router: UserMqttRouter,
+):
+    [response] = send(
+        router,
+        "POST",
+        "/users/preferences/matches",
+        {"slots": [{"day": "2024-12-02", "start_time": "10:00", "end_time": "9:00"}]},
+    )
+    assert response["status"] == 400
@@ -0,0 +1,208 @@
+import threading
+from datetime import date, time
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from core.model import WeekDay
+from core.schema import DayOfWeek
+from user.model import PreferredTimeSlot, UserPreference, UserPreferenceWeekDay
+
+# NOTE: preferred start times are matched by half hour, so that the 48 half hours of a day fit in one uint64
+TIME_BUCKET_MINUTES = 30
+
+# same numbering as 'date.weekday()', Monday is bit 0
+WEEKDAY_BITS: Dict[str, int] = {
+    day.value: 1 << idx for idx, day in enumerate(DayOfWeek)
+}
+
+# (day, start_minute, end_minute) of an availability slot
+Slot = Tuple[date, int, int]
+
+
+def time_bit(start_time: time) -> int:
+    return 1 << ((start_time.hour * 60 + start_time.minute) // TIME_BUCKET_MINUTES)
+
+
+def slot_time_mask(start_minute: int, end_minute: int) -> int:
+    # the half hours the slot overlaps, from its start to its last minute
+    first, last = (
+        start_minute // TIME_BUCKET_MINUTES,
+        (end_minute - 1) // TIME_BUCKET_MINUTES,
+    )
+    return ((1 << (last + 1)) - 1) ^ ((1 << first) - 1)
+
+
+class PreferenceMatcher:
+    """
+    The active user preferences as column arrays, one row per preference, matched against a batch of
+    availability slots at once.
+
+    A slot matches a preference when its day is between the preference's 'start_date' and 'end_date',
+    on one of its 'days_of_week' (a weekday bitmask), and one of its preferred start times falls in a half
+    hour the slot overlaps (a bitset of the day's half hours).
+    """
+
+    def __init__(
+        self,
+        user_ids: List[str],
+        users: np.ndarray,
+        start_days: np.ndarray,
+        end_days: np.ndarray,
+        weekdays: np.ndarray,
+        time_bits: np.ndarray,
+    ) -> None:
+        # NOTE: 'users' holds indexes into 'user_ids', the days are ordinals ('date.toordinal()')
+        self.user_ids = user_ids
+        self.users = users
+        self.start_days = start_days
+        self.end_days = end_days
+        self.weekdays = weekdays
+        self.time_bits = time_bits
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    @classmethod
+    def load(cls, session: Session) -> "PreferenceMatcher":
+        """
+        Loads the active preferences with three column-only queries, their rows are never hydrated into ORM objects.
+        """
+        user_idx: Dict[str, int] = dict()
+        preference_idx: Dict[str, int] = dict()
+        users: List[int] = []
+        start_days: List[int] = []
+        end_days: List[int] = []
+        for id, user_id, start_date, end_date in session.query(
+            UserPreference.id,
+            UserPreference.user_id,
+            UserPreference.start_date,
+            UserPreference.end_date,
+        ).filter(UserPreference.is_active.is_(True)):
+            preference_idx[id] = len(users)
+            users.append(user_idx.setdefault(user_id, len(user_idx)))
+            start_days.append(start_date.toordinal())
+            end_days.append(end_date.toordinal())
+
+        # NOTE: the bits are OR-ed into the arrays at once, not one row at a time
+        weekday_rows: List[int] = []
+        weekday_bits: List[int] = []
+        for user_preference_id, name in session.query(
+            UserPreferenceWeekDay.user_preference_id, WeekDay.name
+        ).join(WeekDay, WeekDay.id == UserPreferenceWeekDay.week_day_id):
+            idx = preference_idx.get(user_preference_id, None)
+            if idx is not None:
+                weekday_rows.append(idx)
+                weekday_bits.append(WEEKDAY_BITS[name])
+        weekdays = np.zeros(len(users), dtype=np.uint8)
+        np.bitwise_or.at(
+            weekdays,
+            np.array(weekday_rows, dtype=np.intp),
+            np.array(weekday_bits, dtype=np.uint8),
+        )
+
+        time_rows: List[int] = []
+        time_slot_bits: List[int] = []
+        for user_preference_id, start_time in session.query(
+            PreferredTimeSlot.user_preference_id, PreferredTimeSlot.start_time
+        ):
+            idx = preference_idx.get(user_preference_id, None)
+            if idx is not None:
+                time_rows.append(idx)
+                time_slot_bits.append(time_bit(start_time))
+        time_bits = np.zeros(len(users), dtype=np.uint64)
+        np.bitwise_or.at(
+            time_bits,
+            np.array(time_rows, dtype=np.intp),
+            np.array(time_slot_bits, dtype=np.uint64),
+        )
+
+        return cls(
+            user_ids=list(user_idx),
+            users=np.array(users, dtype=np.int32),
+            start_days=np.array(start_days, dtype=np.int32),
+            end_days=np.array(end_days, dtype=np.int32),
+            weekdays=weekdays,
+            time_bits=time_bits,
+        )
+
+    def match(self, slots: Sequence[Slot]) -> List[np.ndarray]:
+        """
+        The (sorted, distinct) indexes in 'user_ids' of the users matching each slot.
+
+        The slots are grouped by day and by the half hours they overlap, each day is one vectorized pass over
+        every preference and each group of half hours one more over the preferences left for that day.
+        """
+        by_day: Dict[date, Dict[int, List[int]]] = dict()
+        for slot_idx, (day, start_minute, end_minute) in enumerate(slots):
+            by_day.setdefault(day, dict()).setdefault(
+                slot_time_mask(start_minute, end_minute), []
+            ).append(slot_idx)
+
+        matches: List[np.ndarray] = [np.empty(0, dtype=np.int32)] * len(slots)
+        for day, slots_by_mask in by_day.items():
+            ordinal = day.toordinal()
+            candidates = np.flatnonzero(
+                (self.start_days <= ordinal)
+                & (self.end_days >= ordinal)
+                & ((self.weekdays & np.uint8(1 << day.weekday())) != 0)
+            )
+            candidate_users = self.users[candidates]
+            candidate_time_bits = self.time_bits[candidates]
+
+            for mask, slot_idxs in slots_by_mask.items():
+                # NOTE: a user with several matching preferences is one match
+                users = np.unique(
+                    candidate_users[(candidate_time_bits & np.uint64(mask)) != 0]
+                )
+                for slot_idx in slot_idxs:
+                    matches[slot_idx] = users
+
+        return matches
+
+    def user_ids_of(self, users: np.ndarray) -> List[str]:
+        return [self.user_ids[idx] for idx in users.tolist()]
+
+
+class PreferenceMatcherCache:
+    """
+    The matcher of the current preferences, loaded on first use and loaded again once older than 'max_age_s'
+    or after 'invalidate' (when this process changed preferences, other replicas' changes wait for 'max_age_s').
+    """
+
+    def __init__(
+        self, loader: Callable[[], PreferenceMatcher], max_age_s: float
+    ) -> None:
+        self.loader = loader
+        self.max_age_s = max_age_s
+        self.matcher: Optional[PreferenceMatcher] = None
+        self.loaded_at = 0.0
+        # NOTE: bumped by 'invalidate', a change made while loading is then not lost
+        self.generation = 0
+        self.loaded_generation = -1
+        self.lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return (
+            self.loaded_generation == self.generation
+            and monotonic() - self.loaded_at < self.max_age_s
+        )
+
+    def get(self) -> PreferenceMatcher:
+        matcher = self.matcher
+        if matcher is not None and self.is_fresh():
+            return matcher
+
+        # NOTE: one load at a time, the requests waiting on it then share its matcher
+        with self.lock:
+            if self.matcher is not None and self.is_fresh():
+                return self.matcher
+            generation, loaded_at = self.generation, monotonic()
+            self.matcher = self.loader()
+            self.loaded_generation, self.loaded_at = generation, loaded_at
+            return self.matcher
+
+    def invalidate(self) -> None:
+        self.generation += 1
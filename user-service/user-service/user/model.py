@@ -1,12 +1,25 @@
-from typing import Tuple, List, Iterable, Type, cast
+from collections import defaultdict
+from typing import (
+    DefaultDict,
+    Optional,
+    Tuple,
+    List,
+    Iterable,
+    Iterator,
+    Set,
+    Type,
+    cast,
+)
 from datetime import time, date, datetime
 from dataclasses import asdict
 
-from sqlalchemy import Boolean, Column, Date, String, ForeignKey, Time
+from sqlalchemy import Boolean, Column, Date, Row, String, ForeignKey, Time
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload, relationship, Session
+from sqlalchemy.orm import joinedload, relationship, selectinload, Query, Session
 
 from core.model import WeekDay
+from core.pagination import batched, keyset_page
+from core.reference_cache import ReferenceCache
 
 from db.model import BaseModel
 from db.dataclasses import DbResult, DbErrorType
@@ -25,6 +38,9 @@ from user.schema import (
     TimeSlotInput,
 )
 
+# NOTE: well below SQLite's limit of bound parameters per statement (for the email lookup of a chunk)
+BULK_INSERT_CHUNK_SIZE = 500
+
 
 class UserRole(BaseModel):
     __tablename__ = "user_role"
@@ -56,6 +72,33 @@ class UserRole(BaseModel):
             )
         )
 
+    @classmethod
+    def get_or_add_many(
+        cls,
+        session: Session,
+        roles: Iterable[str],
+        cache: Optional[ReferenceCache["UserRole"]] = None,
+    ) -> List["UserRole"]:
+        """
+        Looks all the roles up in one query (or in the 'cache', without any), the missing ones are only
+        added to the session (they are inserted with the rest of the caller's transaction, which commits them).
+        """
+
+        names = list(dict.fromkeys(roles))
+        if cache is not None:
+            return cache.resolve(session=session, names=names)
+
+        existing_roles = {
+            user_role.role: user_role
+            for user_role in session.query(cls).filter(cls.role.in_(names))
+        }
+        for name in names:
+            if name not in existing_roles:
+                existing_roles[name] = UserRole(role=name)
+                session.add(existing_roles[name])
+
+        return [existing_roles[name] for name in names]
+
     @classmethod
     def add_user_role(cls, session: Session, role: str) -> DbResult["UserRole"]:
         try:
@@ -110,20 +153,24 @@ class PreferredTimeSlot(BaseModel):
 
     start_time = Column(Time, nullable=False)
     user_preference_id = Column(
-        String, ForeignKey("user_preference.id"), nullable=False
+        String, ForeignKey("user_preference.id"), nullable=False, index=True
     )
 
     # many-to-one
     preference = relationship("UserPreference", back_populates="time_slots")
 
+    @staticmethod
+    def parse_start_time(time_slot: TimeSlotInput) -> time:
+        hour, minutes = time_slot.start_time.split(":")
+        return time(hour=int(hour), minute=int(minutes))
+
     @classmethod
     def add_time_slot(
         cls, session: Session, user_preference_id: str, time_slot: TimeSlotInput
     ) -> DbResult["PreferredTimeSlot"]:
         try:
-            hour, minutes = time_slot.start_time.split(":")
             new_time_slot = PreferredTimeSlot(
-                start_time=time(hour=int(hour), minute=int(minutes)),
+                start_time=cls.parse_start_time(time_slot),
                 user_preference_id=user_preference_id,
             )
             session.add(new_time_slot)
@@ -147,43 +194,6 @@ class PreferredTimeSlot(BaseModel):
 
         return DbResult.as_success(data=new_time_slot)
 
-    @classmethod
-    def add_time_slots(
-        cls,
-        session: Session,
-        user_preference_id: str,
-        time_slots: Iterable[TimeSlotInput],
-    ) -> DbResult[List["PreferredTimeSlot"]]:
-        try:
-            new_time_slots = []
-            for time_slot in time_slots:
-                hour, minutes = time_slot.start_time.split(":")
-                new_time_slots.append(
-                    PreferredTimeSlot(
-                        start_time=time(hour=int(hour), minute=int(minutes)),
-                        user_preference_id=user_preference_id,
-                    )
-                )
-
-            session.add_all(new_time_slots)
-            session.commit()
-        except IntegrityError:
-            session.rollback()
-            return DbResult.as_error(
-                message="Time slot already exists",
-                details="Time slot already exists",
-                error_type=DbErrorType.RECORD_ALREADY_EXIST,
-            )
-        except Exception as e:
-            session.rollback()
-            return DbResult.as_error(
-                message="Something went wrong while adding time slots",
-                details=str(e),
-                error_type=DbErrorType.UNKNOWN_ERROR,
-            )
-
-        return DbResult.as_success(data=new_time_slots)
-
     @classmethod
     def remove_time_slot(cls, session: Session, time_slot_id: str) -> DbResult[None]:
         time_slot = session.query(cls).filter_by(id=time_slot_id).first()
@@ -217,44 +227,9 @@ class UserPreferenceWeekDay(BaseModel):
     __tablename__ = "user_preference_week_day"
 
     user_preference_id = Column(
-        String, ForeignKey("user_preference.id"), nullable=False
+        String, ForeignKey("user_preference.id"), nullable=False, index=True
     )
-    week_day_id = Column(String, ForeignKey("week_day.id"), nullable=False)
-
-    @classmethod
-    def add_preference_week_days(
-        cls, session: Session, user_preference_id: str, week_days: Iterable[DayOfWeek]
-    ) -> DbResult["List[UserPreferenceWeekDay]"]:
-        try:
-            new_preference_week_days = []
-            for week_day in week_days:
-                week_day_result = WeekDay.get_or_create(
-                    session=session, week_day=week_day
-                )
-                if week_day_result.is_err():
-                    session.rollback()
-                    return DbResult.as_error(**asdict(week_day_result.unwrap_err()))
-
-                existing_week_day, _ = week_day_result.unwrap()
-
-                new_preference_week_days.append(
-                    UserPreferenceWeekDay(
-                        user_preference_id=user_preference_id,
-                        week_day_id=existing_week_day.id,
-                    )
-                )
-
-            session.add_all(new_preference_week_days)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            return DbResult.as_error(
-                message="Could not add week days to the user preference",
-                details=f"{e}",
-                error_type=DbErrorType.UNKNOWN_ERROR,
-            )
-
-        return DbResult.as_success(data=new_preference_week_days)
+    week_day_id = Column(String, ForeignKey("week_day.id"), nullable=False, index=True)
 
     @classmethod
     def remove_preference_week_days(
@@ -284,18 +259,43 @@ class UserPreferenceWeekDay(BaseModel):
         session: Session,
         user_preference_id: str,
         updated_week_days: Iterable[DayOfWeek],
+        week_day_cache: Optional[ReferenceCache[WeekDay]] = None,
     ) -> DbResult[List["UserPreferenceWeekDay"]]:
+        """
+        Only the links of the week days that changed are written: the removed ones in one DELETE
+        and the added ones in one INSERT, the others keep their rows. The caller commits.
+        """
+
         try:
-            cls.remove_preference_week_days(
-                session=session, user_preference_id=user_preference_id
-            )
-            result = cls.add_preference_week_days(
-                session=session,
-                user_preference_id=user_preference_id,
-                week_days=updated_week_days,
+            week_days = WeekDay.get_or_add_many(
+                session=session, week_days=updated_week_days, cache=week_day_cache
             )
-            if result.is_err():
-                return DbResult.as_error(**asdict(result.unwrap_err()))
+            # NOTE: the IDs of the week days that were missing are only generated when they are inserted
+            session.flush()
+
+            current_week_day_ids = {
+                week_day_id
+                for (week_day_id,) in session.query(cls.week_day_id).filter_by(
+                    user_preference_id=user_preference_id
+                )
+            }
+            updated_week_day_ids = [str(week_day.id) for week_day in week_days]
+
+            removed_week_day_ids = current_week_day_ids.difference(updated_week_day_ids)
+            if removed_week_day_ids:
+                session.query(cls).filter(
+                    cls.user_preference_id == user_preference_id,
+                    cls.week_day_id.in_(removed_week_day_ids),
+                ).delete(synchronize_session=False)
+
+            new_preference_week_days = [
+                UserPreferenceWeekDay(
+                    user_preference_id=user_preference_id, week_day_id=week_day_id
+                )
+                for week_day_id in updated_week_day_ids
+                if week_day_id not in current_week_day_ids
+            ]
+            session.add_all(new_preference_week_days)
         except Exception as e:
             session.rollback()
             return DbResult.as_error(
@@ -304,7 +304,7 @@ class UserPreferenceWeekDay(BaseModel):
                 error_type=DbErrorType.UNKNOWN_ERROR,
             )
 
-        return DbResult.as_success(data=result.unwrap())
+        return DbResult.as_success(data=new_preference_week_days)
 
 
 class UserPreference(BaseModel):
@@ -313,7 +313,7 @@ class UserPreference(BaseModel):
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
     is_active = Column(Boolean, nullable=False, default=True)
-    user_id = Column(String, ForeignKey("user_account.id"), nullable=False)
+    user_id = Column(String, ForeignKey("user_account.id"), nullable=False, index=True)
 
     # one-to-many
     time_slots = relationship(
@@ -331,46 +331,34 @@ class UserPreference(BaseModel):
 
     @classmethod
     def add_user_preference(
-        cls, session: Session, user_id: str, user_preference: UserPreferenceInput
+        cls,
+        session: Session,
+        user_id: str,
+        user_preference: UserPreferenceInput,
+        week_day_cache: Optional[ReferenceCache[WeekDay]] = None,
     ) -> DbResult["UserPreference"]:
+        # NOTE: one transaction, flushed once on commit, the response is built from the objects
+        # already in the session (with 'expire_on_commit=False' they are not reloaded after it)
         try:
             new_user_preference = UserPreference(
                 start_date=user_preference.start_date,
                 end_date=user_preference.end_date,
                 is_active=user_preference.is_active,
                 user_id=user_id,
+                time_slots=[
+                    PreferredTimeSlot(
+                        start_time=PreferredTimeSlot.parse_start_time(time_slot)
+                    )
+                    for time_slot in user_preference.time_slots
+                ],
+                days_of_week=WeekDay.get_or_add_many(
+                    session=session,
+                    week_days=user_preference.days_of_week,
+                    cache=week_day_cache,
+                ),
             )
             session.add(new_user_preference)
             session.commit()
-
-            time_slot_result = PreferredTimeSlot.add_time_slots(
-                session=session,
-                user_preference_id=str(new_user_preference.id),
-                time_slots=user_preference.time_slots,
-            )
-            if time_slot_result.is_err():
-                session.rollback()
-                return DbResult.as_error(**asdict(time_slot_result.unwrap_err()))
-
-            week_day_result = UserPreferenceWeekDay.add_preference_week_days(
-                session=session,
-                user_preference_id=str(new_user_preference.id),
-                week_days=user_preference.days_of_week,
-            )
-            if week_day_result.is_err():
-                session.rollback()
-                return DbResult.as_error(**asdict(week_day_result.unwrap_err()))
-
-            created_user_preference = (
-                session.query(cls)
-                .options(
-                    joinedload(cls.time_slots),
-                    joinedload(cls.days_of_week),
-                )
-                .filter_by(id=new_user_preference.id)
-                .first()
-            )
-
         except Exception as e:
             session.rollback()
             return DbResult.as_error(
@@ -379,16 +367,18 @@ class UserPreference(BaseModel):
                 error_type=DbErrorType.UNKNOWN_ERROR,
             )
 
-        return DbResult.as_success(data=created_user_preference)
+        return DbResult.as_success(data=new_user_preference)
 
     @classmethod
     def get_users_preferences(cls, session: Session) -> DbResult["List[UserPreference]"]:
         try:
+            # NOTE: a joined many-to-many is materialized by SQLite as a scan of the whole
+            # association table, 'selectinload' looks the week days up by index instead
             users_preferences = (
                 session.query(cls)
                 .options(
                     joinedload(cls.time_slots),
-                    joinedload(cls.days_of_week),
+                    selectinload(cls.days_of_week),
                 )
                 .all()
             )
@@ -402,7 +392,6 @@ class UserPreference(BaseModel):
 
         return DbResult.as_success(data=users_preferences)
 
-
     @classmethod
     def get_user_preferences(
         cls, session: Session, user_id: str
@@ -413,7 +402,7 @@ class UserPreference(BaseModel):
                 .filter_by(user_id=user_id)
                 .options(
                     joinedload(cls.time_slots),
-                    joinedload(cls.days_of_week),
+                    selectinload(cls.days_of_week),
                 )
                 .all()
             )
@@ -427,19 +416,158 @@ class UserPreference(BaseModel):
 
         return DbResult.as_success(data=user_preferences)
 
+    @classmethod
+    def output_query(cls, session: Session) -> Query:
+        # NOTE: the columns of 'UserPreferenceOutput' only, the rows are not hydrated into ORM objects
+        return session.query(
+            cls.id, cls.user_id, cls.start_date, cls.end_date, cls.is_active
+        )
+
+    @classmethod
+    def to_outputs(
+        cls, session: Session, rows: List[Row], every_row: bool = False
+    ) -> List[UserPreferenceOutput]:
+        """
+        Builds the outputs of rows of the 'output_query', with the time slots and week days of all of them
+        fetched in one (column-only) query each. With 'every_row', when the rows are all the preferences,
+        the time slots and week days are not filtered by preference.
+        """
+
+        time_slots_query = session.query(
+            PreferredTimeSlot.user_preference_id,
+            PreferredTimeSlot.id,
+            PreferredTimeSlot.start_time,
+        )
+        week_days_query = session.query(
+            UserPreferenceWeekDay.user_preference_id, WeekDay.name
+        ).join(WeekDay, WeekDay.id == UserPreferenceWeekDay.week_day_id)
+        if not every_row:
+            if not rows:
+                return []
+            ids = [row.id for row in rows]
+            time_slots_query = time_slots_query.filter(
+                PreferredTimeSlot.user_preference_id.in_(ids)
+            )
+            week_days_query = week_days_query.filter(
+                UserPreferenceWeekDay.user_preference_id.in_(ids)
+            )
+
+        time_slots: DefaultDict[str, List[TimeSlotOutput]] = defaultdict(list)
+        for user_preference_id, id, start_time in time_slots_query:
+            time_slots[user_preference_id].append(
+                TimeSlotOutput.model_construct(
+                    id=id, start_time=start_time.strftime("%H:%M")
+                )
+            )
+
+        days_of_week: DefaultDict[str, List[DayOfWeek]] = defaultdict(list)
+        for user_preference_id, name in week_days_query:
+            days_of_week[user_preference_id].append(DayOfWeek(name))
+
+        # NOTE: 'model_construct' skips validation, the values come straight from the database
+        return [
+            UserPreferenceOutput.model_construct(
+                id=row.id,
+                user_id=row.user_id,
+                start_date=row.start_date,
+                end_date=row.end_date,
+                is_active=row.is_active,
+                days_of_week=days_of_week.get(row.id, []),
+                time_slots=time_slots.get(row.id, []),
+            )
+            for row in rows
+        ]
+
+    @classmethod
+    def get_users_preferences_outputs(
+        cls, session: Session
+    ) -> DbResult[List[UserPreferenceOutput]]:
+        try:
+            users_preferences = cls.to_outputs(
+                session=session,
+                rows=cls.output_query(session=session).all(),
+                every_row=True,
+            )
+        except Exception as e:
+            session.rollback()
+            return DbResult.as_error(
+                message="Something went wrong while getting users preferences",
+                details=str(e),
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+        return DbResult.as_success(data=users_preferences)
+
+    @classmethod
+    def get_users_preferences_outputs_page(
+        cls, session: Session, limit: int, after: Optional[str] = None
+    ) -> DbResult[Tuple[List[UserPreferenceOutput], Optional[str]]]:
+        try:
+            rows, next_cursor = keyset_page(
+                query=cls.output_query(session=session),
+                key=cls.id,
+                limit=limit,
+                after=after,
+            )
+            users_preferences = cls.to_outputs(session=session, rows=rows)
+        except Exception as e:
+            session.rollback()
+            return DbResult.as_error(
+                message="Something went wrong while getting users preferences",
+                details=str(e),
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+        return DbResult.as_success(data=(users_preferences, next_cursor))
+
+    @classmethod
+    def stream_users_preferences_outputs(
+        cls, session: Session, chunk_size: int
+    ) -> Iterator[List[UserPreferenceOutput]]:
+        # NOTE: rows are fetched 'chunk_size' at a time, so only one chunk is held in memory
+        return (
+            cls.to_outputs(session=session, rows=rows)
+            for rows in batched(
+                cls.output_query(session=session)
+                .order_by(cls.id)
+                .yield_per(chunk_size),
+                size=chunk_size,
+            )
+        )
+
+    @classmethod
+    def get_user_preferences_outputs(
+        cls, session: Session, user_id: str
+    ) -> DbResult[List[UserPreferenceOutput]]:
+        try:
+            user_preferences = cls.to_outputs(
+                session=session,
+                rows=cls.output_query(session=session).filter_by(user_id=user_id).all(),
+            )
+        except Exception as e:
+            session.rollback()
+            return DbResult.as_error(
+                message="Something went wrong while getting user preference",
+                details=str(e),
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+        return DbResult.as_success(data=user_preferences)
+
     @classmethod
     def update_user_preference(
         cls,
         session: Session,
         user_preference_id: str,
         updated_user_preference: UserPreferenceUpdate,
+        week_day_cache: Optional[ReferenceCache[WeekDay]] = None,
     ) -> DbResult["UserPreference"]:
         try:
             user_preference = (
                 session.query(cls)
                 .options(
                     joinedload(cls.time_slots),
-                    joinedload(cls.days_of_week),
+                    selectinload(cls.days_of_week),
                 )
                 .filter_by(id=user_preference_id)
                 .first()
@@ -459,11 +587,14 @@ class UserPreference(BaseModel):
                         session=session,
                         user_preference_id=user_preference_id,
                         updated_week_days=updated_user_preference.days_of_week,
+                        week_day_cache=week_day_cache,
                     )
                 )
                 if update_week_days_result.is_err():
                     session.rollback()
-                    return DbResult.as_error(**asdict(update_week_days_result))
+                    return DbResult.as_error(
+                        **asdict(update_week_days_result.unwrap_err())
+                    )
                 del updated_user_preference_data["days_of_week"]
 
             for key, value in updated_user_preference_data.items():
@@ -526,7 +657,7 @@ class User(BaseModel):
     last_name = Column(String, nullable=False)
     email = Column(String, nullable=False, unique=True)
     password = Column(String, nullable=False)
-    role_id = Column(String, ForeignKey("user_role.id"), nullable=False)
+    role_id = Column(String, ForeignKey("user_role.id"), nullable=False, index=True)
 
     # many-to-one
     role = relationship("UserRole", back_populates="users")
@@ -537,30 +668,36 @@ class User(BaseModel):
     )
 
     @classmethod
-    def add_user(cls, session: Session, user: UserInput) -> DbResult["User"]:
-        result = UserRole.get_or_create(session=session, role=user.role)
-        if result.is_err():
-            return DbResult.as_error(**asdict(result.unwrap_err()))
-
-        role_output, _ = result.unwrap()
-
+    def add_user(
+        cls,
+        session: Session,
+        user: UserInput,
+        hashed_password: Optional[str] = None,
+        role_cache: Optional[ReferenceCache[UserRole]] = None,
+    ) -> DbResult["User"]:
+        # NOTE: one transaction, the role (looked up or created) is attached to the new user,
+        # so the response needs no query after the commit
         try:
+            if role_cache is not None:
+                user_role = role_cache.resolve(session=session, names=[user.role])[0]
+            else:
+                user_role = session.query(UserRole).filter_by(role=user.role).first()
+                if user_role is None:
+                    user_role = UserRole(role=user.role)
+
             new_user = User(
                 first_name=user.first_name,
                 last_name=user.last_name,
                 email=user.email,
-                password=hash_password(user.password),
-                role_id=role_output.id,
+                password=(
+                    hashed_password
+                    if hashed_password is not None
+                    else hash_password(user.password)
+                ),
+                role=user_role,
             )
             session.add(new_user)
             session.commit()
-
-            created_user = (
-                session.query(cls)
-                .options(joinedload(cls.role))
-                .filter_by(email=new_user.email)
-                .first()
-            )
         except IntegrityError:
             session.rollback()
             return DbResult.as_error(
@@ -569,7 +706,85 @@ class User(BaseModel):
                 error_type=DbErrorType.RECORD_ALREADY_EXIST,
             )
 
-        return DbResult.as_success(created_user)
+        return DbResult.as_success(new_user)
+
+    @classmethod
+    def add_users(
+        cls,
+        session: Session,
+        users: List[UserInput],
+        hashed_passwords: List[str],
+        role_cache: Optional[ReferenceCache[UserRole]] = None,
+        chunk_size: int = BULK_INSERT_CHUNK_SIZE,
+    ) -> DbResult[List[Optional["User"]]]:
+        """
+        Adds all the users in one transaction, 'chunk_size' rows per INSERT (the rows of a chunk
+        are sent as a single executemany).
+
+        The new users are returned in the order they were given, 'None' for those whose email was already taken,
+        by an existing user or by one given before.
+        """
+
+        try:
+            roles = {
+                str(user_role.role): user_role
+                for user_role in UserRole.get_or_add_many(
+                    session=session,
+                    roles=[user.role for user in users],
+                    cache=role_cache,
+                )
+            }
+
+            new_users: List[Optional[User]] = []
+            taken_emails: Set[str] = set()
+            for start in range(0, len(users), chunk_size):
+                chunk = users[start : start + chunk_size]
+                taken_emails.update(
+                    email
+                    for (email,) in session.query(cls.email).filter(
+                        cls.email.in_([user.email for user in chunk])
+                    )
+                )
+
+                chunk_users = []
+                for user, hashed_password in zip(
+                    chunk, hashed_passwords[start : start + chunk_size]
+                ):
+                    if user.email in taken_emails:
+                        new_users.append(None)
+                        continue
+
+                    taken_emails.add(user.email)
+                    new_user = User(
+                        first_name=user.first_name,
+                        last_name=user.last_name,
+                        email=user.email,
+                        password=hashed_password,
+                        role=roles[user.role],
+                    )
+                    chunk_users.append(new_user)
+                    new_users.append(new_user)
+
+                session.add_all(chunk_users)
+                session.flush()
+
+            session.commit()
+        except IntegrityError as e:
+            session.rollback()
+            return DbResult.as_error(
+                message="User already exists",
+                details=f"{e}",
+                error_type=DbErrorType.RECORD_ALREADY_EXIST,
+            )
+        except Exception as e:
+            session.rollback()
+            return DbResult.as_error(
+                message="Something went wrong while adding users",
+                details=str(e),
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+        return DbResult.as_success(data=new_users)
 
     @classmethod
     def get_users(cls, session: Session) -> DbResult[List["User"]]:
@@ -596,6 +811,89 @@ class User(BaseModel):
 
         return DbResult.as_success(data=user)
 
+    @classmethod
+    def output_query(cls, session: Session) -> Query:
+        # NOTE: the columns of 'UserOutput' only, the rows are not hydrated into ORM objects
+        # (and the password hash is never read)
+        return session.query(
+            cls.id, cls.first_name, cls.last_name, cls.email, UserRole.role
+        ).join(cls.role)
+
+    @staticmethod
+    def to_output(row: Row) -> UserOutput:
+        # NOTE: 'model_construct' skips validation, the values come straight from the database
+        return UserOutput.model_construct(
+            id=row.id,
+            first_name=row.first_name,
+            last_name=row.last_name,
+            email=row.email,
+            role=row.role,
+        )
+
+    @classmethod
+    def get_users_outputs(cls, session: Session) -> DbResult[List[UserOutput]]:
+        try:
+            users = [
+                cls.to_output(row) for row in cls.output_query(session=session).all()
+            ]
+        except Exception as e:
+            return DbResult.as_error(
+                message="Something went wrong while getting users",
+                details=str(e),
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+        return DbResult.as_success(data=users)
+
+    @classmethod
+    def get_users_outputs_page(
+        cls, session: Session, limit: int, after: Optional[str] = None
+    ) -> DbResult[Tuple[List[UserOutput], Optional[str]]]:
+        try:
+            rows, next_cursor = keyset_page(
+                query=cls.output_query(session=session),
+                key=cls.id,
+                limit=limit,
+                after=after,
+            )
+        except Exception as e:
+            return DbResult.as_error(
+                message="Something went wrong while getting users",
+                details=str(e),
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+        return DbResult.as_success(
+            data=([cls.to_output(row) for row in rows], next_cursor)
+        )
+
+    @classmethod
+    def stream_users_outputs(
+        cls, session: Session, chunk_size: int
+    ) -> Iterator[List[UserOutput]]:
+        # NOTE: rows are fetched 'chunk_size' at a time, so only one chunk is held in memory
+        return (
+            [cls.to_output(row) for row in rows]
+            for rows in batched(
+                cls.output_query(session=session)
+                .order_by(cls.id)
+                .yield_per(chunk_size),
+                size=chunk_size,
+            )
+        )
+
+    @classmethod
+    def get_user_output_by_id(cls, session: Session, id: str) -> DbResult[UserOutput]:
+        row = cls.output_query(session=session).filter(cls.id == id).first()
+        if row is None:
+            return DbResult.as_error(
+                message="User does not exist",
+                details=f"There is no user with ID '{id}'",
+                error_type=DbErrorType.RECORD_NOT_FOUND,
+            )
+
+        return DbResult.as_success(data=cls.to_output(row))
+
     @classmethod
     def get_user_by_email(cls, session: Session, email: str) -> DbResult["User"]:
         user = session.query(cls).filter_by(email=email).first()
@@ -1,73 +1,151 @@
 import time
-from typing import Any, Optional
+import contextvars
+from concurrent.futures import Future
+from typing import Any, Callable, Iterator, List, Optional, Type, TypeVar
 
 from sqlalchemy.orm import Session
 from paho.mqtt.client import Client, MQTTMessage
 
 from config.app import AppConfig
 
+from core.model import WeekDay
+from core.pagination import Chunk, Page, PageQuery
+from core.reference_cache import ReferenceCache
 from core.utils import handle_db_error
 
+from db.dataclasses import DbError, DbErrorType, DbResult
 from db.sqlite import Sqlite
+from db.writer import GroupCommitWriter
 
 from mqtt.client import MqttClient
-from mqtt.router import MqttRouter, Params
-from mqtt.schema import HttpMethod, MqttRequest, MqttStatus
+from mqtt.router import MqttRouter, Params, current_route_access
+from mqtt.schema import HttpMethod, MqttRequest, MqttStatus, RouteAccess
+from mqtt.serializers import response_serializers
 from mqtt.exceptions import (
-    MqttInvalidDataFormat,
+    MqttInternalError,
     MqttParametersNotFound,
     MqttUnauthorized,
 )
 
-from user.model import PreferredTimeSlot, User, UserPreference
+from user.matching import PreferenceMatcher, PreferenceMatcherCache
+from user.model import PreferredTimeSlot, User, UserPreference, UserRole
 from user.schema import (
+    BulkUserResult,
+    BulkUserStatus,
+    PreferenceMatchQuery,
+    SlotMatches,
     TimeSlotInput,
+    TimeSlotOutput,
     UserInput,
     UserLogin,
+    UserOutput,
     UserPreferenceInput,
+    UserPreferenceOutput,
     UserPreferenceUpdate,
+    to_minutes,
 )
 
+from auth.encryption import PasswordHasher
 from auth.jwt import generate_jwt, is_jwt_valid
 from auth.schema import JwtToken, JwtValidationResult
 
+T = TypeVar("T")
+
 
 class UserMqttRouter:
-    def __init__(self, app_config: AppConfig, database: Sqlite) -> None:
+    def __init__(
+        self,
+        app_config: AppConfig,
+        database: Sqlite,
+        password_hasher: Optional[PasswordHasher] = None,
+        writer: Optional[GroupCommitWriter] = None,
+    ) -> None:
         self.app_config = app_config
         self.database = database
+        self.password_hasher = password_hasher or PasswordHasher(workers=0)
+        self.writer = writer or GroupCommitWriter(
+            engine=database.engine, max_batch_size=0
+        )
+        # NOTE: the week days and roles are resolved in memory, see 'ReferenceCache'
+        self.week_day_cache: ReferenceCache[WeekDay] = ReferenceCache(
+            model=WeekDay, name_column="name"
+        )
+        self.role_cache: ReferenceCache[UserRole] = ReferenceCache(
+            model=UserRole, name_column="role"
+        )
+        with Session(database.engine) as session:
+            self.week_day_cache.load(session=session)
+            self.role_cache.load(session=session)
+        # NOTE: loaded on the first matching request, see 'PreferenceMatcherCache'
+        self.preference_matcher = PreferenceMatcherCache(
+            loader=self._load_preference_matcher,
+            max_age_s=app_config.PREFERENCE_MATCHER_MAX_AGE_S,
+        )
         self.router: MqttRouter = self._register_routes()
+        self._register_response_serializers()
 
     def _register_routes(self) -> MqttRouter:
         router = MqttRouter()
 
-        router.register_route(HttpMethod.GET, "/users", self.get_users)
         router.register_route(
-            HttpMethod.GET, "/users/preferences", self.get_users_preferences
+            HttpMethod.GET, "/users", self.get_users, body=Optional[PageQuery]
+        )
+        router.register_route(
+            HttpMethod.GET,
+            "/users/preferences",
+            self.get_users_preferences,
+            body=Optional[PageQuery],
         )
         router.register_route(HttpMethod.GET, "/users/:id", self.get_user_by_id)
         router.register_route(
             HttpMethod.GET, "/users/:id/preferences", self.get_single_user_preferences
         )
 
-        router.register_route(HttpMethod.POST, "/login", self.login)
-        router.register_route(HttpMethod.POST, "/users", self.register_user)
         router.register_route(
-            HttpMethod.POST, "/users/:id/jwt", self.validate_jwt_token
+            HttpMethod.POST,
+            "/login",
+            self.login,
+            body=UserLogin,
+            access=RouteAccess.READ,
+        )
+        router.register_route(
+            HttpMethod.POST, "/users", self.register_user, body=UserInput
         )
         router.register_route(
-            HttpMethod.POST, "/users/:id/preferences", self.add_user_preference
+            HttpMethod.POST, "/users/bulk", self.register_users, body=List[UserInput]
+        )
+        router.register_route(
+            HttpMethod.POST,
+            "/users/preferences/matches",
+            self.match_preferences,
+            body=PreferenceMatchQuery,
+            access=RouteAccess.READ,
+        )
+        router.register_route(
+            HttpMethod.POST,
+            "/users/:id/jwt",
+            self.validate_jwt_token,
+            body=JwtToken,
+            access=RouteAccess.READ,
+        )
+        router.register_route(
+            HttpMethod.POST,
+            "/users/:id/preferences",
+            self.add_user_preference,
+            body=UserPreferenceInput,
         )
         router.register_route(
             HttpMethod.POST,
             "/users/:user_id/preferences/:preference_id/time-slots",
             self.add_time_slot_to_user_preference,
+            body=TimeSlotInput,
         )
 
         router.register_route(
             HttpMethod.PATCH,
             "/users/:user_id/preferences/:preference_id",
             self.update_user_preference,
+            body=UserPreferenceUpdate,
         )
 
         router.register_route(
@@ -78,19 +156,104 @@ class UserMqttRouter:
 
         return router
 
+    def _register_response_serializers(self) -> None:
+        # NOTE: done up-front, so the first response of each type does not pay for building its serializer
+        for payload_type in (
+            UserOutput,
+            List[UserOutput],
+            List[BulkUserResult],
+            List[SlotMatches],
+            UserPreferenceOutput,
+            List[UserPreferenceOutput],
+            Page[UserOutput],
+            Page[UserPreferenceOutput],
+            Chunk[UserOutput],
+            Chunk[UserPreferenceOutput],
+            TimeSlotOutput,
+            JwtToken,
+            JwtValidationResult,
+        ):
+            response_serializers.register(payload_type)
+
+    def _session(self) -> Session:
+        # NOTE: read routes use the read-only pool, see 'register_route(access=...)'
+        if current_route_access.get() is RouteAccess.READ:
+            return Session(self.database.read_engine)
+        return Session(self.database.engine)
+
+    def _write(self, unit: Callable[[Session], DbResult[T]]) -> DbResult[T]:
+        # NOTE: the unit runs on the writer's thread, so whatever the response needs from the
+        # models has to be read inside of it ('to_schema'), while its session is still open
+        try:
+            return self.writer.submit(unit).result()
+        except Exception as e:
+            return DbResult.as_error(
+                message="Something went wrong while saving the changes",
+                details=str(e),
+                error_type=DbErrorType.UNKNOWN_ERROR,
+            )
+
+    def _load_preference_matcher(self) -> PreferenceMatcher:
+        with Session(self.database.read_engine) as session:
+            return PreferenceMatcher.load(session=session)
+
     def serve(self, client, userdata, msg) -> None:
         self.router.serve(client=client, userdata=userdata, msg=msg)
 
+    async def serve_async(self, client, userdata, msg, executor=None) -> None:
+        await self.router.serve_async(
+            client=client, userdata=userdata, msg=msg, executor=executor
+        )
+
     def get_users(
         self,
         client: Client,
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[Optional[PageQuery]],
     ) -> None:
-        with Session(self.database.engine) as session:
-            result = User.get_users(session=session)
+        query = payload.data or PageQuery()
+        if query.stream:
+            with self._session() as session:
+                self._send_chunks(
+                    client=client,
+                    msg=msg,
+                    payload=payload,
+                    chunk_type=Chunk[UserOutput],
+                    chunks=User.stream_users_outputs(
+                        session=session, chunk_size=query.page_size()
+                    ),
+                )
+            return
+
+        if query.is_paginated():
+            with self._session() as session:
+                page_result = User.get_users_outputs_page(
+                    session=session, limit=query.page_size(), after=query.after()
+                )
+
+                if page_result.is_err():
+                    err = page_result.unwrap_err()
+                    handle_db_error(err=err, client=client, msg=msg, payload=payload)
+                    return
+
+                users, next_cursor = page_result.unwrap()
+
+            MqttClient.send_response(
+                client=client,
+                origin_topic=msg.topic,
+                message_id=payload.msgId,
+                status_code=MqttStatus.STATUS_200_OK,
+                payload=Page[UserOutput](
+                    items=users,
+                    next_cursor=next_cursor,
+                ),
+            )
+            return
+
+        with self._session() as session:
+            result = User.get_users_outputs(session=session)
 
             if result.is_err():
                 err = result.unwrap_err()
@@ -104,9 +267,49 @@ class UserMqttRouter:
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_200_OK,
-            payload=[user.to_schema() for user in users],
+            payload=users,
         )
 
+    def _send_chunks(
+        self,
+        client: Client,
+        msg: MQTTMessage,
+        payload: MqttRequest[Any],
+        chunk_type: Type[Chunk],
+        chunks: Iterator[List[Any]],
+    ) -> None:
+        # NOTE: every chunk is a response with the request's 'msgId', numbered by 'seq',
+        # one chunk is read ahead so that the last one can be flagged as such
+        try:
+            seq, chunk = 0, next(chunks, [])
+            while True:
+                next_chunk = next(chunks, None)
+                MqttClient.send_response(
+                    client=client,
+                    origin_topic=msg.topic,
+                    message_id=payload.msgId,
+                    status_code=MqttStatus.STATUS_200_OK,
+                    payload=chunk_type(
+                        seq=seq,
+                        last=next_chunk is None,
+                        items=chunk,
+                    ),
+                )
+                if next_chunk is None:
+                    return
+                seq, chunk = seq + 1, next_chunk
+        except Exception as e:
+            handle_db_error(
+                err=DbError(
+                    message="Something went wrong while streaming the results",
+                    details=str(e),
+                    error_type=DbErrorType.UNKNOWN_ERROR,
+                ),
+                client=client,
+                msg=msg,
+                payload=payload,
+            )
+
     def get_user_by_id(
         self,
         client: Client,
@@ -136,8 +339,8 @@ class UserMqttRouter:
             )
             return
 
-        with Session(self.database.engine) as session:
-            result = User.get_user_by_id(session=session, id=user_id)
+        with self._session() as session:
+            result = User.get_user_output_by_id(session=session, id=user_id)
 
             if result.is_err():
                 err = result.unwrap_err()
@@ -151,7 +354,7 @@ class UserMqttRouter:
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_200_OK,
-            payload=user.to_schema(),
+            payload=user,
         )
 
     def get_users_preferences(
@@ -160,12 +363,49 @@ class UserMqttRouter:
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[Optional[PageQuery]],
     ):
-        with Session(self.database.engine) as session:
-            result = UserPreference.get_users_preferences(
-                session=session
+        query = payload.data or PageQuery()
+        if query.stream:
+            with self._session() as session:
+                self._send_chunks(
+                    client=client,
+                    msg=msg,
+                    payload=payload,
+                    chunk_type=Chunk[UserPreferenceOutput],
+                    chunks=UserPreference.stream_users_preferences_outputs(
+                        session=session, chunk_size=query.page_size()
+                    ),
+                )
+            return
+
+        if query.is_paginated():
+            with self._session() as session:
+                page_result = UserPreference.get_users_preferences_outputs_page(
+                    session=session, limit=query.page_size(), after=query.after()
+                )
+
+                if page_result.is_err():
+                    err = page_result.unwrap_err()
+                    handle_db_error(err=err, client=client, msg=msg, payload=payload)
+                    return
+
+                user_preferences, next_cursor = page_result.unwrap()
+
+            MqttClient.send_response(
+                client=client,
+                origin_topic=msg.topic,
+                message_id=payload.msgId,
+                status_code=MqttStatus.STATUS_200_OK,
+                payload=Page[UserPreferenceOutput](
+                    items=user_preferences,
+                    next_cursor=next_cursor,
+                ),
             )
+            return
+
+        with self._session() as session:
+            result = UserPreference.get_users_preferences_outputs(session=session)
 
             if result.is_err():
                 err = result.unwrap_err()
@@ -179,9 +419,7 @@ class UserMqttRouter:
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_200_OK,
-            payload=[
-                user_preference.to_schema() for user_preference in user_preferences
-            ],
+            payload=user_preferences,
         )
 
     def get_single_user_preferences(
@@ -213,8 +451,8 @@ class UserMqttRouter:
             )
             return
 
-        with Session(self.database.engine) as session:
-            result = UserPreference.get_user_preferences(
+        with self._session() as session:
+            result = UserPreference.get_user_preferences_outputs(
                 session=session, user_id=user_id
             )
 
@@ -225,13 +463,53 @@ class UserMqttRouter:
 
             user_preferences = result.unwrap()
 
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=user_preferences,
+        )
+
+    def match_preferences(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[PreferenceMatchQuery],
+    ) -> None:
+        query = payload.data
+
+        try:
+            matcher = self.preference_matcher.get()
+            matches = matcher.match(
+                [
+                    (slot.day, to_minutes(slot.start_time), to_minutes(slot.end_time))
+                    for slot in query.slots
+                ]
+            )
+        except Exception as e:
+            MqttInternalError(
+                client=client, topic=msg.topic, message_id=payload.msgId, details=str(e)
+            )
+            return
+
         MqttClient.send_response(
             client=client,
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_200_OK,
             payload=[
-                user_preference.to_schema() for user_preference in user_preferences
+                SlotMatches.model_construct(
+                    id=slot.id,
+                    day=slot.day,
+                    start_time=slot.start_time,
+                    end_time=slot.end_time,
+                    matches=len(users),
+                    user_ids=matcher.user_ids_of(users[: query.limit]),
+                )
+                for slot, users in zip(query.slots, matches)
             ],
         )
 
@@ -241,51 +519,115 @@ class UserMqttRouter:
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[UserInput],
     ) -> None:
+        user_data = payload.data
+
         try:
-            user_data = UserInput(**payload.data)
+            hashed_password = self.password_hasher.hash_password(
+                plain_password=user_data.password
+            ).result()
         except Exception as e:
-            MqttInvalidDataFormat(
-                client=client, topic=msg.topic, details=str(e), message_id=payload.msgId
+            MqttInternalError(
+                client=client, topic=msg.topic, message_id=payload.msgId, details=str(e)
             )
             return
 
-        with Session(self.database.engine) as session:
-            result = User.add_user(session=session, user=user_data)
-
-            if result.is_err():
-                err = result.unwrap_err()
-                handle_db_error(err=err, client=client, msg=msg, payload=payload)
-                return
+        result = self._write(
+            lambda session: User.add_user(
+                session=session,
+                user=user_data,
+                hashed_password=hashed_password,
+                role_cache=self.role_cache,
+            ).map(User.to_schema)
+        )
 
-            user = result.unwrap()
+        if result.is_err():
+            err = result.unwrap_err()
+            handle_db_error(err=err, client=client, msg=msg, payload=payload)
+            return
 
         MqttClient.send_response(
             client=client,
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_201_CREATED,
-            payload=user.to_schema(),
+            payload=result.unwrap(),
         )
 
-    def login(
+    def register_users(
         self,
         client: Client,
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[List[UserInput]],
     ) -> None:
+        users_data = payload.data
+
         try:
-            login_data = UserLogin(**payload.data)
+            # NOTE: submitted all at once, so the hasher's processes work on them in parallel
+            hashed_password_futures = [
+                self.password_hasher.hash_password(plain_password=user_data.password)
+                for user_data in users_data
+            ]
+            hashed_passwords = [future.result() for future in hashed_password_futures]
         except Exception as e:
-            MqttInvalidDataFormat(
-                client=client, topic=msg.topic, details=str(e), message_id=payload.msgId
+            MqttInternalError(
+                client=client, topic=msg.topic, message_id=payload.msgId, details=str(e)
+            )
+            return
+
+        result = self._write(
+            lambda session: User.add_users(
+                session=session,
+                users=users_data,
+                hashed_passwords=hashed_passwords,
+                role_cache=self.role_cache,
+            ).map(
+                lambda new_users: [
+                    (
+                        BulkUserResult(
+                            email=user_data.email,
+                            status=BulkUserStatus.CREATED,
+                            user=new_user.to_schema(),
+                        )
+                        if new_user is not None
+                        else BulkUserResult(
+                            email=user_data.email,
+                            status=BulkUserStatus.CONFLICT,
+                            details=f"User with email '{user_data.email}' already exists",
+                        )
+                    )
+                    for user_data, new_user in zip(users_data, new_users)
+                ]
             )
+        )
+
+        if result.is_err():
+            err = result.unwrap_err()
+            handle_db_error(err=err, client=client, msg=msg, payload=payload)
             return
 
-        with Session(self.database.engine) as session:
+        MqttClient.send_response(
+            client=client,
+            origin_topic=msg.topic,
+            message_id=payload.msgId,
+            status_code=MqttStatus.STATUS_200_OK,
+            payload=result.unwrap(),
+        )
+
+    def login(
+        self,
+        client: Client,
+        userdata: Any,
+        msg: MQTTMessage,
+        params: Optional[Params],
+        payload: MqttRequest[UserLogin],
+    ) -> None:
+        login_data = payload.data
+
+        with self._session() as session:
             user_result = User.get_user_by_email(
                 session=session, email=login_data.email
             )
@@ -297,7 +639,42 @@ class UserMqttRouter:
             user = user_result.unwrap()
             user_role = user.role
 
-        if not user.is_correct_password(plain_password=login_data.password):
+        # NOTE: the response is published once the password is verified, which frees
+        # this thread to serve other requests in the meantime (the context carries the
+        # request's codec over to the thread that completes the verification)
+        context = contextvars.copy_context()
+        self.password_hasher.is_correct_password(
+            plain_password=login_data.password, hashed_password=str(user.password)
+        ).add_done_callback(
+            lambda verification: context.run(
+                self._send_login_response,
+                client=client,
+                msg=msg,
+                payload=payload,
+                user=user,
+                role=str(user_role.role),
+                verification=verification,
+            )
+        )
+
+    def _send_login_response(
+        self,
+        client: Client,
+        msg: MQTTMessage,
+        payload: MqttRequest[Any],
+        user: User,
+        role: str,
+        verification: "Future[bool]",
+    ) -> None:
+        try:
+            is_correct_password = verification.result()
+        except Exception as e:
+            MqttInternalError(
+                client=client, topic=msg.topic, message_id=payload.msgId, details=str(e)
+            )
+            return
+
+        if not is_correct_password:
             MqttUnauthorized(
                 client=client,
                 topic=msg.topic,
@@ -310,7 +687,7 @@ class UserMqttRouter:
                 "sub": str(user.id),
                 "full_name": f"{user.first_name} {user.last_name}",
                 "email": str(user.email),
-                "role": str(user_role.role),
+                "role": role,
                 "iat": int(time.time()),
                 "exp": int(time.time()) + self.app_config.JWT_EXP_TIME,
             },
@@ -332,15 +709,9 @@ class UserMqttRouter:
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[JwtToken],
     ) -> None:
-        try:
-            token_data = JwtToken(**payload.data)
-        except Exception as e:
-            MqttInvalidDataFormat(
-                client=client, topic=msg.topic, details=str(e), message_id=payload.msgId
-            )
-            return
+        token_data = payload.data
 
         is_valid, reason = is_jwt_valid(
             token=token_data.token,
@@ -365,15 +736,9 @@ class UserMqttRouter:
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[UserPreferenceInput],
     ) -> None:
-        try:
-            user_preference = UserPreferenceInput(**payload.data)
-        except Exception as e:
-            MqttInvalidDataFormat(
-                client=client, topic=msg.topic, details=str(e), message_id=payload.msgId
-            )
-            return
+        user_preference = payload.data
 
         if params is None:
             MqttParametersNotFound(
@@ -396,24 +761,27 @@ class UserMqttRouter:
             )
             return
 
-        with Session(self.database.engine) as session:
-            result = UserPreference.add_user_preference(
-                session=session, user_id=user_id, user_preference=user_preference
-            )
-
-            if result.is_err():
-                err = result.unwrap_err()
-                handle_db_error(err=err, client=client, msg=msg, payload=payload)
-                return
+        result = self._write(
+            lambda session: UserPreference.add_user_preference(
+                session=session,
+                user_id=user_id,
+                user_preference=user_preference,
+                week_day_cache=self.week_day_cache,
+            ).map(UserPreference.to_schema)
+        )
 
-            user_preference = result.unwrap()
+        if result.is_err():
+            err = result.unwrap_err()
+            handle_db_error(err=err, client=client, msg=msg, payload=payload)
+            return
 
+        self.preference_matcher.invalidate()
         MqttClient.send_response(
             client=client,
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_201_CREATED,
-            payload=user_preference.to_schema(),
+            payload=result.unwrap(),
         )
 
     def add_time_slot_to_user_preference(
@@ -422,15 +790,9 @@ class UserMqttRouter:
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[TimeSlotInput],
     ) -> None:
-        try:
-            time_slot = TimeSlotInput(**payload.data)
-        except Exception as e:
-            MqttInvalidDataFormat(
-                client=client, topic=msg.topic, details=str(e), message_id=payload.msgId
-            )
-            return
+        time_slot = payload.data
 
         if params is None:
             MqttParametersNotFound(
@@ -453,24 +815,24 @@ class UserMqttRouter:
             )
             return
 
-        with Session(self.database.engine) as session:
-            result = PreferredTimeSlot.add_time_slot(
+        result = self._write(
+            lambda session: PreferredTimeSlot.add_time_slot(
                 session=session, user_preference_id=preference_id, time_slot=time_slot
-            )
-
-            if result.is_err():
-                err = result.unwrap_err()
-                handle_db_error(err=err, client=client, msg=msg, payload=payload)
-                return
+            ).map(PreferredTimeSlot.to_schema)
+        )
 
-            time_slot = result.unwrap()
+        if result.is_err():
+            err = result.unwrap_err()
+            handle_db_error(err=err, client=client, msg=msg, payload=payload)
+            return
 
+        self.preference_matcher.invalidate()
         MqttClient.send_response(
             client=client,
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_201_CREATED,
-            payload=time_slot.to_schema(),
+            payload=result.unwrap(),
         )
 
     def update_user_preference(
@@ -479,15 +841,9 @@ class UserMqttRouter:
         userdata: Any,
         msg: MQTTMessage,
         params: Optional[Params],
-        payload: MqttRequest[Any],
+        payload: MqttRequest[UserPreferenceUpdate],
     ) -> None:
-        try:
-            user_preference = UserPreferenceUpdate(**payload.data)
-        except Exception as e:
-            MqttInvalidDataFormat(
-                client=client, topic=msg.topic, details=str(e), message_id=payload.msgId
-            )
-            return
+        user_preference = payload.data
 
         if params is None:
             MqttParametersNotFound(
@@ -510,26 +866,27 @@ class UserMqttRouter:
             )
             return
 
-        with Session(self.database.engine) as session:
-            result = UserPreference.update_user_preference(
+        result = self._write(
+            lambda session: UserPreference.update_user_preference(
                 session=session,
                 user_preference_id=preference_id,
                 updated_user_preference=user_preference,
-            )
-
-            if result.is_err():
-                err = result.unwrap_err()
-                handle_db_error(err=err, client=client, msg=msg, payload=payload)
-                return
+                week_day_cache=self.week_day_cache,
+            ).map(UserPreference.to_schema)
+        )
 
-            user_preference = result.unwrap()
+        if result.is_err():
+            err = result.unwrap_err()
+            handle_db_error(err=err, client=client, msg=msg, payload=payload)
+            return
 
+        self.preference_matcher.invalidate()
         MqttClient.send_response(
             client=client,
             origin_topic=msg.topic,
             message_id=payload.msgId,
             status_code=MqttStatus.STATUS_200_OK,
-            payload=user_preference.to_schema(),
+            payload=result.unwrap(),
         )
 
     def remove_user_preference(
@@ -561,16 +918,18 @@ class UserMqttRouter:
             )
             return
 
-        with Session(self.database.engine) as session:
-            result = UserPreference.remove_user_preference(
+        result = self._write(
+            lambda session: UserPreference.remove_user_preference(
                 session=session, user_preference_id=preference_id
             )
+        )
 
-            if result.is_err():
-                err = result.unwrap_err()
-                handle_db_error(err=err, client=client, msg=msg, payload=payload)
-                return
+        if result.is_err():
+            err = result.unwrap_err()
+            handle_db_error(err=err, client=client, msg=msg, payload=payload)
+            return
 
+        self.preference_matcher.invalidate()
         MqttClient.send_response(
             client=client,
             origin_topic=msg.topic,
@@ -1,7 +1,8 @@
 from datetime import date
+from enum import StrEnum
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from core.schema import DayOfWeek
 
@@ -21,6 +22,19 @@ class UserOutput(UserBase):
     id: str
 
 
+class BulkUserStatus(StrEnum):
+    CREATED = "created"
+    CONFLICT = "conflict"
+
+
+class BulkUserResult(BaseModel):
+    # NOTE: one per registered user, in the order of the request
+    email: str
+    status: BulkUserStatus
+    user: Optional[UserOutput] = None
+    details: Optional[str] = None
+
+
 class UserRole(BaseModel):
     role: str
 
@@ -68,3 +82,46 @@ class UserPreferenceUpdate(BaseModel):
     end_date: Optional[date] = Field(default=None)
     is_active: Optional[bool] = Field(default=None)
     days_of_week: Optional[List[DayOfWeek]] = Field(default=None)
+
+
+# NOTE: bounds the work (and the response) of a single matching request
+MAX_MATCH_SLOTS = 10_000
+MAX_MATCHES_PER_SLOT = 10_000
+
+
+def to_minutes(time: str) -> int:
+    # like: '8:00', up to '24:00' for the end of the day
+    hour, minutes = (int(part) for part in time.split(":"))
+    if not (0 <= minutes < 60 and 0 <= hour * 60 + minutes <= 24 * 60):
+        raise ValueError(f"Invalid time '{time}', expected 'HH:MM'")
+    return hour * 60 + minutes
+
+
+class MatchSlotInput(BaseModel):
+    # the availability slot's ID, sent back with its matches
+    id: Optional[str] = Field(default=None)
+    day: date
+    start_time: str  # like: '8:00'
+    end_time: str
+
+    @model_validator(mode="after")
+    def validate_times(self) -> "MatchSlotInput":
+        if to_minutes(self.end_time) <= to_minutes(self.start_time):
+            raise ValueError("'end_time' has to be after 'start_time'")
+        return self
+
+
+class PreferenceMatchQuery(BaseModel):
+    slots: List[MatchSlotInput] = Field(min_length=1, max_length=MAX_MATCH_SLOTS)
+    # user IDs sent back per slot, 'matches' still counts all of them
+    limit: int = Field(default=100, ge=0, le=MAX_MATCHES_PER_SLOT)
+
+
+class SlotMatches(BaseModel):
+    # NOTE: one per slot, in the order of the request
+    id: Optional[str]
+    day: date
+    start_time: str
+    end_time: str
+    matches: int
+    user_ids: List[str]
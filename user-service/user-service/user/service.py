@@ -1,14 +1,20 @@
+import asyncio
 from typing import Dict, Any
 
-from paho.mqtt.client import Client, MQTTMessage
+from paho.mqtt.client import Client, MQTTMessage, MQTTv5, MQTTv311
 
 from config.app import AppConfig
 
 from logger.protocol import LoggerProto
 
+from mqtt.aio import AsyncMqttClient
 from mqtt.client import MqttClient
+from mqtt.codec import codec_topics, split_codec_suffix
+from mqtt.compression import ResponseCompression
 from mqtt.router import MqttRouterProto
 from mqtt.schema import Topic
+from mqtt.serializers import response_serializers
+from mqtt.worker_pool import MqttWorkerPool
 
 
 class UserService:
@@ -16,17 +22,43 @@ class UserService:
         self, logger: LoggerProto, app_config: AppConfig, client_id="user-service"
     ) -> None:
         self.logger = logger
-        self.client = MqttClient(
+        self.is_asyncio_runtime = app_config.MQTT_RUNTIME.lower() == "asyncio"
+        # NOTE: replicas need their own client ID, otherwise the broker disconnects
+        # the previous connection with the same ID
+        self.shared_group = app_config.MQTT_SHARED_GROUP
+        if self.shared_group:
+            client_id = f"{client_id}-{app_config.INSTANCE_ID}"
+
+        client_cls = AsyncMqttClient if self.is_asyncio_runtime else MqttClient
+        self.client = client_cls(
             broker_uri=app_config.MQTT_BROKER,
+            broker_port=int(app_config.MQTT_PORT),
             client_id=client_id,
             logger=self.logger,
+            protocol=MQTTv5 if self.shared_group else MQTTv311,
+        )
+        self.worker_pool = MqttWorkerPool(
+            size=app_config.WORKER_POOL_SIZE, logger=self.logger
         )
         self.mounted_routers: Dict[Topic, MqttRouterProto] = dict()
+        response_serializers.configure_compression(
+            ResponseCompression.from_config(
+                compression=app_config.RESPONSE_COMPRESSION,
+                threshold_bytes=app_config.RESPONSE_COMPRESSION_THRESHOLD,
+            )
+        )
 
     def mount_router(self, topic: str, router: MqttRouterProto) -> None:
         self.mounted_routers[topic] = router
 
     def listen_and_serve(self) -> None:
+        if self.is_asyncio_runtime:
+            try:
+                asyncio.run(self.listen_and_serve_async())
+            except KeyboardInterrupt:
+                pass
+            return
+
         connected = self.client.retry_connect()
         if not connected:
             return
@@ -34,17 +66,60 @@ class UserService:
         self._subscribe_to_registered_topics()
         self.client.set_on_message(self._dispatch_message)
 
-        self.client.start_loop()
+        try:
+            self.client.start_loop()
+        finally:
+            self.worker_pool.shutdown()
+
+    async def listen_and_serve_async(self) -> None:
+        assert isinstance(self.client, AsyncMqttClient)
+
+        connected = await self.client.connect_async()
+        if not connected:
+            return
+
+        self._subscribe_to_registered_topics()
+        self.client.set_on_message_async(self._dispatch_message_async)
+
+        try:
+            await self.client.run()
+        finally:
+            self.worker_pool.shutdown()
 
     def _dispatch_message(
         self, client: Client, userdata: Any, msg: MQTTMessage
     ) -> None:
-        router = self.mounted_routers.get(msg.topic, None)
+        topic, _ = split_codec_suffix(msg.topic)
+        router = self.mounted_routers.get(topic, None)
+        if router is not None:
+            self.worker_pool.submit(
+                router.serve, client=client, userdata=userdata, msg=msg
+            )
+        else:
+            self.logger.warning(message=f"No router mounted for topic '{msg.topic}'")
+
+    async def _dispatch_message_async(
+        self, client: Client, userdata: Any, msg: MQTTMessage
+    ) -> None:
+        topic, _ = split_codec_suffix(msg.topic)
+        router = self.mounted_routers.get(topic, None)
         if router is not None:
-            router.serve(client=client, userdata=userdata, msg=msg)
+            # NOTE: blocking handlers run on the worker pool, async ones on the loop
+            await router.serve_async(
+                client=client,
+                userdata=userdata,
+                msg=msg,
+                executor=self.worker_pool.executor,
+            )
         else:
             self.logger.warning(message=f"No router mounted for topic '{msg.topic}'")
 
     def _subscribe_to_registered_topics(self) -> None:
-        for topic in self.mounted_routers:
-            self.client.subscribe(topic)
+        for mounted_topic in self.mounted_routers:
+            # NOTE: binary codecs can also be selected with a topic suffix ('.../req/msgpack')
+            for topic in codec_topics(mounted_topic):
+                if self.shared_group:
+                    topic = MqttClient.shared_topic(
+                        topic=topic, group=self.shared_group
+                    )
+                self.client.subscribe(topic)